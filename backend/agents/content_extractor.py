@@ -0,0 +1,378 @@
+"""
+Local main-content extraction for job postings.
+
+Pulls the job description out of crawled HTML without an LLM:
+schema.org JobPosting JSON-LD when the page carries it, otherwise a
+readability-style score over the DOM (text density, commas, link density,
+class/id hints) to find the main content block. Each candidate is graded on
+how much it looks like a job description, so the Gemini Vision fallback is
+only used for pages that are genuinely unreadable.
+"""
+import html as html_lib
+import json
+import os
+import re
+from html.parser import HTMLParser
+
+from utils.metrics import Counter
+
+# Below this quality score the page is treated as unreadable and screenshotted for OCR
+JD_QUALITY_THRESHOLD = float(os.getenv("JD_QUALITY_THRESHOLD", "0.5"))
+MIN_JD_CHARS = 300
+
+JD_SOURCES = Counter(
+    "resume_job_description_source_total",
+    "Where job description text came from (vision = Gemini OCR fallback)",
+    ["source"]
+)
+
+VOID_TAGS = frozenset(
+    "area base br col embed hr img input link meta param source track wbr".split()
+)
+SKIP_TAGS = frozenset("script style noscript svg template iframe button head".split())
+# Form controls whose text (option lists) is dropped; their end tags are optional, so nothing is skipped by depth
+CONTROL_TEXT_TAGS = frozenset(("select", "option", "optgroup"))
+BLOCK_TAGS = frozenset(
+    "address article aside blockquote dd div dl dt fieldset figcaption figure footer h1 h2 h3 h4 h5 h6 "
+    "header hr li main nav ol p pre section table tbody td tfoot th thead tr ul br".split()
+)
+BREAK_BEFORE_TAGS = frozenset("p h1 h2 h3 h4 h5 h6 table".split())
+PARAGRAPH_TAGS = frozenset("p li pre td dd blockquote h2 h3 h4".split())
+CANDIDATE_TAGS = frozenset("div article section main td body".split())
+BOILERPLATE_TAGS = frozenset("nav footer aside header".split())
+
+POSITIVE_HINT = re.compile(
+    r"article|body|content|entry|main|post|text|description|job|posting|vacancy|details|requirements", re.I
+)
+NEGATIVE_HINT = re.compile(
+    r"comment|footer|foot|nav|sidebar|menu|banner|cookie|consent|share|social|related|promo|"
+    r"advert|\bad-|breadcrumb|header|masthead|login|signup|modal|popup|similar", re.I
+)
+
+JOB_TERMS = (
+    "responsibilit", "requirement", "qualification", "experience", "skills", "you will",
+    "what you", "about the role", "about you", "benefits", "years of", "team", "role",
+)
+BLOCKED_MARKERS = (
+    "enable javascript", "captcha", "access denied", "verify you are human", "are you a robot",
+    "sign in to view", "log in to view", "page not found", "404", "cloudflare",
+)
+
+
+class _Node:
+    __slots__ = ("tag", "attrs", "parent", "children")
+
+    def __init__(self, tag, attrs, parent):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children = []
+
+    def hint(self):
+        return f"{self.attrs.get('class', '')} {self.attrs.get('id', '')}"
+
+
+class _TreeBuilder(HTMLParser):
+    """Tolerant DOM builder: text is stored as str children, unclosed tags are closed implicitly"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node("root", {}, None)
+        self.stack = [self.root]
+        # Skipped subtree: its tag and how many of that tag are open, so stray tags inside cannot derail it
+        self.skip_tag = None
+        self.skip_depth = 0
+        self.scripts = []
+        self._script = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k: (v or "") for k, v in attrs}
+        if tag == "script" and "ld+json" in attrs.get("type", "").lower():
+            self._script = []
+        if self.skip_tag:
+            if tag == "body" and self.skip_tag == "head":
+                # </head> is optional: <body> ends it
+                self.skip_tag, self.skip_depth = None, 0
+            else:
+                if tag == self.skip_tag:
+                    self.skip_depth += 1
+                return
+        elif tag in SKIP_TAGS:
+            self.skip_tag, self.skip_depth = tag, 1
+            return
+        node = _Node(tag, attrs, self.stack[-1])
+        self.stack[-1].children.append(node)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        if not self.skip_tag and tag not in SKIP_TAGS:
+            self.stack[-1].children.append(_Node(tag, dict(attrs), self.stack[-1]))
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._script is not None:
+            self.scripts.append("".join(self._script))
+            self._script = None
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth -= 1
+                if not self.skip_depth:
+                    self.skip_tag = None
+            return
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data):
+        if self._script is not None:
+            self._script.append(data)
+            return
+        if not self.skip_tag and data and self.stack[-1].tag not in CONTROL_TEXT_TAGS:
+            self.stack[-1].children.append(data)
+
+
+def parse_html(markup):
+    builder = _TreeBuilder()
+    try:
+        builder.feed(markup or "")
+        builder.close()
+    except Exception as e:
+        print(f"⚠ HTML parse stopped early: {e}")
+    return builder.root, builder.scripts
+
+
+def _text_of(node, parts=None):
+    """Readable text of a subtree with line breaks at block boundaries and '- ' for list items"""
+    top = parts is None
+    if top:
+        parts = []
+    for child in node.children:
+        if isinstance(child, str):
+            parts.append(child)
+            continue
+        if child.tag in BREAK_BEFORE_TAGS:
+            parts.append("\x00")
+        elif child.tag in BLOCK_TAGS:
+            parts.append("\n")
+        if child.tag == "li":
+            parts.append("- ")
+        _text_of(child, parts)
+        if child.tag in BLOCK_TAGS:
+            parts.append("\n")
+    if not top:
+        return parts
+    # \x00 marks a paragraph break (blank line); runs of plain breaks collapse to one
+    lines = (re.sub(r"[ \t\r\f\v]+", " ", line).strip() for line in "".join(parts).split("\n"))
+    text = "\n".join(l for l in lines if l and l != "-")
+    text = re.sub(r"\s*\x00[\s\x00]*", "\n\n", text)
+    return text.strip()
+
+
+def _inline_text(node):
+    chunks = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        for child in reversed(current.children):
+            if isinstance(child, str):
+                chunks.append(child)
+            else:
+                stack.append(child)
+    return " ".join(" ".join(chunks).split())
+
+
+def _link_text_length(node):
+    total = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        for child in current.children:
+            if isinstance(child, str):
+                continue
+            if child.tag == "a":
+                total += len(_inline_text(child))
+            else:
+                stack.append(child)
+    return total
+
+
+def _class_weight(node):
+    hint = node.hint()
+    weight = 0
+    if NEGATIVE_HINT.search(hint):
+        weight -= 25
+    if POSITIVE_HINT.search(hint):
+        weight += 25
+    return weight
+
+
+def _in_boilerplate(node):
+    current = node
+    while current is not None:
+        if current.tag in BOILERPLATE_TAGS:
+            return True
+        current = current.parent
+    return False
+
+
+def readability_text(markup=None, root=None):
+    """Text of the highest-scoring content block, or "" when nothing qualifies"""
+    if root is None:
+        root, _ = parse_html(markup)
+    scores = {}
+
+    def candidate(node):
+        if id(node) not in scores:
+            scores[id(node)] = [node, float(_class_weight(node))]
+        return scores[id(node)]
+
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        for child in node.children:
+            if not isinstance(child, str):
+                stack.append(child)
+        if node.tag not in PARAGRAPH_TAGS or _in_boilerplate(node):
+            continue
+        text = _inline_text(node)
+        if len(text) < 25:
+            continue
+        score = 1.0 + text.count(",") + min(len(text) / 100.0, 3.0)
+        ancestor, share = node.parent, 1.0
+        for _ in range(3):
+            if ancestor is None or ancestor.tag == "root":
+                break
+            if ancestor.tag in CANDIDATE_TAGS or ancestor.tag in ("ul", "ol"):
+                candidate(ancestor)[1] += score * share
+            ancestor = ancestor.parent
+            share *= 0.5
+
+    best, best_score = None, 0.0
+    for node, score in scores.values():
+        if node.tag in ("ul", "ol"):
+            continue
+        text_length = len(_inline_text(node)) or 1
+        score *= 1.0 - min(_link_text_length(node) / float(text_length), 1.0)
+        if score > best_score:
+            best, best_score = node, score
+    return _text_of(best) if best is not None else ""
+
+
+def _html_to_text(fragment):
+    root, _ = parse_html(fragment)
+    return _text_of(root)
+
+
+def _iter_jsonld(value):
+    if isinstance(value, list):
+        for item in value:
+            yield from _iter_jsonld(item)
+    elif isinstance(value, dict):
+        yield value
+        if "@graph" in value:
+            yield from _iter_jsonld(value["@graph"])
+
+
+def _is_job_posting(item):
+    kind = item.get("@type")
+    kinds = kind if isinstance(kind, list) else [kind]
+    return "JobPosting" in kinds
+
+
+def _plain(value):
+    if isinstance(value, dict):
+        return value.get("name") or value.get("value") or ""
+    if isinstance(value, list):
+        return ", ".join(filter(None, (_plain(v) for v in value)))
+    return str(value or "")
+
+
+def _location(value):
+    places = value if isinstance(value, list) else [value]
+    found = []
+    for place in places:
+        if not isinstance(place, dict):
+            continue
+        address = place.get("address") or {}
+        if isinstance(address, dict):
+            parts = [address.get(k) for k in ("addressLocality", "addressRegion", "addressCountry")]
+            found.append(", ".join(_plain(p) for p in parts if p))
+        else:
+            found.append(str(address))
+    return "; ".join(f for f in found if f)
+
+
+def job_posting_from_jsonld(scripts):
+    """Plain-text job description from the first schema.org JobPosting found, or ''"""
+    for raw in scripts:
+        try:
+            data = json.loads(raw.strip())
+        except ValueError:
+            continue
+        for item in _iter_jsonld(data):
+            if not _is_job_posting(item):
+                continue
+            lines = []
+            if item.get("title"):
+                lines.append(html_lib.unescape(_plain(item["title"])))
+            for label, key in (("Company", "hiringOrganization"), ("Employment type", "employmentType")):
+                if item.get(key):
+                    lines.append(f"{label}: {_plain(item[key])}")
+            location = _location(item.get("jobLocation"))
+            if location:
+                lines.append(f"Location: {location}")
+            if item.get("jobLocationType"):
+                lines.append(f"Location type: {_plain(item['jobLocationType'])}")
+            lines.append("")
+            lines.append(_html_to_text(html_lib.unescape(str(item.get("description") or ""))))
+            for label, key in (("Responsibilities", "responsibilities"), ("Qualifications", "qualifications"),
+                               ("Skills", "skills"), ("Experience", "experienceRequirements"),
+                               ("Education", "educationRequirements")):
+                if item.get(key):
+                    lines.append(f"\n{label}:\n{_html_to_text(_plain(item[key]))}")
+            return "\n".join(lines).strip()
+    return ""
+
+
+def assess_quality(text):
+    """0..1 score for how much `text` reads like a complete job description"""
+    text = text or ""
+    lowered = text.lower()
+    length = len(text)
+    if length == 0:
+        return 0.0
+    score = min(length / 1500.0, 1.0) * 0.4
+    hits = sum(1 for term in JOB_TERMS if term in lowered)
+    score += min(hits / 5.0, 1.0) * 0.4
+    letters = sum(1 for ch in text if ch.isalpha())
+    score += 0.2 * min(letters / float(length) / 0.7, 1.0)
+    if length < MIN_JD_CHARS:
+        score *= length / float(MIN_JD_CHARS)
+    if length < 2000 and any(marker in lowered for marker in BLOCKED_MARKERS):
+        score *= 0.3
+    return round(score, 3)
+
+
+def extract_job_description(markup, markdown=""):
+    """
+    Best local job-description text for a crawled page.
+    Returns {"text", "source", "quality", "candidates": {source: quality}}.
+    """
+    root, scripts = parse_html(markup)
+    candidates = {
+        "jsonld": job_posting_from_jsonld(scripts),
+        "readability": readability_text(root=root),
+        "markdown": markdown or "",
+    }
+    graded = {source: assess_quality(text) for source, text in candidates.items()}
+    # Most precise source first: the site's own structured data, then the main
+    # content block, then the crawler's whole-page markdown (navigation included)
+    usable = [source for source in candidates if graded[source] >= JD_QUALITY_THRESHOLD]
+    best = usable[0] if usable else max(graded, key=lambda source: graded[source])
+    return {
+        "text": candidates[best],
+        "source": best,
+        "quality": graded[best],
+        "candidates": graded,
+    }
@@ -13,51 +13,124 @@ if sys.platform == "win32":
         # If the policy isn't available (very old Python), ignore and continue.
         pass
 
-import nest_asyncio
-nest_asyncio.apply()
 import os
+import time
 import base64
+import random
+import tempfile
+import weakref
 from pathlib import Path
-from PIL import Image as PILImage
-import google.generativeai as genai
-from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
-from PyPDF2 import PdfReader
-from pdf2image import convert_from_path
+from agents.llm_client import generate
+from agents.site_profiles import profile_for, readiness_js, budget_for, record_crawl, host_of
+from agents.content_extractor import extract_job_description, JD_SOURCES, JD_QUALITY_THRESHOLD
+from utils.metrics import Counter, QUEUE_DEPTH, record_cache, stage
+from utils.admission import stage_slot, run_in_stage
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY", ""))
+# Browser launch and navigation on top of the readiness budget before a crawl is abandoned
+CRAWL_OVERHEAD_MS = int(os.getenv("CRAWL_OVERHEAD_MS", "15000"))
+
+# Crawl politeness: browsers running at once per host and the per-host request rate
+# (the overall browser limit is the "crawl" stage limit in utils.admission)
+CRAWL_PER_HOST_CONCURRENCY = int(os.getenv("CRAWL_PER_HOST_CONCURRENCY", "2"))
+CRAWL_PER_HOST_RPS = float(os.getenv("CRAWL_PER_HOST_RPS", "1.0"))
+CRAWL_PER_HOST_BURST = int(os.getenv("CRAWL_PER_HOST_BURST", "3"))
+# Throttled (429) or failing (5xx) pages are retried with exponential backoff
+CRAWL_MAX_RETRIES = int(os.getenv("CRAWL_MAX_RETRIES", "2"))
+CRAWL_BACKOFF_BASE = 1.0
+CRAWL_BACKOFF_MAX = 30.0
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+CRAWL_RETRIES = Counter(
+    "resume_crawl_retries_total", "Crawl retries after throttling or server errors", ["reason"]
+)
+
+# Heavy dependencies (Playwright via crawl4ai, PyPDF2, pdf2image, PIL, Gemini) are
+# imported on first use so the server can start accepting requests quickly.
+
+# nest_asyncio patches the running loop; it is only needed when the pipeline is driven
+# from a notebook (Colab/Jupyter), never under uvicorn.
+if os.getenv("ENABLE_NEST_ASYNCIO") == "1" or "ipykernel" in sys.modules:
+    import nest_asyncio
+    nest_asyncio.apply()
 
 def gemini_vision_extract(image_path):
+    from PIL import Image as PILImage
     pil_img = PILImage.open(image_path).convert("RGB")
-    model = genai.GenerativeModel("gemini-2.5-flash")
     prompt = (
         "Extract ALL visible text as a human would see it from this image or screenshot. "
         "Return as much continuous text as possible in document order."
     )
-    resp = model.generate_content([prompt, pil_img])
+    with stage("vision_ocr"):
+        resp = generate("vision", [prompt, pil_img])
     return resp.text if hasattr(resp, "text") else resp
 
-def extract_text_from_pdf(pdf_path):
-    if not Path(pdf_path).exists():
-        print(f"Error: PDF file not found at {pdf_path}")
-        return ""
+def pdf_direct_text(pdf_path):
+    """The PDF's embedded text, or "" when there is too little to trust (scanned PDF)"""
     try:
-        reader = PdfReader(pdf_path)
-        text = "".join(page.extract_text() or "" for page in reader.pages)
+        with stage("pdf_extract"):
+            from PyPDF2 import PdfReader
+            reader = PdfReader(pdf_path)
+            text = "".join(page.extract_text() or "" for page in reader.pages)
         if text and len(text) > 1000:
             return text
     except Exception as e:
         print(f"PDF direct text extraction error: {e}")
+    return ""
+
+def render_pdf_first_page(pdf_path, workdir=None):
+    """First page as a PNG next to the PDF (the request workspace) rather than the working directory"""
+    from pdf2image import convert_from_path
+    pages = convert_from_path(pdf_path, first_page=1, last_page=1)
+    img_path = os.path.join(workdir or os.path.dirname(os.path.abspath(pdf_path)), "pdfpage.png")
+    pages[0].save(img_path, "PNG")
+    return img_path
+
+def extract_text_from_pdf(pdf_path, workdir=None):
+    if not Path(pdf_path).exists():
+        print(f"Error: PDF file not found at {pdf_path}")
+        return ""
+    text = pdf_direct_text(pdf_path)
+    if text:
+        return text
+    try:
+        img_path = render_pdf_first_page(pdf_path, workdir)
+        print("Falling back to OCR/Gemini Vision for PDF first page...")
+        try:
+            return gemini_vision_extract(img_path)
+        finally:
+            _discard(img_path)
+    except Exception as e:
+        print(f"PDF to image/Gemini Vision error: {e}")
+        return ""
 
+async def extract_text_from_pdf_async(pdf_path, workdir=None):
+    """
+    extract_text_from_pdf() off the event loop. Parsing and rendering run in
+    plain threads; only the Vision fallback takes an "llm" stage slot.
+    """
+    if not Path(pdf_path).exists():
+        print(f"Error: PDF file not found at {pdf_path}")
+        return ""
+    text = await asyncio.to_thread(pdf_direct_text, pdf_path)
+    if text:
+        return text
     try:
-        pages = convert_from_path(pdf_path, first_page=1, last_page=1)
-        img_path = "pdfpage.png"
-        pages[0].save(img_path, "PNG")
+        img_path = await asyncio.to_thread(render_pdf_first_page, pdf_path, workdir)
         print("Falling back to OCR/Gemini Vision for PDF first page...")
-        return gemini_vision_extract(img_path)
+        try:
+            return await run_in_stage("llm", gemini_vision_extract, img_path)
+        finally:
+            _discard(img_path)
     except Exception as e:
         print(f"PDF to image/Gemini Vision error: {e}")
         return ""
 
+def _discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
 def extract_text_from_txt(txt_path):
     if not Path(txt_path).exists():
         print(f"Error: TXT file not found at {txt_path}")
@@ -69,53 +142,249 @@ def extract_text_from_txt(txt_path):
         print(f"Error reading TXT file: {e}")
         return ""
 
-async def crawl_or_screenshot(url):
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`; acquire() waits for a token"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def wait_time(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        wait = (1.0 - self.tokens) / self.rate
+        self.tokens -= 1.0
+        return wait
+
+
+def _retry_after_seconds(headers):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None"""
+    headers = {str(k).lower(): v for k, v in (headers or {}).items()}
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        from datetime import datetime, timezone
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except Exception:
+        return None
+
+
+class CrawlScheduler:
+    """
+    Politeness and throughput for page crawls, per event loop:
+    a per-host cap on concurrent crawls (inside the global "crawl" stage
+    limit), a per-host token
+    bucket, coalescing of concurrent requests for the same URL, and backoff
+    (honouring Retry-After) when a host answers 429 or 5xx.
+    """
+
+    def __init__(self, per_host=CRAWL_PER_HOST_CONCURRENCY, rate=CRAWL_PER_HOST_RPS,
+                 burst=CRAWL_PER_HOST_BURST):
+        self.per_host = per_host
+        self.rate = rate
+        self.burst = burst
+        self._hosts = {}
+        self._inflight = {}
+
+    def _host(self, url):
+        host = host_of(url)
+        state = self._hosts.get(host)
+        if state is None:
+            state = {
+                "semaphore": asyncio.Semaphore(self.per_host),
+                "bucket": TokenBucket(self.rate, self.burst),
+                "lock": asyncio.Lock(),
+                "blocked_until": 0.0,
+                "failures": 0,
+            }
+            self._hosts[host] = state
+        return host, state
+
+    async def submit(self, url, job):
+        """Run job(url) once for all concurrent callers asking for the same URL"""
+        shared = self._inflight.get(url)
+        record_cache("crawl_coalesce", shared is not None)
+        if shared is not None:
+            print(f"  Joining in-flight crawl of {url}")
+            return await asyncio.shield(shared)
+        task = asyncio.ensure_future(job(url))
+        self._inflight[url] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._inflight.pop(url, None)
+            else:
+                task.add_done_callback(lambda _: self._inflight.pop(url, None))
+
+    async def _admit(self, host, state):
+        # Serialise the token accounting per host; the sleep happens outside the global slot
+        async with state["lock"]:
+            delay = max(0.0, state["blocked_until"] - time.monotonic())
+            delay += state["bucket"].wait_time()
+        if delay > 0:
+            print(f"  Waiting {delay:.2f}s before crawling {host}")
+            await asyncio.sleep(delay)
+
+    def _backoff(self, host, state, result, attempt):
+        retry_after = _retry_after_seconds(getattr(result, "response_headers", None))
+        if retry_after is None:
+            retry_after = min(CRAWL_BACKOFF_MAX, CRAWL_BACKOFF_BASE * (2 ** attempt))
+            retry_after *= random.uniform(0.8, 1.2)
+        retry_after = min(retry_after, CRAWL_BACKOFF_MAX)
+        state["failures"] += 1
+        state["blocked_until"] = max(state["blocked_until"], time.monotonic() + retry_after)
+        return retry_after
+
+    async def fetch(self, url, crawl):
+        """crawl(url) under the host's limits, retrying throttled or failing responses"""
+        host, state = self._host(url)
+        QUEUE_DEPTH.inc(queue="crawl")
+        try:
+            for attempt in range(CRAWL_MAX_RETRIES + 1):
+                await self._admit(host, state)
+                async with state["semaphore"]:
+                    async with stage_slot("crawl"):
+                        result = await crawl(url)
+                status = getattr(result, "status_code", None) or 0
+                if status not in RETRY_STATUSES:
+                    state["failures"] = 0
+                    return result
+                if attempt == CRAWL_MAX_RETRIES:
+                    CRAWL_RETRIES.inc(reason="exhausted")
+                    return result
+                wait = self._backoff(host, state, result, attempt)
+                CRAWL_RETRIES.inc(reason=str(status))
+                print(f"  ⚠ {host} answered {status}, retrying in {wait:.1f}s")
+            return result
+        finally:
+            QUEUE_DEPTH.dec(queue="crawl")
+
+
+_schedulers = weakref.WeakKeyDictionary()
+
+
+def get_scheduler():
+    """The scheduler for the running event loop (asyncio primitives are loop-bound)"""
+    loop = asyncio.get_running_loop()
+    scheduler = _schedulers.get(loop)
+    if scheduler is None:
+        scheduler = CrawlScheduler()
+        _schedulers[loop] = scheduler
+    return scheduler
+
+
+async def _crawl_page(url):
+    """One crawl4ai run for url; returns the crawl result"""
+    from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode
+    profile = profile_for(url)
+    budget_ms = budget_for(url)
+    # Ready = network idle, then the DOM settles (and the board's description node exists)
     config = CrawlerRunConfig(
         cache_mode=CacheMode.BYPASS,
         screenshot=True,
-        wait_for='js:() => document.body.innerText.includes("Data Scientist II")'
+        wait_until="networkidle",
+        page_timeout=budget_ms + CRAWL_OVERHEAD_MS,
+        wait_for=readiness_js(profile["wait_for"], budget_ms=budget_ms),
+        css_selector=profile["content_selector"],
     )
-    async with AsyncWebCrawler() as crawler:
-        result = await crawler.arun(url=url, config=config)
-        if result.success:
-            text = ""
-            try:
-                text = result.markdown.raw_markdown
-            except AttributeError:
-                text = str(result.markdown)
-            if text and len(text) > 15000 and ("content" in text.lower() or "role" in text.lower()):
-                return text, None
-            else:
-                return "", result.screenshot
-        else:
-            raise Exception(f"Crawl error: {result.error_message}")
+    print(f"  Crawling {url} (profile: {profile['name']}, budget {budget_ms} ms)")
+    start = time.perf_counter()
+    with stage("crawl"):
+        try:
+            async with AsyncWebCrawler() as crawler:
+                result = await asyncio.wait_for(
+                    crawler.arun(url=url, config=config),
+                    timeout=(budget_ms + 2 * CRAWL_OVERHEAD_MS) / 1000.0,
+                )
+        except asyncio.TimeoutError:
+            record_crawl(url, profile, time.perf_counter() - start, "timeout")
+            raise Exception(f"Crawl error: {url} did not finish within the time budget")
+        except Exception:
+            record_crawl(url, profile, time.perf_counter() - start, "error")
+            raise
+        status = getattr(result, "status_code", None) or 0
+        outcome = "ok" if result.success and status not in RETRY_STATUSES else "failed"
+        record_crawl(url, profile, time.perf_counter() - start, outcome)
+    return result
+
+
+async def _crawl_and_extract(url):
+    result = await get_scheduler().fetch(url, _crawl_page)
+    if not result.success:
+        raise Exception(f"Crawl error: {result.error_message}")
+
+    markdown = ""
+    try:
+        markdown = result.markdown.raw_markdown
+    except AttributeError:
+        markdown = str(result.markdown or "")
+
+    # Judge the page on content quality; a screenshot for Gemini Vision is the last resort
+    with stage("extract"):
+        extraction = await asyncio.to_thread(extract_job_description, result.html or "", markdown)
+    print(f"  Extracted {len(extraction['text'])} chars via {extraction['source']} "
+          f"(quality {extraction['quality']:.2f}, candidates {extraction['candidates']})")
+    if extraction["quality"] >= JD_QUALITY_THRESHOLD or not result.screenshot:
+        JD_SOURCES.inc(source=extraction["source"] if extraction["text"] else "empty")
+        return extraction["text"], None
+    return "", result.screenshot
+
+async def crawl_or_screenshot(url):
+    """(text, None) when the page is readable, otherwise ("", screenshot_b64)"""
+    return await get_scheduler().submit(url, _crawl_and_extract)
 
-async def process_sources(sources_dict):
+async def process_sources(sources_dict, workdir=None):
+    """
+    Extract text from job URLs, resume PDFs and TXT files. Intermediate images
+    (screenshots, rendered PDF pages) go to `workdir` and are deleted after OCR.
+    """
     results = {}
+    workdir = workdir or tempfile.gettempdir()
     # URLs
     if sources_dict.get('urls'):
         results['urls'] = {}
-        for url in sources_dict['urls']:
-            text, screenshot_b64 = await crawl_or_screenshot(url)
+        # Crawl all job pages at once; the scheduler applies the per-host limits
+        crawled = await asyncio.gather(*(crawl_or_screenshot(url) for url in sources_dict['urls']))
+        for url, (text, screenshot_b64) in zip(sources_dict['urls'], crawled):
             if text:
                 results['urls'][url] = text
             elif screenshot_b64:
                 try:
                     img_bytes = base64.b64decode(screenshot_b64)
-                    img_path = f"screenshot_{len(results['urls'])}.png"
-                    with open(img_path, "wb") as f:
+                    fd, img_path = tempfile.mkstemp(prefix="screenshot_", suffix=".png", dir=workdir)
+                    with os.fdopen(fd, "wb") as f:
                         f.write(img_bytes)
-                    vision_text = gemini_vision_extract(img_path)
+                    print(f"  Page content unreadable, falling back to Gemini Vision for {url}")
+                    try:
+                        vision_text = await run_in_stage("llm", gemini_vision_extract, img_path)
+                    finally:
+                        _discard(img_path)
                     results['urls'][url] = vision_text
+                    JD_SOURCES.inc(source="vision")
                 except Exception as e:
                     results['urls'][url] = ""
+                    JD_SOURCES.inc(source="empty")
             else:
                 results['urls'][url] = ""
     # PDFs
     if sources_dict.get('pdfs'):
         results['pdfs'] = {}
         for pdf_path in sources_dict['pdfs']:
-            text = extract_text_from_pdf(pdf_path)
+            # Scanned PDFs fall back to Vision OCR under the "llm" stage limit
+            text = await extract_text_from_pdf_async(pdf_path, workdir)
             results['pdfs'][pdf_path] = text or ""
     # TXTs
     if sources_dict.get('txts'):
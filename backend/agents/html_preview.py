@@ -0,0 +1,178 @@
+"""
+Instant HTML preview of a tailored resume.
+
+Renders the matched resume JSON straight to HTML in the section layout of
+templates/latex_template.tex (header lines, grey section bars, education
+table, nested bullets), so the user sees the result in milliseconds as soon
+as matching finishes. The resume and its job description are kept in a
+preview store; the full pdflatex PDF is only produced when the user
+confirms the preview.
+"""
+import copy
+import hashlib
+import json
+import os
+import time
+from html import escape
+
+from agents.latex_generator import validate_user_info
+from utils.metrics import Counter
+from utils.shared_store import DiskStore
+from utils.workspace import TEMP_ROOT, register_area
+
+PREVIEW_DIR = os.path.join(TEMP_ROOT, "previews")
+# Unconfirmed previews older than this are swept by the janitor
+PREVIEW_MAX_AGE = float(os.getenv("PREVIEW_MAX_AGE", str(24 * 3600)))
+register_area("previews", PREVIEW_DIR, PREVIEW_MAX_AGE)
+
+PREVIEWS = Counter(
+    "resume_previews_total", "HTML previews by outcome (rendered, confirmed, expired)", ["outcome"]
+)
+
+# Mirrors the LaTeX preamble: A4, Palatino 10pt, 0.55in/0.85in margins, grey (0.75) heading bars
+STYLE = """
+body { background: #e9e9e9; margin: 0; padding: 24px 0; }
+.page { box-sizing: border-box; width: 210mm; min-height: 297mm; margin: 0 auto; background: #fff;
+        padding: 0.75in 0.85in 0.75in 0.55in; box-shadow: 0 1px 4px rgba(0,0,0,.25);
+        font: 10pt/1.3 Palatino, "Palatino Linotype", "Book Antiqua", serif; color: #000; }
+.header { display: grid; grid-template-columns: 1fr auto; font-weight: bold; margin-bottom: 6px; }
+.header div:nth-child(2n) { text-align: right; }
+.header .name { font-size: 11pt; }
+h2 { background: #bfbfbf; font-size: 9pt; margin: 10px 0 4px; padding: 2px 3px; }
+table { border-collapse: collapse; width: 100%; border-top: 1.5px solid #000; border-bottom: 1.5px solid #000; }
+th { text-align: left; border-bottom: 1px solid #000; }
+th, td { padding: 2px 8px 2px 0; vertical-align: top; }
+ul { margin: 2px 0; padding-left: 18px; }
+ul ul { list-style: circle; }
+.entry-title { display: flex; justify-content: space-between; }
+.entry-title .when { font-style: italic; white-space: nowrap; padding-left: 12px; }
+a { color: #0aa; }
+"""
+
+_store = None
+
+
+def _preview_store():
+    global _store
+    if _store is None:
+        _store = DiskStore(PREVIEW_DIR, suffix=".json")
+    return _store
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(_text(v) for v in value)
+    return escape(str(value))
+
+
+def _bullets(details):
+    if not details:
+        return ""
+    if not isinstance(details, (list, tuple)):
+        details = [details]
+    items = "".join(f"<li>{_text(d)}</li>" for d in details if d)
+    return f"<ul>{items}</ul>" if items else ""
+
+
+def _entries(items):
+    return [item for item in items if isinstance(item, dict)]
+
+
+def _header(info):
+    cells = [
+        (f'<span class="name">{_text(info["name"])}</span>', _text(info["email"])),
+        (_text(info["title"]), _text(info["phone"])),
+    ]
+    if info["location"]:
+        cells.append((_text(info["location"]), _text(info["linkedin"])))
+    if info["github"]:
+        cells.append((_text(info["github"]), ""))
+    return '<div class="header">' + "".join(f"<div>{l}</div><div>{r}</div>" for l, r in cells) + "</div>"
+
+
+def _education(entries):
+    rows = "".join(
+        f"<tr><td>{_text(e['degree'])}</td><td><i>{_text(e['specialization'])}</i></td>"
+        f"<td>{_text(e['institute'])}</td><td>{_text(e['year'])}</td><td>{_text(e['gpa'])}</td></tr>"
+        for e in entries
+    )
+    return (
+        "<h2>EDUCATION</h2><table><tr><th>Degree</th><th>Specialization</th><th>Institute</th>"
+        f"<th>Year</th><th>GPA</th></tr>{rows}</table>"
+    )
+
+
+def _titled_list(heading, entries, title_of, when_key):
+    items = "".join(
+        f'<li><div class="entry-title"><span>{title_of(e)}</span>'
+        f'<span class="when">{_text(e.get(when_key))}</span></div>{_bullets(e.get("details"))}</li>'
+        for e in entries
+    )
+    return f"<h2>{heading}</h2><ul>{items}</ul>"
+
+
+def _experience_title(exp):
+    company = f" <i>({_text(exp['company'])})</i>" if exp["company"] else ""
+    return f"<b>{_text(exp['title'])}</b>{company}"
+
+
+def _project_title(proj):
+    link = ""
+    if proj["link"] and str(proj["link"]).startswith(("http://", "https://")):
+        link = f' <a href="{escape(str(proj["link"]), quote=True)}">Project Link</a>'
+    return f"<b>{_text(proj['name'])}</b>{link}"
+
+
+def _certification_title(cert):
+    issuer = f" - {_text(cert['issuer'])}" if cert["issuer"] else ""
+    return f"<b>{_text(cert['name'])}</b>{issuer}"
+
+
+def _skills(entries):
+    items = "".join(f"<li><b>{_text(s['category'])}:</b> {_text(s['items'])}</li>" for s in entries)
+    return f"<h2>TECHNICAL SKILLS</h2><ul>{items}</ul>"
+
+
+def render_preview_html(user_info):
+    """Standalone HTML page for a matched resume (validated the same way as for LaTeX)"""
+    info = validate_user_info(copy.deepcopy(user_info))
+    parts = [_header(info)]
+    if _entries(info["education"]):
+        parts.append(_education(_entries(info["education"])))
+    if _entries(info["experience"]):
+        parts.append(_titled_list("WORK EXPERIENCE", _entries(info["experience"]), _experience_title, "duration"))
+    if _entries(info["projects"]):
+        parts.append(_titled_list("PROJECTS", _entries(info["projects"]), _project_title, "duration"))
+    if _entries(info["certifications"]):
+        parts.append(_titled_list("CERTIFICATIONS", _entries(info["certifications"]), _certification_title, "date"))
+    if _entries(info["skills"]):
+        parts.append(_skills(_entries(info["skills"])))
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f"<title>{_text(info['name'])} - Resume preview</title><style>{STYLE}</style></head>"
+        f'<body><div class="page">{"".join(parts)}</div></body></html>'
+    )
+
+
+def save_preview(user_info, job_description):
+    """Keep a matched resume until the user confirms it; returns the preview id"""
+    payload = {"resume": user_info, "job_description": job_description}
+    preview_id = hashlib.sha256(
+        json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:32]
+    _preview_store().put_json(preview_id, dict(payload, created=time.time()))
+    PREVIEWS.inc(outcome="rendered")
+    return preview_id
+
+
+def load_preview(preview_id):
+    """The stored {"resume", "job_description"} for a preview, or None when unknown or expired"""
+    if not preview_id or not all(ch in "0123456789abcdef" for ch in preview_id):
+        return None
+    data = _preview_store().get_json(preview_id)
+    if data is None or time.time() - data.get("created", 0) > PREVIEW_MAX_AGE:
+        PREVIEWS.inc(outcome="expired")
+        return None
+    return data
@@ -0,0 +1,214 @@
+"""
+Section-level incremental LaTeX generation.
+
+A generated resume is split into fragments (preamble, header, one per
+\\resheading section). Fragments are cached by the content of the resume
+section they were produced from and the job description they were tailored
+to, so when a user edits one section and resubmits the same job only that
+section goes back to the LLM; the rest are reused and reassembled in the
+order the previous document had them.
+"""
+import hashlib
+import json
+import os
+import re
+
+from agents.llm_resume_formatter import (
+    LATEX_TEMPLATE,
+    generate_latex_resume,
+    generate_latex_sections,
+)
+from utils.metrics import Counter, record_cache
+from utils.shared_store import DiskStore
+from utils.workspace import TEMP_ROOT, register_area
+
+SECTIONS = ("header", "education", "experience", "projects", "certifications", "skills")
+HEADER_FIELDS = ("name", "email", "phone", "title", "location", "linkedin", "github")
+
+# Heading keywords -> section of the resume model
+HEADING_SECTIONS = (
+    ("EDUCATION", "education"),
+    ("EXPERIENCE", "experience"),
+    ("PROJECT", "projects"),
+    ("CERTIF", "certifications"),
+    ("SKILL", "skills"),
+)
+
+FRAGMENT_DIR = os.path.join(TEMP_ROOT, "fragments")
+# Cached fragments older than this are swept by the janitor
+FRAGMENT_MAX_AGE = float(os.getenv("FRAGMENT_MAX_AGE", str(7 * 24 * 3600)))
+register_area("fragments", FRAGMENT_DIR, FRAGMENT_MAX_AGE)
+
+SECTIONS_REGENERATED = Counter(
+    "resume_latex_sections_total", "Resume sections by how their LaTeX was produced", ["source"]
+)
+
+RESHEADING = re.compile(r"\\resheading\{\s*(?:\\textbf\{)?\s*([^}]*)")
+
+_store = None
+
+
+def _fragment_store():
+    global _store
+    if _store is None:
+        _store = DiskStore(FRAGMENT_DIR, suffix=".json")
+    return _store
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def section_payload(user_info, section):
+    if section == "header":
+        return {k: user_info.get(k, "") for k in HEADER_FIELDS}
+    return user_info.get(section) or []
+
+
+def section_fingerprints(user_info):
+    return {section: _digest(section_payload(user_info, section)) for section in SECTIONS}
+
+
+def job_fingerprint(job_description):
+    normalized = " ".join((job_description or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _job_key(user_info, job_hash):
+    identity = (user_info.get("email") or user_info.get("name") or "").strip().lower()
+    return _digest(["job", job_hash, identity])
+
+
+def _fragment_key(section, fingerprint, job_hash):
+    return _digest(["fragment", section, fingerprint, job_hash])
+
+
+def _is_commented(source, pos):
+    line_start = source.rfind("\n", 0, pos) + 1
+    prefix = source[line_start:pos]
+    return re.search(r"(?<!\\)%", prefix) is not None
+
+
+def split_latex_sections(tex):
+    """
+    Split a full document into {"preamble", "header", <section>...}.
+    Returns None when the layout is not recognised (no \\begin{document},
+    unknown or repeated headings), in which case nothing is cached.
+    """
+    begin = tex.find("\\begin{document}")
+    end = tex.rfind("\\end{document}")
+    if begin == -1 or end == -1 or end < begin:
+        return None
+    body_start = begin + len("\\begin{document}")
+    parts = {"preamble": tex[:body_start]}
+
+    starts = []
+    for match in RESHEADING.finditer(tex, body_start, end):
+        if _is_commented(tex, match.start()):
+            continue
+        title = match.group(1).upper()
+        section = next((name for key, name in HEADING_SECTIONS if key in title), None)
+        if section is None or any(s == section for _, s in starts):
+            return None
+        # Keep the spacing command that introduces a heading with its section
+        line_start = tex.rfind("\n", 0, match.start()) + 1
+        starts.append((line_start, section))
+
+    bounds = [pos for pos, _ in starts] + [end]
+    parts["header"] = tex[body_start:bounds[0]] if starts else tex[body_start:end]
+    for (pos, section), next_pos in zip(starts, bounds[1:]):
+        parts[section] = tex[pos:next_pos]
+    return parts
+
+
+def document_order(parts):
+    """Sections in the order they appear in a split document"""
+    return [key for key in parts if key in SECTIONS]
+
+
+def merge_order(order=None):
+    """
+    `order` (a previous document's section order) with every other section
+    spliced in after the closest section that precedes it in SECTIONS.
+    """
+    merged = [s for s in (order or ()) if s in SECTIONS]
+    for index, section in enumerate(SECTIONS):
+        if section in merged:
+            continue
+        pos = 0
+        for earlier in reversed(SECTIONS[:index]):
+            if earlier in merged:
+                pos = merged.index(earlier) + 1
+                break
+        merged.insert(pos, section)
+    return merged
+
+
+def assemble_latex(parts, order=None):
+    body = "".join(parts.get(section, "") for section in merge_order(order))
+    return parts["preamble"].rstrip() + "\n" + body.strip("\n") + "\n\n\\end{document}\n"
+
+
+def _template_examples():
+    return split_latex_sections(LATEX_TEMPLATE) or {}
+
+
+def _remember(store, job_key, job_hash, fingerprints, parts, order):
+    for section in SECTIONS:
+        store.put_json(_fragment_key(section, fingerprints[section], job_hash), {"latex": parts.get(section, "")})
+    store.put_json(job_key, {"preamble": parts["preamble"], "sections": fingerprints, "order": order})
+
+
+def generate_latex_incremental(user_info, job_description):
+    """
+    Produce the LaTeX for `user_info`, re-tailoring only the sections that
+    changed since the previous version generated for the same job.
+    Returns (tex_code, info) where info lists reused and regenerated sections.
+    """
+    store = _fragment_store()
+    job_hash = job_fingerprint(job_description)
+    job_key = _job_key(user_info, job_hash)
+    fingerprints = section_fingerprints(user_info)
+    previous = store.get_json(job_key)
+
+    if previous is not None:
+        changed = [s for s in SECTIONS if previous.get("sections", {}).get(s) != fingerprints[s]]
+        # Entries cached before the order was stored fall back to SECTIONS order
+        order = merge_order(previous.get("order"))
+        parts = {"preamble": previous["preamble"]}
+        missing = []
+        for section in SECTIONS:
+            entry = store.get_json(_fragment_key(section, fingerprints[section], job_hash))
+            record_cache("latex_fragment", entry is not None)
+            if entry is None:
+                missing.append(section)
+            else:
+                parts[section] = entry["latex"]
+
+        # Sections that are empty in the model need no LLM call
+        for section in list(missing):
+            if section != "header" and not section_payload(user_info, section):
+                parts[section] = ""
+                missing.remove(section)
+
+        fragments = {}
+        if missing:
+            print(f"  Re-tailoring changed sections: {', '.join(missing)}")
+            fragments = generate_latex_sections(user_info, job_description, missing, _template_examples())
+        if all(section in fragments for section in missing):
+            for section in missing:
+                parts[section] = "\n" + fragments[section].strip("\n") + "\n\n"
+            SECTIONS_REGENERATED.inc(len(SECTIONS) - len(missing), source="reused")
+            SECTIONS_REGENERATED.inc(len(missing), source="regenerated")
+            _remember(store, job_key, job_hash, fingerprints, parts, order)
+            reused = [s for s in SECTIONS if s not in missing]
+            print(f"  Reused {len(reused)} cached section(s); changed since last version: {', '.join(changed) or 'none'}")
+            return assemble_latex(parts, order), {"mode": "incremental", "reused": reused, "regenerated": missing}
+        print("  ⚠ Section regeneration incomplete, regenerating the whole document")
+
+    tex_code = generate_latex_resume(user_info, job_description)
+    SECTIONS_REGENERATED.inc(len(SECTIONS), source="full")
+    parts = split_latex_sections(tex_code)
+    if parts is not None:
+        _remember(store, job_key, job_hash, fingerprints, parts, document_order(parts))
+    return tex_code, {"mode": "full", "reused": [], "regenerated": list(SECTIONS)}
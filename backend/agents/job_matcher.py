@@ -1,11 +1,58 @@
 # Job matching logic here
-import google.generativeai as genai
 import os
-import re
+from agents.llm_client import generate
+from agents.resume_model import Resume, parse_resume_response
+from agents.relevance import preselect_resume_text, local_tailored_resume
+from agents.skills_taxonomy import skill_gap, format_skill_summary
+from utils.llm_parsing import LLMResponseError
+from utils.metrics import Counter, Histogram, stage
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY", ""))
+# Bullets kept (by BM25 relevance) before the resume is sent to the LLM
+MATCH_TOP_K = int(os.getenv("MATCH_TOP_K", "12"))
+# Seconds to wait for Gemini before tailoring the resume locally instead
+MATCH_LLM_TIMEOUT = float(os.getenv("MATCH_LLM_TIMEOUT", "60"))
+
+MATCH_FALLBACKS = Counter(
+    "resume_match_local_fallbacks_total", "Resumes tailored locally instead of by the LLM", ["reason"]
+)
+SKILL_COVERAGE = Histogram(
+    "resume_skill_coverage_ratio", "Share of the job's required skills found in the resume",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+)
+
+def _local_resume(user_resume_text, jobdesc_text):
+    """Locally tailored resume, normalised through the same model as LLM output"""
+    resume = local_tailored_resume(user_resume_text, jobdesc_text)
+    try:
+        return Resume.from_dict(resume).to_dict()
+    except LLMResponseError:
+        # Nothing recognisable in the resume text; keep the bare structure
+        return resume
 
 def match_resume_to_job(user_resume_text, jobdesc_text):
+    # Skill gap from the taxonomy index, computed on the full resume
+    skill_summary = ""
+    with stage("skills"):
+        try:
+            gap = skill_gap(user_resume_text, jobdesc_text)
+            skill_summary = format_skill_summary(gap)
+            if gap["coverage"] is not None:
+                SKILL_COVERAGE.observe(gap["coverage"])
+                print(f"  Skill coverage: {len(gap['matched'])}/{len(gap['required'])} "
+                      f"(missing: {', '.join(gap['missing'][:8]) or 'none'})")
+        except Exception as e:
+            print(f"⚠ Skill extraction failed: {e}")
+
+    # Rank bullets locally so the prompt only carries the most relevant material
+    with stage("rank"):
+        try:
+            user_resume_text, stats = preselect_resume_text(user_resume_text, jobdesc_text, top_k=MATCH_TOP_K)
+            if stats["kept"] < stats["bullets"]:
+                print(f"  Pre-selected {stats['kept']}/{stats['bullets']} bullets "
+                      f"({stats['chars_before']} -> {stats['chars_after']} chars)")
+        except Exception as e:
+            print(f"⚠ Local ranking failed, sending the full resume: {e}")
+
     prompt = (
         "Given the following RESUME and JOB DESCRIPTION, extract and optimize resume fields to match the job requirements. "
         "Return ONLY valid JSON with this EXACT structure:\n"
@@ -25,34 +72,23 @@ def match_resume_to_job(user_resume_text, jobdesc_text):
         "}\n\n"
         "RESUME:\n" + (user_resume_text or "") +
         "\n\nJOB DESCRIPTION:\n" + (jobdesc_text or "") +
+        ("\n\nSKILL MATCH (precomputed, use it to order and select skills; never add missing ones):\n"
+         + skill_summary if skill_summary else "") +
         "\n\nReturn ONLY the JSON, no markdown, no explanation."
     )
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    resp = model.generate_content(prompt)
-    import json
     try:
-        # Remove markdown code blocks if present
-        text = resp.text.strip()
-        if text.startswith('```'):
-            text = re.sub(r'^```(?:json)?\n', '', text)
-            text = re.sub(r'\n```$', '', text)
-        return json.loads(text)
+        with stage("match_llm"):
+            resp = generate("match", prompt, request_options={"timeout": MATCH_LLM_TIMEOUT})
     except Exception as e:
-        print(f"JSON parse error: {e}")
-        block = re.search(r'\{.*\}', resp.text, re.DOTALL)
-        if block:
-            try:
-                return json.loads(block.group())
-            except:
-                pass
-        # Return default structure if parsing fails
-        return {
-            "name": "Name Not Found",
-            "email": "email@example.com",
-            "phone": "+00-0000000000",
-            "title": "Job Title",
-            "education": [],
-            "experience": [],
-            "projects": [],
-            "skills": []
-        }
+        reason = "timeout" if "timeout" in type(e).__name__.lower() or "deadline" in str(e).lower() else "error"
+        print(f"⚠ LLM matching failed ({reason}: {e}), tailoring the resume locally")
+        MATCH_FALLBACKS.inc(reason=reason)
+        return _local_resume(user_resume_text, jobdesc_text)
+    try:
+        return parse_resume_response(resp.text).to_dict()
+    except ValueError as e:
+        # LLMResponseError, or resp.text refusing a blocked or empty candidate
+        print(f"✗ Unusable LLM matching response: {e}")
+        # Fall back to the locally tailored resume; counted so it never goes unnoticed
+        MATCH_FALLBACKS.inc(reason="unparseable")
+        return _local_resume(user_resume_text, jobdesc_text)
@@ -1,4 +1,3 @@
-from jinja2 import Environment, FileSystemLoader
 from pathlib import Path
 import re
 import os
@@ -188,6 +187,8 @@ def fill_latex_resume(user_info, output_path="resume.tex"):
         
         print(f"✓ Using template: {template_file}")
         
+        from jinja2 import Environment, FileSystemLoader
+
         # Configure Jinja2 with custom delimiters to avoid LaTeX conflicts
         # Use [[ ]] for variables and [% %] for statements instead of {{ }} and {% %}
         env = Environment(
@@ -206,7 +207,8 @@ def fill_latex_resume(user_info, output_path="resume.tex"):
 
         # Dump sanitized info for debugging
         try:
-            debug_dir = Path("temp")
+            # Next to the output so concurrent renders never overwrite each other
+            debug_dir = Path(output_path).parent
             debug_dir.mkdir(parents=True, exist_ok=True)
             import json
             with open(debug_dir / 'sanitized_info.json', 'w', encoding='utf-8') as dbg:
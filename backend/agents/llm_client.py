@@ -0,0 +1,227 @@
+"""
+Shared, lazily configured access to google.generativeai.
+
+Importing the SDK pulls in grpc and protobuf, so it is only loaded (and
+configured with GEMINI_API_KEY) the first time a model is requested.
+
+Pipeline stages call generate(stage, contents) rather than the SDK
+directly. It picks a model tier for the call, and records prompt and
+completion tokens, latency and estimated cost per call. The totals go to
+/metrics, the log and the current request's X-LLM-Usage header.
+
+Routing: small prompts and simple stages (Vision OCR) go to the fast tier.
+Large prompts go to the full model unless that would push the request past
+its cost or LLM-time budget, in which case the call is downgraded.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+
+from utils.metrics import Counter, Histogram
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+# Alternative API endpoint (e.g. http://127.0.0.1:8090 for bench.fake_gemini); uses the REST transport
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT", "")
+
+# Model tiers with list prices in USD per million tokens (override for other models)
+MODEL_TIERS = {
+    "fast": {
+        "model": os.getenv("GEMINI_MODEL_FAST", "gemini-2.5-flash-lite"),
+        "input_per_m": float(os.getenv("GEMINI_FAST_INPUT_PER_M", "0.10")),
+        "output_per_m": float(os.getenv("GEMINI_FAST_OUTPUT_PER_M", "0.40")),
+    },
+    "full": {
+        "model": os.getenv("GEMINI_MODEL_FULL", DEFAULT_MODEL),
+        "input_per_m": float(os.getenv("GEMINI_FULL_INPUT_PER_M", "0.30")),
+        "output_per_m": float(os.getenv("GEMINI_FULL_OUTPUT_PER_M", "2.50")),
+    },
+}
+
+# "adaptive" routes per call; "fast" or "full" pins every call to one tier
+LLM_ROUTING = os.getenv("LLM_ROUTING", "adaptive")
+# Prompts up to this many (estimated) tokens are small enough for the fast tier
+LLM_FAST_MAX_PROMPT_TOKENS = int(os.getenv("LLM_FAST_MAX_PROMPT_TOKENS", "3000"))
+# Per-request budgets; 0 disables the check
+LLM_REQUEST_BUDGET_USD = float(os.getenv("LLM_REQUEST_BUDGET_USD", "0"))
+LLM_REQUEST_BUDGET_MS = float(os.getenv("LLM_REQUEST_BUDGET_MS", "0"))
+
+# Stages whose output quality does not depend on the larger model
+FAST_STAGES = frozenset(("vision",))
+# Typical completion size per stage, for the cost estimate made before the call
+EXPECTED_OUTPUT_TOKENS = {"match": 1500, "latex": 3000, "latex_sections": 1500, "vision": 800}
+# Gemini bills an image as a fixed number of tokens
+IMAGE_TOKENS = 258
+
+LLM_TOKENS = Counter(
+    "resume_llm_tokens_total", "Tokens sent to and returned by Gemini", ["stage", "model", "kind"]
+)
+LLM_COST = Counter(
+    "resume_llm_cost_usd_total", "Estimated Gemini spend in USD", ["stage", "model"]
+)
+LLM_CALLS = Counter(
+    "resume_llm_calls_total", "Gemini calls by routing reason and outcome", ["stage", "tier", "reason", "outcome"]
+)
+LLM_CALL_SECONDS = Histogram(
+    "resume_llm_call_seconds", "Gemini call latency", ["stage", "model"],
+    buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 12.0, 20.0, 30.0, 60.0, 120.0)
+)
+
+_genai = None
+_lock = threading.Lock()
+_request_usage = contextvars.ContextVar("request_llm_usage", default=None)
+
+
+def get_genai():
+    global _genai
+    if _genai is None:
+        with _lock:
+            if _genai is None:
+                import google.generativeai as genai
+                if GEMINI_API_ENDPOINT:
+                    genai.configure(api_key=os.getenv("GEMINI_API_KEY", ""), transport="rest",
+                                    client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+                    print(f"⚠ Using Gemini endpoint {GEMINI_API_ENDPOINT}")
+                else:
+                    genai.configure(api_key=os.getenv("GEMINI_API_KEY", ""))
+                _genai = genai
+    return _genai
+
+
+def get_model(model_name=DEFAULT_MODEL):
+    return get_genai().GenerativeModel(model_name)
+
+
+def begin_usage():
+    """Start collecting LLM calls for the current request; returns (calls list, reset token)"""
+    calls = []
+    token = _request_usage.set(calls)
+    return calls, token
+
+
+def end_usage(token):
+    _request_usage.reset(token)
+
+
+def summarize_usage(calls):
+    return {
+        "calls": len(calls),
+        "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+        "completion_tokens": sum(c["completion_tokens"] for c in calls),
+        "cost_usd": round(sum(c["cost_usd"] for c in calls), 6),
+        "llm_ms": round(sum(c["ms"] for c in calls), 1),
+        "models": sorted({c["model"] for c in calls}),
+    }
+
+
+def usage_header(calls):
+    """Compact X-LLM-Usage value, e.g. calls=2; prompt=5120; completion=1804; cost_usd=0.0061"""
+    summary = summarize_usage(calls)
+    return (f"calls={summary['calls']}; prompt={summary['prompt_tokens']}; "
+            f"completion={summary['completion_tokens']}; cost_usd={summary['cost_usd']}; "
+            f"llm_ms={summary['llm_ms']}")
+
+
+def estimate_tokens(contents):
+    parts = contents if isinstance(contents, (list, tuple)) else [contents]
+    total = 0
+    for part in parts:
+        total += len(part) // 4 if isinstance(part, str) else IMAGE_TOKENS
+    return max(1, total)
+
+
+def cost_usd(tier, prompt_tokens, completion_tokens):
+    prices = MODEL_TIERS[tier]
+    return (prompt_tokens * prices["input_per_m"] + completion_tokens * prices["output_per_m"]) / 1e6
+
+
+def choose_tier(stage, prompt_tokens, calls=None):
+    """(tier, reason) for the next call of `stage` given the request's spend so far"""
+    if LLM_ROUTING in MODEL_TIERS:
+        return LLM_ROUTING, "pinned"
+    if stage in FAST_STAGES:
+        return "fast", "simple_stage"
+    if prompt_tokens <= LLM_FAST_MAX_PROMPT_TOKENS:
+        return "fast", "small_input"
+    calls = calls or []
+    expected = EXPECTED_OUTPUT_TOKENS.get(stage, 1000)
+    if LLM_REQUEST_BUDGET_USD:
+        spent = sum(c["cost_usd"] for c in calls)
+        if spent + cost_usd("full", prompt_tokens, expected) > LLM_REQUEST_BUDGET_USD:
+            return "fast", "cost_budget"
+    if LLM_REQUEST_BUDGET_MS:
+        if sum(c["ms"] for c in calls) > LLM_REQUEST_BUDGET_MS:
+            return "fast", "latency_budget"
+    return "full", "large_input"
+
+
+def _usage_counts(response, prompt_estimate):
+    usage = getattr(response, "usage_metadata", None)
+    prompt = getattr(usage, "prompt_token_count", None)
+    completion = getattr(usage, "candidates_token_count", None)
+    if prompt is None:
+        prompt = prompt_estimate
+    if completion is None:
+        try:
+            completion = len(response.text) // 4
+        except Exception:
+            completion = 0
+    return int(prompt), int(completion)
+
+
+def _is_timeout(error):
+    return "timeout" in type(error).__name__.lower() or "deadline" in str(error).lower()
+
+
+def _call(stage, tier, reason, contents, kwargs, prompt_estimate, calls):
+    model_name = MODEL_TIERS[tier]["model"]
+    start = time.perf_counter()
+    try:
+        response = get_model(model_name).generate_content(contents, **kwargs)
+    except Exception:
+        LLM_CALLS.inc(stage=stage, tier=tier, reason=reason, outcome="error")
+        raise
+    elapsed = time.perf_counter() - start
+    prompt_tokens, completion_tokens = _usage_counts(response, prompt_estimate)
+    cost = cost_usd(tier, prompt_tokens, completion_tokens)
+
+    LLM_CALLS.inc(stage=stage, tier=tier, reason=reason, outcome="ok")
+    LLM_CALL_SECONDS.observe(elapsed, stage=stage, model=model_name)
+    LLM_TOKENS.inc(prompt_tokens, stage=stage, model=model_name, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, stage=stage, model=model_name, kind="completion")
+    LLM_COST.inc(cost, stage=stage, model=model_name)
+    record = {
+        "stage": stage,
+        "model": model_name,
+        "tier": tier,
+        "reason": reason,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "ms": round(elapsed * 1000.0, 1),
+        "cost_usd": round(cost, 6),
+    }
+    if calls is not None:
+        calls.append(record)
+    print(json.dumps(dict(record, event="llm_call")))
+    return response
+
+
+def generate(stage, contents, tier=None, **kwargs):
+    """
+    generate_content() on the model chosen for this stage, with usage accounting.
+    A fast-tier call that fails for a reason other than a timeout is retried
+    once on the full model.
+    """
+    calls = _request_usage.get()
+    prompt_estimate = estimate_tokens(contents)
+    reason = "explicit"
+    if tier is None:
+        tier, reason = choose_tier(stage, prompt_estimate, calls)
+    try:
+        return _call(stage, tier, reason, contents, kwargs, prompt_estimate, calls)
+    except Exception as e:
+        if tier != "fast" or _is_timeout(e) or LLM_ROUTING == "fast":
+            raise
+        print(f"⚠ {MODEL_TIERS['fast']['model']} failed for {stage} ({e}), retrying on the full model")
+        return _call(stage, "full", "fast_failed", contents, kwargs, prompt_estimate, calls)
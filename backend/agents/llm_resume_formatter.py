@@ -1,7 +1,6 @@
-import google.generativeai as genai
-import os
-
-genai.configure(api_key=os.getenv("GEMINI_API_KEY", ""))
+from agents.llm_client import generate
+from utils.metrics import stage
+from utils.llm_parsing import strip_code_fence
 
 LATEX_TEMPLATE = r"""
 \documentclass[a4paper,10pt]{article}
@@ -289,18 +288,70 @@ LATEX TEMPLATE WITH PLACEHOLDERS:
 
 Return the complete LaTeX resume now:"""
 
-    model = genai.GenerativeModel("gemini-2.5-flash")
-    response = model.generate_content(prompt)
-    
-    # Extract LaTeX code
-    latex_code = response.text.strip()
+    with stage("latex_llm"):
+        response = generate("latex", prompt)
     
-    # Remove markdown code blocks if present
-    if latex_code.startswith('```'):
-        latex_code = latex_code.split('```')[1]
-        if latex_code.startswith('latex'):
-            latex_code = latex_code[5:]
-        latex_code = latex_code.strip()
+    return clean_llm_latex(response.text)
+
+SECTION_MARKER = "%%% SECTION:"
+
+def generate_latex_sections(user_info, job_description, sections, examples):
+    """
+    Use Gemini to (re)write only the given resume sections as LaTeX fragments.
+    `examples` maps section name to a fragment showing the expected formatting.
+    Returns {section: latex_fragment}; sections missing from the reply are omitted.
+    """
+    example_text = "\n".join(
+        f"{SECTION_MARKER} {name}\n{examples.get(name, '').strip()}\n" for name in sections
+    )
+    prompt = f"""You are an expert resume writer and LaTeX formatting specialist.
+
+Rewrite ONLY these sections of a LaTeX resume for the job below: {', '.join(sections)}.
+Each section must start with a line "{SECTION_MARKER} <section name>" followed by its LaTeX.
+Follow the formatting of the examples exactly (same commands, spacing and environments),
+but fill them with the user's information. For "header", write the name/contact block only.
+If the user has no data for a section, output the marker line with nothing after it.
+
+IMPORTANT:
+- Escape special characters properly (_#$%&^~)
+- NEVER use double curly braces or percent-curly-brace markers
+- Use regular ASCII characters only
+- Do NOT output a preamble, \\begin{{document}} or \\end{{document}}
+- Do NOT include markdown code blocks or any explanation
+
+USER INFORMATION:
+{format_user_info(user_info)}
+
+JOB DESCRIPTION:
+{job_description}
+
+FORMATTING EXAMPLES:
+{example_text}
+Return the sections now:"""
+
+    with stage("latex_llm"):
+        response = generate("latex_sections", prompt)
+
+    text = clean_llm_latex(response.text)
+    fragments = {}
+    current = None
+    lines = []
+    for line in text.splitlines():
+        if line.strip().startswith(SECTION_MARKER):
+            if current in sections:
+                fragments[current] = "\n".join(lines).strip()
+            current = line.strip()[len(SECTION_MARKER):].strip().lower()
+            lines = []
+        elif current is not None:
+            lines.append(line)
+    if current in sections:
+        fragments[current] = "\n".join(lines).strip()
+    return fragments
+
+def clean_llm_latex(text):
+    """Strip markdown fences and replace smart punctuation in LaTeX returned by the LLM"""
+    # Remove markdown code blocks if present; an empty response raises LLMResponseError
+    latex_code = strip_code_fence(text, "latex")
     
     # Sanitize smart quotes and dashes to ASCII equivalents
     replacements = {
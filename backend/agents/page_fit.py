@@ -0,0 +1,242 @@
+"""
+One-page fit for the resume template.
+
+Estimates the rendered height of a resume straight from the matched JSON,
+using Palatino character widths and a greedy line-breaking approximation of
+the template's layout, then drops the least relevant bullets until the
+estimate fits in \\textheight. pdflatex only runs once, on the final document,
+to confirm the page count.
+"""
+import os
+from functools import lru_cache
+
+from agents.relevance import score_texts
+from utils.metrics import Counter
+
+PT_PER_IN = 72.27
+PT_PER_CM = 28.45
+
+# Page geometry of templates/latex_template.tex (a4paper, 10pt, \textheight=9.8in)
+TEXT_HEIGHT_PT = 9.8 * PT_PER_IN
+TEXT_WIDTH_PT = (8.27 - 0.55 - 0.85) * PT_PER_IN
+ITEM_WIDTH_PT = TEXT_WIDTH_PT - 25.0          # first itemize level (\leftmargini = 2.5em)
+BULLET_WIDTH_PT = ITEM_WIDTH_PT - 22.0        # nested bullets (\leftmarginii = 2.2em)
+EDUCATION_COLUMNS_PT = {
+    "degree": 2.5 * PT_PER_CM,
+    "specialization": 5.5 * PT_PER_CM,
+    "institute": 3.5 * PT_PER_CM,
+    "year": 2.5 * PT_PER_CM,
+    "gpa": 1.5 * PT_PER_CM,
+}
+
+# \resheading switches the rest of the document to \small (9pt on 11pt)
+FONT_SIZE_PT = 9.0
+BASELINE_PT = 11.0
+HEADER_BASELINE_PT = 12.0
+BOLD_WIDTH_FACTOR = 1.06
+
+# Vertical overheads in pt, calibrated against the template's \vspace and list spacing
+LAYOUT = {
+    "header_offset": -39.0,       # \\[-1.8cm] pulls the header up
+    "heading": 17.0,              # grey \resheading box
+    "education": 36.0,            # rules, column titles and the trailing \\ \\
+    "entry": 23.0,                # one experience/project item incl. its nested list
+    "item_sep": 2.0,              # \itemsep between nested bullets
+    "list": 10.0,                 # a top-level itemize (certifications, skills)
+    "line_item_sep": 4.0,         # \itemsep between top-level items
+    "skill_item": -2.8,           # \vspace{-1mm} after each skill row
+}
+
+# Palatino Roman advance widths, 1/1000 em (from the URW Palladio AFM)
+CHAR_WIDTHS = {
+    " ": 250, "a": 500, "b": 553, "c": 444, "d": 611, "e": 479, "f": 333, "g": 556,
+    "h": 582, "i": 291, "j": 234, "k": 556, "l": 291, "m": 883, "n": 582, "o": 546,
+    "p": 601, "q": 560, "r": 395, "s": 424, "t": 326, "u": 603, "v": 565, "w": 834,
+    "x": 516, "y": 556, "z": 500,
+    "A": 778, "B": 611, "C": 709, "D": 774, "E": 611, "F": 556, "G": 763, "H": 832,
+    "I": 337, "J": 333, "K": 726, "L": 611, "M": 946, "N": 831, "O": 786, "P": 604,
+    "Q": 786, "R": 668, "S": 525, "T": 613, "U": 778, "V": 722, "W": 1000, "X": 667,
+    "Y": 667, "Z": 667,
+    ".": 250, ",": 250, ":": 250, ";": 250, "-": 333, "(": 333, ")": 333, "/": 606,
+    "%": 840, "&": 778, "+": 606, "'": 278, '"': 371, "$": 500, "#": 500, "@": 747,
+    "!": 278, "?": 444, "[": 333, "]": 333, "_": 500, "*": 389, "=": 606, "|": 606,
+}
+DIGIT_WIDTH = 500
+DEFAULT_WIDTH = 556
+
+# Leave a little room for the LLM's rewording and TeX's own line breaking
+PAGE_FIT_SAFETY = float(os.getenv("PAGE_FIT_SAFETY", "0.95"))
+MIN_BULLETS_PER_ENTRY = 1
+
+PAGE_FIT_RESULTS = Counter(
+    "resume_page_fit_total", "One-page fit outcomes, checked against the compiled page count", ["outcome"]
+)
+
+
+@lru_cache(maxsize=8192)
+def word_width(word, bold=False):
+    """Width of a word in em/1000 units; cached because resumes repeat most words"""
+    units = 0
+    for ch in word:
+        if ch.isdigit():
+            units += DIGIT_WIDTH
+        else:
+            units += CHAR_WIDTHS.get(ch, DEFAULT_WIDTH)
+    return units * BOLD_WIDTH_FACTOR if bold else units
+
+
+def count_lines(text, width_pt, size_pt=FONT_SIZE_PT, bold=False):
+    """Greedy first-fit line breaking, close enough to TeX's for ragged estimates"""
+    words = str(text or "").split()
+    if not words:
+        return 1
+    space = CHAR_WIDTHS[" "] * size_pt / 1000.0
+    lines, current = 1, 0.0
+    for word in words:
+        w = word_width(word, bold) * size_pt / 1000.0
+        if current == 0.0:
+            current = w
+        elif current + space + w <= width_pt:
+            current += space + w
+        else:
+            lines += 1
+            current = w
+    return lines
+
+
+def bullet_height(text):
+    return count_lines(text, BULLET_WIDTH_PT) * BASELINE_PT + LAYOUT["item_sep"]
+
+
+def _entry_title(entry, *fields):
+    return " ".join(str(entry.get(f, "") or "") for f in fields)
+
+
+def estimate_height(resume):
+    """Estimated height in pt of the resume rendered with the template, per section"""
+    sections = {}
+
+    header_lines = 2 + (1 if resume.get("location") else 0) + (1 if resume.get("github") else 0)
+    sections["header"] = header_lines * HEADER_BASELINE_PT + LAYOUT["header_offset"]
+
+    education = resume.get("education") or []
+    if education:
+        height = LAYOUT["heading"] + LAYOUT["education"] + BASELINE_PT
+        for edu in education:
+            rows = max(count_lines(edu.get(col, ""), w) for col, w in EDUCATION_COLUMNS_PT.items())
+            height += rows * BASELINE_PT
+        sections["education"] = height
+
+    for key, title_fields in (("experience", ("title", "company", "duration")),
+                              ("projects", ("name", "duration"))):
+        entries = resume.get(key) or []
+        if not entries:
+            continue
+        height = LAYOUT["heading"]
+        for entry in entries:
+            height += LAYOUT["entry"]
+            height += count_lines(_entry_title(entry, *title_fields), ITEM_WIDTH_PT, bold=True) * BASELINE_PT
+            height += sum(bullet_height(d) for d in entry.get("details") or [])
+        sections[key] = height
+
+    certifications = resume.get("certifications") or []
+    if certifications:
+        height = LAYOUT["heading"] + LAYOUT["list"]
+        for cert in certifications:
+            text = _entry_title(cert, "name", "issuer", "date")
+            height += count_lines(text, ITEM_WIDTH_PT) * BASELINE_PT + LAYOUT["line_item_sep"]
+            details = cert.get("details") or []
+            if details:
+                height += LAYOUT["list"] + sum(bullet_height(d) for d in details)
+        sections["certifications"] = height
+
+    skills = resume.get("skills") or []
+    if skills:
+        height = LAYOUT["heading"] + LAYOUT["list"]
+        for skill in skills:
+            text = f"{skill.get('category', '')}: {skill.get('items', '')}"
+            height += count_lines(text, ITEM_WIDTH_PT) * BASELINE_PT + LAYOUT["line_item_sep"] + LAYOUT["skill_item"]
+        sections["skills"] = height
+
+    return sum(sections.values()), sections
+
+
+def fit_to_one_page(resume, job_description, budget_pt=None):
+    """
+    Return (resume, report). The resume is a trimmed copy whose estimated
+    height fits on one page: bullets are ordered by BM25 relevance to the job,
+    then the least relevant bullets and finally the least relevant projects
+    are dropped until the estimate is within budget.
+    """
+    budget = budget_pt or TEXT_HEIGHT_PT * PAGE_FIT_SAFETY
+    before, _ = estimate_height(resume)
+    report = {"estimated_pt": round(before, 1), "budget_pt": round(budget, 1), "removed": []}
+    if before <= budget:
+        report.update(fits=True, trimmed=False, estimated_after_pt=round(before, 1))
+        return resume, report
+
+    bullets = [d for key in ("experience", "projects", "certifications")
+               for entry in resume.get(key) or [] for d in entry.get("details") or []]
+    scores = dict(zip(bullets, score_texts(bullets, job_description)))
+    fitted = dict(resume)
+    for key in ("experience", "projects", "certifications"):
+        entries = []
+        for entry in resume.get(key) or []:
+            entry = dict(entry)
+            details = list(entry.get("details") or [])
+            # Most relevant bullets first; ties keep the author's order
+            entry["details"] = sorted(details, key=lambda d: -scores[d])
+            entries.append(entry)
+        fitted[key] = entries
+
+    candidates = []
+    for key in ("experience", "projects", "certifications"):
+        for index, entry in enumerate(fitted[key]):
+            for position, detail in enumerate(entry["details"]):
+                candidates.append((scores[detail], -position, key, index, detail))
+    candidates.sort(key=lambda c: (c[0], c[1]))
+
+    height = before
+    for score, _, key, index, detail in candidates:
+        if height <= budget:
+            break
+        entry = fitted[key][index]
+        if len(entry["details"]) <= MIN_BULLETS_PER_ENTRY and key != "certifications":
+            continue
+        entry["details"].remove(detail)
+        height -= bullet_height(detail)
+        report["removed"].append({"section": key, "entry": index, "text": detail, "relevance": round(score, 3)})
+
+    if height > budget and len(fitted["projects"]) > 1:
+        project_scores = score_texts(
+            [" ".join([_entry_title(p, "name")] + p["details"]) for p in fitted["projects"]],
+            job_description,
+        )
+        ranked = sorted(range(len(fitted["projects"])), key=lambda i: project_scores[i])
+        drop = set()
+        for i in ranked[:-1]:
+            if height <= budget:
+                break
+            drop.add(i)
+            height, _ = estimate_height(dict(fitted, projects=[p for j, p in enumerate(fitted["projects"]) if j not in drop]))
+            report["removed"].append({"section": "projects", "entry": i, "text": fitted["projects"][i].get("name", "")})
+        fitted["projects"] = [p for j, p in enumerate(fitted["projects"]) if j not in drop]
+
+    after, _ = estimate_height(fitted)
+    report.update(fits=after <= budget, trimmed=True, estimated_after_pt=round(after, 1))
+    print(f"  Page fit: {before:.0f}pt -> {after:.0f}pt (budget {budget:.0f}pt), "
+          f"removed {len(report['removed'])} item(s)")
+    return fitted, report
+
+
+def record_page_count(pages, report=None):
+    """Count how the estimate held up against the single confirming compile"""
+    if report is None:
+        return
+    if pages is None:
+        outcome = "unknown"
+    elif pages <= 1:
+        outcome = "fit" if report.get("trimmed") else "fit_untouched"
+    else:
+        outcome = "overflow"
+    PAGE_FIT_RESULTS.inc(outcome=outcome)
@@ -0,0 +1,353 @@
+"""
+Local relevance ranking of resume material against a job description.
+
+A small BM25 index is built over resume bullets with NumPy so scoring the
+whole resume takes milliseconds. It is used to pre-select the most relevant
+bullets before the resume goes to Gemini (smaller prompt, less for the model
+to sift through) and to build a tailored resume locally when the LLM is slow
+or unavailable.
+"""
+import re
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a about after all also an and any are as at be been being both but by can could do does "
+    "each for from had has have having he her here his how i if in into is it its just me more "
+    "most my no not of on once only or other our out over own same she should so some such than "
+    "that the their them then there these they this those through to too under until up us very "
+    "was we were what when where which while who why will with within would you your using used "
+    "use via per across etc including".split()
+)
+
+BULLET = re.compile(r"^\s*(?:[-*•▪●‣–]|\d+[.)])\s+")
+# Lines that start a new role/project rather than continue a wrapped bullet:
+# dates, "Title | Company", "Title - Company", "Title at Company", project links
+ENTRY_HEADING_HINT = re.compile(
+    r"\b(?:19|20)\d{2}\b|\b(?:present|current)\b|\s[|@–—-]\s|\sat\s+[A-Z]|,\s*[A-Z][a-z]+,\s*[A-Z]"
+    r"|https?://|\b[\w-]+\.(?:com|io|dev|org|net)/", re.I
+)
+SECTION_HEADINGS = (
+    ("summary", ("SUMMARY", "PROFILE", "OBJECTIVE", "ABOUT")),
+    ("experience", ("EXPERIENCE", "EMPLOYMENT", "WORK HISTORY")),
+    ("projects", ("PROJECT",)),
+    ("education", ("EDUCATION", "ACADEMIC")),
+    ("certifications", ("CERTIFICATION", "CERTIFICATES", "LICENSES")),
+    ("skills", ("SKILL", "TECHNOLOGIES", "TECH STACK")),
+)
+
+
+def tokenize(text):
+    return [t for t in TOKEN.findall(str(text or "").lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def bm25_scores(documents, query):
+    """
+    BM25 score of each document (a string) against `query` (a string), as a
+    NumPy array. Query terms are weighted by log(1 + count) so a long job
+    description does not drown the score in repeated boilerplate.
+    """
+    import numpy as np
+
+    docs = [tokenize(d) for d in documents]
+    if not docs:
+        return np.zeros(0, dtype=np.float32)
+
+    vocab = {}
+    for tokens in docs:
+        for t in tokens:
+            vocab.setdefault(t, len(vocab))
+    if not vocab:
+        return np.zeros(len(docs), dtype=np.float32)
+
+    tf = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+    for row, tokens in enumerate(docs):
+        for t in tokens:
+            tf[row, vocab[t]] += 1.0
+
+    lengths = tf.sum(axis=1)
+    avg_length = max(float(lengths.mean()), 1.0)
+    df = (tf > 0).sum(axis=0)
+    idf = np.log((len(docs) - df + 0.5) / (df + 0.5) + 1.0)
+
+    q = np.zeros(len(vocab), dtype=np.float32)
+    for t in tokenize(query):
+        col = vocab.get(t)
+        if col is not None:
+            q[col] += 1.0
+    q = np.log1p(q) * idf
+
+    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * lengths / avg_length)
+    weighted = tf * (BM25_K1 + 1.0) / (tf + norm[:, None])
+    return weighted @ q
+
+
+def score_texts(texts, job_description):
+    """Plain-list BM25 scores, for callers that do not need NumPy arrays"""
+    return [float(s) for s in bm25_scores(list(texts), job_description)]
+
+
+def _section_for(line):
+    stripped = line.strip().rstrip(":").strip()
+    if not stripped or len(stripped) > 40 or BULLET.match(line):
+        return None
+    upper = stripped.upper()
+    if stripped != upper and not stripped.istitle():
+        return None
+    for name, keywords in SECTION_HEADINGS:
+        if any(k in upper for k in keywords):
+            return name
+    return None
+
+
+def _is_entry_heading(line):
+    stripped = line.strip()
+    if ENTRY_HEADING_HINT.search(stripped):
+        return True
+    # Short Title Case line without sentence punctuation, e.g. "Senior Backend Engineer"
+    words = stripped.split()
+    return len(words) <= 8 and stripped.istitle() and not stripped.endswith((".", ","))
+
+
+def _continues_bullet(bullet, line):
+    """Whether a plain line right after `bullet` is the rest of it rather than a new entry heading"""
+    if _is_entry_heading(line):
+        return False
+    if not bullet.endswith((".", "!", "?", ";")):
+        return True
+    # After a finished sentence only a lowercase phrase continues it; a lone "my-project" is a heading
+    stripped = line.strip()
+    return stripped[0].islower() and " " in stripped
+
+
+def parse_resume_text(text):
+    """
+    Split a plain-text resume into header lines and sections. Experience and
+    project sections become entries of {"heading", "bullets"}; other sections
+    keep their raw lines.
+    """
+    parsed = {"header": [], "sections": {}, "order": []}
+    current = None
+    # True while the previous line was a bullet (no blank line since), so a plain line may continue it
+    in_bullet = False
+    for raw in str(text or "").splitlines():
+        line = raw.rstrip()
+        section = _section_for(line)
+        if section:
+            current = section
+            in_bullet = False
+            if section not in parsed["sections"]:
+                parsed["sections"][section] = []
+                parsed["order"].append(section)
+            continue
+        if not line.strip():
+            in_bullet = False
+            continue
+        if current is None:
+            parsed["header"].append(line.strip())
+        elif current in ("experience", "projects"):
+            entries = parsed["sections"][current]
+            if BULLET.match(line) and entries:
+                entries[-1]["bullets"].append(BULLET.sub("", line).strip())
+                in_bullet = True
+            elif BULLET.match(line):
+                entries.append({"heading": "", "bullets": [BULLET.sub("", line).strip()]})
+                in_bullet = True
+            elif in_bullet and _continues_bullet(entries[-1]["bullets"][-1], line):
+                # A bullet wrapped onto the next line
+                entries[-1]["bullets"][-1] += " " + line.strip()
+            else:
+                entries.append({"heading": line.strip(), "bullets": []})
+                in_bullet = False
+        else:
+            parsed["sections"][current].append(BULLET.sub("", line).strip())
+    return parsed
+
+
+def rank_bullets(parsed, job_description):
+    """[(score, section, entry_index, bullet_index, text)] for every bullet, best first"""
+    found = []
+    for section in ("experience", "projects"):
+        for e, entry in enumerate(parsed["sections"].get(section, [])):
+            for b, bullet in enumerate(entry["bullets"]):
+                found.append((section, e, b, bullet))
+    scores = score_texts([f[3] for f in found], job_description)
+    ranked = [(score,) + item for score, item in zip(scores, found)]
+    ranked.sort(key=lambda r: -r[0])
+    return ranked
+
+
+def _order_skill_items(items, job_terms):
+    parts = [p.strip() for p in items.split(",") if p.strip()]
+    matched = [p for p in parts if set(tokenize(p)) & job_terms]
+    return matched + [p for p in parts if p not in matched]
+
+
+def preselect_resume_text(resume_text, job_description, top_k=12, min_per_entry=1):
+    """
+    Rebuild the resume text keeping only the `top_k` most relevant bullets
+    (at least `min_per_entry` per role/project, original order preserved) and
+    with job-relevant skills listed first. Returns (text, stats).
+    """
+    parsed = parse_resume_text(resume_text)
+    ranked = rank_bullets(parsed, job_description)
+    stats = {"bullets": len(ranked), "kept": len(ranked), "chars_before": len(resume_text or "")}
+    if len(ranked) <= top_k or not parsed["order"]:
+        stats["chars_after"] = stats["chars_before"]
+        return resume_text, stats
+
+    keep = set()
+    per_entry = {}
+    for score, section, e, b, _ in ranked:
+        if per_entry.get((section, e), 0) < min_per_entry:
+            keep.add((section, e, b))
+            per_entry[(section, e)] = per_entry.get((section, e), 0) + 1
+    for score, section, e, b, _ in ranked:
+        if len(keep) >= max(top_k, len(per_entry)):
+            break
+        keep.add((section, e, b))
+
+    job_terms = set(tokenize(job_description))
+    lines = list(parsed["header"])
+    for section in parsed["order"]:
+        lines.append("")
+        lines.append(section.upper())
+        content = parsed["sections"][section]
+        if section in ("experience", "projects"):
+            for e, entry in enumerate(content):
+                if entry["heading"]:
+                    lines.append(entry["heading"])
+                for b, bullet in enumerate(entry["bullets"]):
+                    if (section, e, b) in keep:
+                        lines.append(f"- {bullet}")
+        elif section == "skills":
+            for line in content:
+                category, sep, items = line.partition(":")
+                if sep:
+                    lines.append(f"{category}: {', '.join(_order_skill_items(items, job_terms))}")
+                else:
+                    lines.append(line)
+        else:
+            lines.extend(content)
+
+    text = "\n".join(lines).strip() + "\n"
+    stats.update(kept=len(keep), chars_after=len(text))
+    return text, stats
+
+
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+LINKEDIN = re.compile(r"(?:https?://)?(?:www\.)?linkedin\.com/[\w/-]+", re.I)
+GITHUB = re.compile(r"(?:https?://)?(?:www\.)?github\.com/[\w/.-]+", re.I)
+PARENS = re.compile(r"\(([^()]*)\)")
+YEAR = re.compile(r"(?:19|20)\d{2}")
+GPA = re.compile(r"(?:GPA|CGPA)[:\s]*([\d.]+(?:\s*/\s*[\d.]+)?)", re.I)
+
+
+def _split_heading(heading):
+    """'Role, Company (Jan 2020 - Present)' -> (left, [parenthesised parts])"""
+    groups = PARENS.findall(heading)
+    left = PARENS.sub("", heading).strip(" ,|-")
+    return left, [g.strip() for g in groups]
+
+
+def _parse_experience(entry):
+    left, groups = _split_heading(entry["heading"])
+    parts = re.split(r"\s+at\s+|,\s*|\s+\|\s+", left, maxsplit=1)
+    title = parts[0]
+    company = parts[1] if len(parts) > 1 else ""
+    duration = next((g for g in groups if YEAR.search(g) or "present" in g.lower()), "")
+    return {"title": title.strip(), "company": company.strip(), "duration": duration, "details": entry["bullets"]}
+
+
+def _parse_project(entry):
+    left, groups = _split_heading(entry["heading"])
+    link = next((g for g in groups if "/" in g or "." in g and " " not in g), "")
+    duration = next((g for g in groups if g != link and (YEAR.search(g) or "present" in g.lower())), "")
+    return {"name": left, "link": link, "duration": duration, "details": entry["bullets"]}
+
+
+def _parse_education(line):
+    parts = [p.strip() for p in line.split(",") if p.strip()]
+    gpa = GPA.search(line)
+    year = next((p for p in parts if YEAR.fullmatch(p)), "")
+    rest = [p for p in parts if p != year and not GPA.search(p)]
+    degree, _, specialization = (rest[0] if rest else "").partition(" ")
+    return {
+        "degree": degree,
+        "specialization": specialization,
+        "institute": rest[1] if len(rest) > 1 else "",
+        "year": year,
+        "gpa": gpa.group(1) if gpa else "",
+    }
+
+
+def _parse_certification(line):
+    parts = [p.strip() for p in line.split(",") if p.strip()]
+    date = parts.pop() if len(parts) > 1 and YEAR.search(parts[-1]) else ""
+    issuer = parts.pop() if len(parts) > 1 else ""
+    return {"name": ", ".join(parts), "issuer": issuer, "date": date, "details": []}
+
+
+def local_tailored_resume(resume_text, job_description, max_bullets_per_entry=4):
+    """
+    Build the structured resume the LLM would return, without the LLM:
+    contact details by pattern, sections by heading, bullets ranked by BM25
+    and trimmed per entry, job-relevant skills first.
+    """
+    parsed = parse_resume_text(resume_text)
+    header = "\n".join(parsed["header"])
+    email = EMAIL.search(header)
+    phone = PHONE.search(header)
+    linkedin = LINKEDIN.search(header)
+    github = GITHUB.search(header)
+    location = ""
+    for line in parsed["header"][1:]:
+        for field in re.split(r"\s*[|•]\s*", line):
+            if field and not any(p.search(field) for p in (EMAIL, PHONE, LINKEDIN, GITHUB)) and "," in field:
+                location = field.strip()
+                break
+        if location:
+            break
+
+    ranked = rank_bullets(parsed, job_description)
+    keep = {}
+    for score, section, e, b, _ in ranked:
+        kept = keep.setdefault((section, e), [])
+        if len(kept) < max_bullets_per_entry:
+            kept.append(b)
+
+    def entries(section, parse):
+        result = []
+        for e, entry in enumerate(parsed["sections"].get(section, [])):
+            order = keep.get((section, e), [])
+            item = parse(dict(entry, bullets=[entry["bullets"][b] for b in order]))
+            result.append(item)
+        return result
+
+    experience = entries("experience", _parse_experience)
+    job_terms = set(tokenize(job_description))
+    skills = []
+    for line in parsed["sections"].get("skills", []):
+        category, sep, items = line.partition(":")
+        if sep:
+            skills.append({"category": category.strip(), "items": ", ".join(_order_skill_items(items, job_terms))})
+        else:
+            skills.append({"category": "Skills", "items": ", ".join(_order_skill_items(line, job_terms))})
+
+    return {
+        "name": parsed["header"][0] if parsed["header"] else "",
+        "email": email.group() if email else "",
+        "phone": phone.group().strip() if phone else "",
+        "title": experience[0]["title"] if experience else "",
+        "location": location,
+        "linkedin": linkedin.group() if linkedin else "",
+        "github": github.group() if github else "",
+        "education": [_parse_education(l) for l in parsed["sections"].get("education", [])],
+        "experience": experience,
+        "projects": entries("projects", _parse_project),
+        "certifications": [_parse_certification(l) for l in parsed["sections"].get("certifications", [])],
+        "skills": skills,
+    }
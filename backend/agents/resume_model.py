@@ -0,0 +1,144 @@
+"""
+Typed resume model.
+
+The structured resume (from the LLM or the local fallback) is validated
+into these dataclasses once, at the boundary: strings are coerced, bullet
+lists normalised, malformed and empty entries dropped. to_dict() gives the
+plain dict the rest of the pipeline (LaTeX, page fit, preview) consumes.
+"""
+from dataclasses import asdict, dataclass, field, fields
+from typing import List
+
+from utils.llm_parsing import LLM_PARSE, LLMResponseError, extract_json
+
+
+def _str(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(s for s in (_str(v) for v in value) if s)
+    if isinstance(value, dict):
+        return ", ".join(s for s in (_str(v) for v in value.values()) if s)
+    return str(value).strip()
+
+
+def _details(value):
+    if value is None:
+        return []
+    if not isinstance(value, (list, tuple)):
+        value = str(value).splitlines()
+    return [s for s in (_str(v).lstrip("-*• ").strip() for v in value) if s]
+
+
+class _Entry:
+    """from_dict for flat entries: every field is a string except `details`"""
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            return None
+        values = {}
+        for f in fields(cls):
+            raw = data.get(f.name)
+            values[f.name] = _details(raw) if f.name == "details" else _str(raw)
+        if not any(values.values()):
+            return None
+        return cls(**values)
+
+
+@dataclass
+class Education(_Entry):
+    degree: str = ""
+    specialization: str = ""
+    institute: str = ""
+    year: str = ""
+    gpa: str = ""
+
+
+@dataclass
+class Experience(_Entry):
+    title: str = ""
+    company: str = ""
+    duration: str = ""
+    details: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Project(_Entry):
+    name: str = ""
+    link: str = ""
+    duration: str = ""
+    details: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Certification(_Entry):
+    name: str = ""
+    issuer: str = ""
+    date: str = ""
+    details: List[str] = field(default_factory=list)
+
+
+@dataclass
+class SkillGroup(_Entry):
+    category: str = ""
+    items: str = ""
+
+
+SECTION_TYPES = {
+    "education": Education,
+    "experience": Experience,
+    "projects": Project,
+    "certifications": Certification,
+    "skills": SkillGroup,
+}
+
+
+@dataclass
+class Resume:
+    name: str = ""
+    email: str = ""
+    phone: str = ""
+    title: str = ""
+    location: str = ""
+    linkedin: str = ""
+    github: str = ""
+    education: List[Education] = field(default_factory=list)
+    experience: List[Experience] = field(default_factory=list)
+    projects: List[Project] = field(default_factory=list)
+    certifications: List[Certification] = field(default_factory=list)
+    skills: List[SkillGroup] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Validate a free-form dict; raises LLMResponseError when it is not a resume at all"""
+        if not isinstance(data, dict):
+            raise LLMResponseError(f"Resume must be a JSON object, got {type(data).__name__}", kind="resume")
+        values = {}
+        for f in fields(cls):
+            raw = data.get(f.name)
+            entry_type = SECTION_TYPES.get(f.name)
+            if entry_type is None:
+                values[f.name] = _str(raw)
+                continue
+            if isinstance(raw, dict):
+                raw = [raw]
+            entries = (entry_type.from_dict(item) for item in (raw if isinstance(raw, list) else []))
+            values[f.name] = [e for e in entries if e is not None]
+        resume = cls(**values)
+        if not resume.name and not any(values[s] for s in SECTION_TYPES):
+            raise LLMResponseError("Resume has no name and no sections", kind="resume")
+        return resume
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def parse_resume_response(text):
+    """Resume from a matching response: locate the JSON, parse and validate it"""
+    data = extract_json(text, "resume")
+    try:
+        return Resume.from_dict(data)
+    except LLMResponseError:
+        LLM_PARSE.inc(kind="resume", outcome="invalid")
+        raise
@@ -0,0 +1,166 @@
+"""
+Per-site crawl profiles and adaptive page-readiness.
+
+Instead of waiting for one hardcoded string, a page counts as ready once
+the network is idle and the DOM has stopped changing for a short quiet
+window (or the profile's selector for the job description is present). A
+hard budget bounds the wait, and per-domain latency stats tighten that
+budget to what the site actually needs.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from urllib.parse import urlparse
+
+from utils.metrics import Histogram
+
+# Upper bound for one page (navigation + readiness wait)
+CRAWL_BUDGET_MS = int(os.getenv("CRAWL_BUDGET_MS", "20000"))
+# Lower bound for the adaptive budget, so one fast sample cannot starve the next crawl
+CRAWL_MIN_BUDGET_MS = int(os.getenv("CRAWL_MIN_BUDGET_MS", "5000"))
+# The DOM must stay unchanged this long to count as settled
+DOM_QUIET_MS = int(os.getenv("CRAWL_DOM_QUIET_MS", "500"))
+# Minimum visible text for a settled page to count as rendered
+MIN_BODY_TEXT = 200
+
+# Job boards whose markup is known: where the description lives and what to wait for
+SITE_PROFILES = {
+    "greenhouse": {
+        "hosts": ("boards.greenhouse.io", "job-boards.greenhouse.io"),
+        "wait_for": "#content, .job__description, #app_body",
+        "content_selector": "#content, .job__description",
+    },
+    "lever": {
+        "hosts": ("jobs.lever.co",),
+        "wait_for": ".posting-page, .content",
+        "content_selector": ".posting-page .content, .section-wrapper.page-full-width",
+    },
+    "ashby": {
+        "hosts": ("jobs.ashbyhq.com",),
+        "wait_for": "[class*='_descriptionText'], [class*='job-posting']",
+        "content_selector": "[class*='_descriptionText']",
+    },
+    "workday": {
+        "hosts": ("myworkdayjobs.com", "myworkdaysite.com"),
+        "wait_for": "[data-automation-id='jobPostingDescription']",
+        "content_selector": "[data-automation-id='jobPostingDescription']",
+    },
+    "linkedin": {
+        "hosts": ("linkedin.com",),
+        "wait_for": ".show-more-less-html__markup, .description__text, .jobs-description",
+        "content_selector": ".show-more-less-html__markup, .description__text, .jobs-description",
+    },
+    "indeed": {
+        "hosts": ("indeed.com",),
+        "wait_for": "#jobDescriptionText",
+        "content_selector": "#jobDescriptionText",
+    },
+    "smartrecruiters": {
+        "hosts": ("jobs.smartrecruiters.com",),
+        "wait_for": ".job-sections, [itemprop='description']",
+        "content_selector": ".job-sections, [itemprop='description']",
+    },
+    "glassdoor": {
+        "hosts": ("glassdoor.com", "glassdoor.co.in"),
+        "wait_for": "[class*='JobDetails_jobDescription'], .jobDescriptionContent",
+        "content_selector": "[class*='JobDetails_jobDescription'], .jobDescriptionContent",
+    },
+    "naukri": {
+        "hosts": ("naukri.com",),
+        "wait_for": "[class*='job-desc'], [class*='JDC__dang-inner-html']",
+        "content_selector": "[class*='job-desc'], [class*='JDC__dang-inner-html']",
+    },
+}
+
+DEFAULT_PROFILE = {"name": "other", "wait_for": None, "content_selector": None}
+
+CRAWL_SECONDS = Histogram(
+    "resume_crawl_seconds", "Page crawl latency by job board and outcome", ["site", "outcome"],
+    buckets=(0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 12.0, 20.0, 30.0, 60.0)
+)
+
+# Recent crawl durations per host, bounded so arbitrary URLs cannot grow it forever
+STATS_SAMPLES = 50
+STATS_MAX_HOSTS = 256
+_durations = OrderedDict()
+_lock = threading.Lock()
+
+
+def host_of(url):
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def profile_for(url):
+    host = host_of(url)
+    for name, profile in SITE_PROFILES.items():
+        if any(host == h or host.endswith("." + h) for h in profile["hosts"]):
+            return dict(profile, name=name)
+    return dict(DEFAULT_PROFILE)
+
+
+def readiness_js(selector, quiet_ms=DOM_QUIET_MS, budget_ms=CRAWL_BUDGET_MS, min_text=MIN_BODY_TEXT):
+    """
+    JS predicate for crawl4ai's wait_for. It installs a MutationObserver on
+    first call, then reports ready when the profile selector (if any) matches
+    and the DOM has been quiet for `quiet_ms`. After `budget_ms` it gives up
+    waiting and returns true so the crawl proceeds with whatever rendered.
+    """
+    selector_check = f"!!document.querySelector({json.dumps(selector)})" if selector else "true"
+    return f"""js:() => {{
+        const now = performance.now();
+        if (!window.__rbReady) {{
+            window.__rbReady = {{start: now, last: now}};
+            new MutationObserver(() => {{ window.__rbReady.last = performance.now(); }})
+                .observe(document.documentElement, {{childList: true, subtree: true, characterData: true}});
+            return false;
+        }}
+        const state = window.__rbReady;
+        if (now - state.start > {int(budget_ms)}) return true;
+        const body = document.body ? document.body.innerText.length : 0;
+        return {selector_check} && body >= {int(min_text)} && now - state.last >= {int(quiet_ms)};
+    }}"""
+
+
+def budget_for(url):
+    """
+    Readiness budget in ms for this host: twice its recent p90 crawl time,
+    clamped to [CRAWL_MIN_BUDGET_MS, CRAWL_BUDGET_MS]. Unknown hosts get the full budget.
+    """
+    with _lock:
+        samples = list(_durations.get(host_of(url), ()))
+    if len(samples) < 3:
+        return CRAWL_BUDGET_MS
+    samples.sort()
+    p90 = samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+    return int(min(CRAWL_BUDGET_MS, max(CRAWL_MIN_BUDGET_MS, 2 * p90 * 1000.0)))
+
+
+def record_crawl(url, profile, seconds, outcome):
+    """Feed the per-host stats (successful crawls only) and the per-site histogram"""
+    CRAWL_SECONDS.observe(seconds, site=profile["name"], outcome=outcome)
+    if outcome != "ok":
+        return
+    host = host_of(url)
+    with _lock:
+        samples = _durations.pop(host, None) or deque(maxlen=STATS_SAMPLES)
+        samples.append(seconds)
+        _durations[host] = samples
+        while len(_durations) > STATS_MAX_HOSTS:
+            _durations.popitem(last=False)
+
+
+def domain_stats():
+    """{host: {"samples", "p50_ms", "p90_ms", "budget_ms"}} for the hosts seen recently"""
+    with _lock:
+        snapshot = {host: sorted(samples) for host, samples in _durations.items()}
+    stats = {}
+    for host, samples in snapshot.items():
+        stats[host] = {
+            "samples": len(samples),
+            "p50_ms": round(samples[len(samples) // 2] * 1000.0, 1),
+            "p90_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.9))] * 1000.0, 1),
+            "budget_ms": budget_for("https://" + host + "/"),
+        }
+    return stats
@@ -0,0 +1,211 @@
+"""
+Skills taxonomy matcher.
+
+data/skills_taxonomy.json lists canonical skills with their aliases
+("k8s" -> Kubernetes). It is compiled into an Aho-Corasick automaton and
+saved as data/skills_index.json, so extracting every known skill from a job
+description or resume is one linear pass over the text. Rebuild the index
+after editing the taxonomy:
+
+    python -m agents.skills_taxonomy
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import deque
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+TAXONOMY_PATH = os.path.join(DATA_DIR, "skills_taxonomy.json")
+INDEX_PATH = os.path.join(DATA_DIR, "skills_index.json")
+INDEX_VERSION = 1
+
+SEPARATORS = re.compile(r"[-_/]+")
+WHITESPACE = re.compile(r"\s+")
+
+_index = None
+_lock = threading.Lock()
+
+
+def normalize(text):
+    """Lowercase and fold separators so "scikit-learn" and "CI/CD" match their aliases"""
+    return WHITESPACE.sub(" ", SEPARATORS.sub(" ", str(text or "").lower()))
+
+
+def _taxonomy_digest(raw):
+    return hashlib.sha256(raw).hexdigest()
+
+
+def build_index(taxonomy, digest=""):
+    """Compile the taxonomy into goto/fail/output tables (plain lists, JSON-serialisable)"""
+    ambiguous = {normalize(a) for a in taxonomy.get("ambiguous", [])}
+    skills, categories, patterns = [], [], {}
+    for category, entries in taxonomy["categories"].items():
+        for canonical, aliases in entries.items():
+            skill_id = len(skills)
+            skills.append(canonical)
+            categories.append(category)
+            for pattern in [canonical] + list(aliases):
+                pattern = normalize(pattern).strip()
+                if pattern and pattern not in ambiguous:
+                    patterns.setdefault(pattern, skill_id)
+
+    goto, outputs = [{}], [[]]
+    for pattern, skill_id in patterns.items():
+        state = 0
+        for ch in pattern:
+            nxt = goto[state].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[state][ch] = nxt
+                goto.append({})
+                outputs.append([])
+            state = nxt
+        outputs[state].append([skill_id, len(pattern)])
+
+    # Breadth-first failure links; outputs of the fallback state are merged in
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for ch, nxt in goto[state].items():
+            queue.append(nxt)
+            f = fail[state]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[nxt] = goto[f].get(ch, 0)
+            outputs[nxt] = outputs[nxt] + outputs[fail[nxt]]
+
+    return {
+        "version": INDEX_VERSION,
+        "taxonomy_sha256": digest,
+        "skills": skills,
+        "categories": categories,
+        "goto": goto,
+        "fail": fail,
+        "outputs": outputs,
+    }
+
+
+def write_index(path=INDEX_PATH, taxonomy_path=TAXONOMY_PATH):
+    with open(taxonomy_path, "rb") as f:
+        raw = f.read()
+    index = build_index(json.loads(raw), _taxonomy_digest(raw))
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp, path)
+    return index
+
+
+def load_index():
+    """Load the prebuilt index once; rebuild it in memory if it is missing or stale"""
+    global _index
+    if _index is not None:
+        return _index
+    with _lock:
+        if _index is not None:
+            return _index
+        with open(TAXONOMY_PATH, "rb") as f:
+            raw = f.read()
+        digest = _taxonomy_digest(raw)
+        index = None
+        try:
+            with open(INDEX_PATH, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") != INDEX_VERSION or index.get("taxonomy_sha256") != digest:
+                print("⚠ skills_index.json is out of date, rebuilding in memory "
+                      "(run: python -m agents.skills_taxonomy)")
+                index = None
+        except FileNotFoundError:
+            print("⚠ skills_index.json not found, building it in memory")
+        except Exception as e:
+            print(f"⚠ Could not load skills_index.json ({e}), building it in memory")
+        if index is None:
+            index = build_index(json.loads(raw), digest)
+        index["category_by_skill"] = dict(zip(index["skills"], index["categories"]))
+        _index = index
+        return _index
+
+
+def _is_boundary(text, pos):
+    return pos < 0 or pos >= len(text) or not text[pos].isalnum()
+
+
+def extract_skills(text):
+    """
+    Return {canonical skill: occurrences} found in `text`, preferring the
+    longest match where patterns overlap ("react native" over "react").
+    """
+    index = load_index()
+    goto, fail, outputs = index["goto"], index["fail"], index["outputs"]
+    text = normalize(text)
+
+    matches = []
+    state = 0
+    for pos, ch in enumerate(text):
+        while state and ch not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(ch, 0)
+        for skill_id, length in outputs[state]:
+            start = pos - length + 1
+            if _is_boundary(text, start - 1) and _is_boundary(text, pos + 1):
+                matches.append((start, -length, skill_id))
+
+    found = {}
+    covered_to = -1
+    for start, neg_length, skill_id in sorted(matches):
+        if start <= covered_to:
+            continue
+        covered_to = start - neg_length - 1
+        name = index["skills"][skill_id]
+        found[name] = found.get(name, 0) + 1
+    return found
+
+
+def category_of(skill):
+    return load_index()["category_by_skill"].get(skill, "")
+
+
+def skill_gap(resume_text, job_description):
+    """Skills the job asks for, which of them the resume shows, and what is missing"""
+    required = extract_skills(job_description)
+    candidate = extract_skills(resume_text)
+    ranked = sorted(required, key=lambda s: (-required[s], s))
+    matched = [s for s in ranked if s in candidate]
+    missing = [s for s in ranked if s not in candidate]
+    extra = sorted(s for s in candidate if s not in required)
+    return {
+        "required": ranked,
+        "matched": matched,
+        "missing": missing,
+        "extra": extra,
+        "coverage": round(len(matched) / float(len(ranked)), 3) if ranked else None,
+    }
+
+
+def format_skill_summary(gap, limit=25):
+    """Compact summary of the skill gap for the LLM prompt"""
+    if not gap["required"] and not gap["extra"]:
+        return ""
+
+    def group(skills):
+        by_category = {}
+        for skill in skills[:limit]:
+            by_category.setdefault(category_of(skill), []).append(skill)
+        return "; ".join(f"{cat}: {', '.join(items)}" for cat, items in by_category.items()) or "none"
+
+    lines = [f"Job requires: {group(gap['required'])}"]
+    lines.append(f"Candidate has (emphasise these): {group(gap['matched'])}")
+    lines.append(f"Not in resume (do NOT claim these): {group(gap['missing'])}")
+    if gap["extra"]:
+        lines.append(f"Other candidate skills: {group(gap['extra'])}")
+    if gap["coverage"] is not None:
+        lines.append(f"Coverage: {int(gap['coverage'] * 100)}%")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    built = write_index()
+    print(f"✓ Wrote {INDEX_PATH}: {len(built['skills'])} skills, {len(built['goto'])} states")
@@ -0,0 +1,74 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+    python -m bench.compare baseline.json current.json --threshold 15
+
+Exits with status 1 when any (target, concurrency) pair got slower at p95 or
+lost throughput by more than the threshold percentage.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    return {(r["target"], r["concurrency"]): r for r in report["results"]}, report.get("meta", {})
+
+
+def pct_change(old, new):
+    if not old:
+        return 0.0
+    return (new - old) / old * 100.0
+
+
+def compare(baseline, current, threshold):
+    regressions = []
+    rows = []
+    for key in sorted(set(baseline) & set(current)):
+        old, new = baseline[key], current[key]
+        p95 = pct_change(old["p95_ms"], new["p95_ms"])
+        p99 = pct_change(old["p99_ms"], new["p99_ms"])
+        rps = pct_change(old["throughput_rps"], new["throughput_rps"])
+        regressed = p95 > threshold or rps < -threshold or new["errors"] > old["errors"]
+        rows.append((key, old, new, p95, p99, rps, regressed))
+        if regressed:
+            regressions.append(key)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two bench.run_bench result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=15.0,
+                        help="Allowed %% slowdown in p95 or drop in throughput")
+    args = parser.parse_args()
+
+    baseline, base_meta = load(args.baseline)
+    current, cur_meta = load(args.current)
+    rows, regressions = compare(baseline, current, args.threshold)
+
+    print(f"baseline {base_meta.get('revision')} ({base_meta.get('timestamp')}) -> "
+          f"current {cur_meta.get('revision')} ({cur_meta.get('timestamp')})\n")
+    print(f"{'target':<22} {'c':>3} {'p95 ms':>19} {'p99 ms':>19} {'req/s':>17}")
+    for (target, concurrency), old, new, p95, p99, rps, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{target:<22} {concurrency:>3} "
+              f"{old['p95_ms']:>8.1f}->{new['p95_ms']:<8.1f}{p95:+6.1f}% "
+              f"{old['p99_ms']:>8.1f}->{new['p99_ms']:<8.1f}{p99:+6.1f}% "
+              f"{old['throughput_rps']:>7.2f}->{new['throughput_rps']:<7.2f}{rps:+6.1f}%{flag}")
+
+    missing = sorted(set(baseline) ^ set(current))
+    if missing:
+        print(f"\nNot compared (present in only one file): {missing}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold}%")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Local Gemini-compatible endpoint with fault injection, for tail-latency tests.
+
+    python -m bench.fake_gemini --port 8090 --latency lognormal:900:8000 \
+        --error-rate 0.03 --malformed-rate 0.02 --slowloris-rate 0.01
+
+Point the backend at it (the SDK then uses its REST transport):
+
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8090 GEMINI_API_KEY=fake uvicorn main:app
+
+It serves POST /v1beta/models/{model}:generateContent and answers the
+match, LaTeX and Vision prompts from bench/fixtures, like bench.fakes does
+in-process, with realistic usageMetadata. Faults are described in
+bench.faults. Errors use Gemini's JSON error shape, and malformed answers
+are one of:
+
+    invalid_json     the HTTP body itself is not JSON
+    no_candidates    a SAFETY-blocked reply without candidates
+    prose            a candidate whose text is an apology without a result
+    cut_off          a candidate truncated mid-answer (finishReason MAX_TOKENS)
+"""
+import argparse
+import json
+
+from fastapi import FastAPI, Request
+from starlette.responses import JSONResponse
+
+from bench import faults as faultlib
+from bench.fakes import fixture_reply
+
+STATUS_NAMES = {
+    400: "INVALID_ARGUMENT",
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    503: "UNAVAILABLE",
+    504: "DEADLINE_EXCEEDED",
+}
+MALFORMED_KINDS = ("invalid_json", "no_candidates", "prose", "cut_off")
+# Gemini bills an inline image as a fixed number of tokens
+IMAGE_TOKENS = 258
+
+app = FastAPI(title="Fake Gemini")
+faults = faultlib.Faults()
+faultlib.add_control_routes(app, faults)
+
+
+def _prompt(payload):
+    """(prompt text, image count) of a generateContent request body"""
+    texts, images = [], 0
+    for content in payload.get("contents") or []:
+        for part in content.get("parts") or []:
+            if "text" in part:
+                texts.append(part["text"])
+            elif "inlineData" in part or "inline_data" in part:
+                images += 1
+    return "\n".join(texts), images
+
+
+def _usage(prompt, images, text):
+    prompt_tokens = max(1, len(prompt) // 4) + images * IMAGE_TOKENS
+    completion_tokens = max(1, len(text) // 4)
+    return {
+        "promptTokenCount": prompt_tokens,
+        "candidatesTokenCount": completion_tokens,
+        "totalTokenCount": prompt_tokens + completion_tokens,
+    }
+
+
+def _reply(model, prompt, images, text, finish_reason="STOP"):
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "finishReason": finish_reason,
+            "index": 0,
+        }],
+        "usageMetadata": _usage(prompt, images, text),
+        "modelVersion": model,
+    }
+
+
+def _error(status):
+    return JSONResponse(
+        status_code=status,
+        content={"error": {
+            "code": status,
+            "message": f"Injected fault: {STATUS_NAMES.get(status, 'ERROR').lower()}",
+            "status": STATUS_NAMES.get(status, "UNKNOWN"),
+        }},
+        headers=faults.error_headers(status)
+    )
+
+
+def _malformed(model, prompt, images, text):
+    kind = faults.choice(MALFORMED_KINDS)
+    faults.note(f"malformed_{kind}")
+    if kind == "invalid_json":
+        return '{"candidates": [{"content": {"parts": [{"text": "', "application/json"
+    if kind == "no_candidates":
+        body = {"promptFeedback": {"blockReason": "SAFETY"}, "usageMetadata": _usage(prompt, images, "")}
+    elif kind == "prose":
+        body = _reply(model, prompt, images, "I'm sorry, I can't help with tailoring this resume right now.")
+    else:
+        body = _reply(model, prompt, images, text[:max(1, len(text) // 3)], finish_reason="MAX_TOKENS")
+    return json.dumps(body), "application/json"
+
+
+@app.post("/{version}/models/{model}:generateContent")
+async def generate_content(version: str, model: str, request: Request):
+    payload = await request.json()
+    prompt, images = _prompt(payload)
+    fault = await faultlib.begin(faults, request)
+    if fault == "error":
+        return _error(faults.error_status())
+
+    text = fixture_reply(prompt, has_image=images > 0)
+    if fault == "malformed":
+        body, media_type = _malformed(model, prompt, images, text)
+        return faultlib.deliver(faults, None, body, media_type)
+    return faultlib.deliver(faults, fault, json.dumps(_reply(model, prompt, images, text)), "application/json")
+
+
+@app.get("/")
+def index():
+    return {"service": "fake-gemini", **faults.snapshot()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gemini-compatible stand-in with fault injection")
+    faultlib.add_arguments(parser, port=8090)
+    args = parser.parse_args()
+    faults.update(faultlib.settings_from_args(args))
+
+    import uvicorn
+    print(f"✓ Fake Gemini on http://{args.host}:{args.port} ({faults.settings})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Local job-board stand-in with fault injection, for tail-latency tests.
+
+    python -m bench.fake_job_site --port 8091 --latency lognormal:300:4000 \
+        --error-rate 0.05 --truncate-rate 0.02
+
+Every page in bench/fixtures/jobs is served in two variants:
+
+    /jobs/<name>       static HTML, the posting is in the initial response
+    /js/jobs/<name>    an empty shell whose script fetches /api/jobs/<name>
+                       after ?render_ms (default 1500) and inserts it in
+                       ?steps chunks ?step_ms apart, like a client-rendered
+                       board, so the crawler's readiness wait is exercised
+
+Use these URLs as job_urls for /process/ (or bench.tail_latency). The
+faults are described in bench.faults and apply to the pages and to the
+JSON API behind the JS variant. A malformed page is a 200 bot wall
+without the posting. All pages share one host, so raise
+CRAWL_PER_HOST_RPS / CRAWL_PER_HOST_BURST / CRAWL_PER_HOST_CONCURRENCY on
+the backend unless politeness limits are what is being measured.
+"""
+import argparse
+import json
+import re
+
+from fastapi import FastAPI, HTTPException, Request
+from starlette.responses import HTMLResponse, JSONResponse
+
+from bench import faults as faultlib
+from bench.fakes import FIXTURES
+
+BOT_WALL = (
+    "<!DOCTYPE html><html><head><title>Just a moment...</title></head><body>"
+    "<h1>Checking your browser before accessing this site.</h1>"
+    "<p>Please enable JavaScript and cookies to continue.</p></body></html>"
+)
+
+JS_SHELL = """<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>__TITLE__</title></head>
+<body>
+<div id="app"><div class="spinner">Loading job...</div></div>
+<script>
+setTimeout(async () => {
+  const app = document.getElementById("app");
+  let data;
+  try {
+    const res = await fetch(__API__);
+    if (!res.ok) throw new Error("HTTP " + res.status);
+    data = await res.json();
+  } catch (e) {
+    app.textContent = "Could not load this job (" + e.message + ")";
+    return;
+  }
+  const blocks = data.html.split(/(?=<div class="section)/);
+  const size = Math.max(1, Math.ceil(blocks.length / __STEPS__));
+  app.innerHTML = "";
+  for (let i = 0; i < blocks.length; i += size) {
+    app.insertAdjacentHTML("beforeend", blocks.slice(i, i + size).join(""));
+    await new Promise(resolve => setTimeout(resolve, __STEP_MS__));
+  }
+}, __RENDER_MS__);
+</script>
+</body>
+</html>
+"""
+
+app = FastAPI(title="Fake job site")
+faults = faultlib.Faults()
+faultlib.add_control_routes(app, faults)
+
+
+def _page(name):
+    path = FIXTURES / "jobs" / f"{name}.html"
+    if not re.fullmatch(r"[A-Za-z0-9_-]+", name) or not path.exists():
+        raise HTTPException(status_code=404, detail=f"No job {name!r}")
+    return path.read_text(encoding="utf-8")
+
+
+def _title(html):
+    match = re.search(r"(?is)<title>(.*?)</title>", html)
+    return match.group(1).strip() if match else ""
+
+
+def _body(html):
+    match = re.search(r"(?is)<body[^>]*>(.*)</body>", html)
+    return match.group(1) if match else html
+
+
+def _error():
+    status = faults.error_status()
+    return HTMLResponse(
+        f"<html><body><h1>{status}</h1><p>Injected fault</p></body></html>",
+        status_code=status,
+        headers=faults.error_headers(status)
+    )
+
+
+async def _serve(request, body, media_type, malformed=BOT_WALL):
+    fault = await faultlib.begin(faults, request)
+    if fault == "error":
+        return _error()
+    if fault == "malformed":
+        return faultlib.deliver(faults, None, malformed, media_type)
+    return faultlib.deliver(faults, fault, body, media_type)
+
+
+@app.get("/jobs/{name}")
+async def static_job(name: str, request: Request):
+    return await _serve(request, _page(name), "text/html")
+
+
+@app.get("/js/jobs/{name}")
+async def rendered_job(name: str, request: Request, render_ms: int = 1500, steps: int = 1, step_ms: int = 200):
+    html = _page(name)
+    shell = (JS_SHELL
+             .replace("__TITLE__", _title(html))
+             .replace("__API__", json.dumps(f"/api/jobs/{name}"))
+             .replace("__STEPS__", str(max(1, steps)))
+             .replace("__STEP_MS__", str(max(0, step_ms)))
+             .replace("__RENDER_MS__", str(max(0, render_ms))))
+    return await _serve(request, shell, "text/html")
+
+
+@app.get("/api/jobs/{name}")
+async def job_api(name: str, request: Request):
+    html = _page(name)
+    payload = json.dumps({"title": _title(html), "html": _body(html)})
+    return await _serve(request, payload, "application/json", malformed='{"error": "captcha_required"')
+
+
+@app.get("/")
+def index(request: Request):
+    base = str(request.base_url).rstrip("/")
+    names = sorted(p.stem for p in (FIXTURES / "jobs").glob("*.html"))
+    return JSONResponse({
+        "static": [f"{base}/jobs/{n}" for n in names],
+        "rendered": [f"{base}/js/jobs/{n}" for n in names],
+        **faults.snapshot(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job board stand-in with fault injection")
+    faultlib.add_arguments(parser, port=8091)
+    args = parser.parse_args()
+    faults.update(faultlib.settings_from_args(args))
+
+    import uvicorn
+    print(f"✓ Fake job site on http://{args.host}:{args.port} ({faults.settings})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Deterministic stand-ins for Gemini and crawl4ai used by the benchmark suite.
+
+`install()` must run before anything under agents/ is imported: it registers
+fake `google.generativeai` and `crawl4ai` modules in sys.modules so the real
+pipeline code runs unchanged, with every network call answered from the
+fixtures directory after a fixed, configurable delay.
+"""
+import asyncio
+import enum
+import json
+import re
+import sys
+import time
+import types
+from pathlib import Path
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# 1x1 white PNG: enough for PIL to open in the vision fallback path
+BLANK_PNG_B64 = (
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+
+SETTINGS = {
+    "llm_latency_ms": 0.0,
+    "crawl_latency_ms": 0.0,
+    "compile_latency_ms": 0.0,
+}
+
+CALLS = {"generate_content": 0, "crawl": 0, "compile": 0}
+
+
+def configure(**settings):
+    for key, value in settings.items():
+        if key not in SETTINGS:
+            raise KeyError(f"Unknown fake setting: {key}")
+        SETTINGS[key] = float(value)
+
+
+def _load_match_fixtures():
+    fixtures = []
+    for path in sorted((FIXTURES / "llm").glob("match_*.json")):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        fixtures.append((data["name"], path.read_text(encoding="utf-8")))
+    return fixtures
+
+
+def _approx_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class _Usage:
+    def __init__(self, prompt_text, completion_text):
+        self.prompt_token_count = _approx_tokens(prompt_text)
+        self.candidates_token_count = _approx_tokens(completion_text)
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+
+class FakeResponse:
+    def __init__(self, text, prompt_text=""):
+        self.text = text
+        self.usage_metadata = _Usage(prompt_text, text)
+
+
+_match_fixtures = None
+
+
+def fixture_reply(prompt, has_image=False):
+    """Fixture text for one of the three prompt shapes used by the pipeline"""
+    global _match_fixtures
+    if has_image:
+        return (FIXTURES / "llm" / "vision_text.txt").read_text(encoding="utf-8")
+    if "LaTeX" in prompt and "TEMPLATE" in prompt:
+        return (FIXTURES / "llm" / "latex_resume.tex").read_text(encoding="utf-8")
+    if _match_fixtures is None:
+        _match_fixtures = _load_match_fixtures()
+    for name, body in _match_fixtures:
+        if name in prompt:
+            return body
+    return _match_fixtures[0][1]
+
+
+class FakeGenerativeModel:
+    """Answers the pipeline's prompts from fixtures"""
+
+    def __init__(self, model_name="", **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, contents, **kwargs):
+        CALLS["generate_content"] += 1
+        if SETTINGS["llm_latency_ms"]:
+            time.sleep(SETTINGS["llm_latency_ms"] / 1000.0)
+
+        parts = contents if isinstance(contents, list) else [contents]
+        prompt = "\n".join(p for p in parts if isinstance(p, str))
+        has_image = len(parts) > 1 and not all(isinstance(p, str) for p in parts)
+        return FakeResponse(fixture_reply(prompt, has_image), prompt)
+
+
+def _make_genai_module():
+    genai = types.ModuleType("google.generativeai")
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = FakeGenerativeModel
+    genai.__fake__ = True
+    return genai
+
+
+class CacheMode(enum.Enum):
+    ENABLED = "enabled"
+    DISABLED = "disabled"
+    BYPASS = "bypass"
+
+
+class CrawlerRunConfig:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class _Markdown:
+    def __init__(self, raw):
+        self.raw_markdown = raw
+
+    def __str__(self):
+        return self.raw_markdown
+
+
+def html_to_text(html):
+    html = re.sub(r"(?is)<(script|style)\b.*?</\1>", " ", html)
+    html = re.sub(r"(?i)<(br|/p|/li|/h\d|/div)\s*/?>", "\n", html)
+    text = re.sub(r"<[^>]+>", " ", html)
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.splitlines()]
+    return "\n".join(line for line in lines if line)
+
+
+class FakeCrawlResult:
+    def __init__(self, url, html):
+        self.url = url
+        self.success = True
+        self.status_code = 200
+        self.response_headers = {"content-type": "text/html; charset=utf-8"}
+        self.error_message = ""
+        self.html = html
+        self.cleaned_html = html
+        self.markdown = _Markdown(html_to_text(html))
+        self.screenshot = BLANK_PNG_B64
+
+
+def job_fixture_for(url):
+    """https://jobs.example.test/<name> maps to fixtures/jobs/<name>.html"""
+    jobs = sorted((FIXTURES / "jobs").glob("*.html"))
+    slug = url.rstrip("/").rsplit("/", 1)[-1]
+    for path in jobs:
+        if path.stem == slug:
+            return path
+    return jobs[0]
+
+
+def job_urls():
+    return [f"https://jobs.example.test/{p.stem}" for p in sorted((FIXTURES / "jobs").glob("*.html"))]
+
+
+class AsyncWebCrawler:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def arun(self, url, config=None, **kwargs):
+        CALLS["crawl"] += 1
+        if SETTINGS["crawl_latency_ms"]:
+            await asyncio.sleep(SETTINGS["crawl_latency_ms"] / 1000.0)
+        html = job_fixture_for(url).read_text(encoding="utf-8")
+        return FakeCrawlResult(url, html)
+
+
+def _make_crawl4ai_module():
+    crawl4ai = types.ModuleType("crawl4ai")
+    crawl4ai.AsyncWebCrawler = AsyncWebCrawler
+    crawl4ai.CrawlerRunConfig = CrawlerRunConfig
+    crawl4ai.CacheMode = CacheMode
+    crawl4ai.__fake__ = True
+    return crawl4ai
+
+
+MINIMAL_PDF = (
+    b"%PDF-1.4\n"
+    b"1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 595 842]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+
+def fake_tex_to_pdf(tex_path, output_dir):
+    """Drop-in for utils.pdf_generator.tex_to_pdf when pdflatex is unavailable"""
+    CALLS["compile"] += 1
+    if SETTINGS["compile_latency_ms"]:
+        time.sleep(SETTINGS["compile_latency_ms"] / 1000.0)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pdf_path = output_dir / (Path(tex_path).stem + ".pdf")
+    pdf_path.write_bytes(MINIMAL_PDF)
+    return pdf_path
+
+
+def fake_compile_latex(tex_path, output_dir, timeout=None):
+    """Drop-in for utils.pdf_generator.compile_latex when pdflatex is unavailable"""
+    start = time.perf_counter()
+    pdf_path = fake_tex_to_pdf(tex_path, output_dir)
+    return {"pdf_path": pdf_path, "pages": 1, "passes": 1, "seconds": time.perf_counter() - start}
+
+
+def install():
+    """Register the fake modules; idempotent"""
+    if getattr(sys.modules.get("google.generativeai"), "__fake__", False):
+        return
+    loaded = [name for name in ("agents.dynamic_scraper", "agents.job_matcher",
+                                "agents.llm_resume_formatter", "main") if name in sys.modules]
+    if loaded:
+        raise RuntimeError(f"bench.fakes.install() must run before importing {', '.join(loaded)}")
+
+    genai = _make_genai_module()
+    google = sys.modules.get("google")
+    if google is None:
+        try:
+            import google
+        except ImportError:
+            google = types.ModuleType("google")
+            google.__path__ = []
+            sys.modules["google"] = google
+    google.generativeai = genai
+    sys.modules["google.generativeai"] = genai
+    sys.modules["crawl4ai"] = _make_crawl4ai_module()
@@ -0,0 +1,241 @@
+"""
+Fault injection shared by the local stand-in servers (bench.fake_gemini,
+bench.fake_job_site).
+
+For every request a Faults instance draws a response delay from the
+latency distribution and decides whether to answer normally or with one
+of these faults:
+
+    error       an HTTP error status (429 and 503 carry Retry-After)
+    malformed   a 200 whose body is broken or useless (server specific)
+    truncate    the first half of the body, then the connection drops
+    slowloris   headers at once, then the body a few bytes at a time
+
+Latency specs (milliseconds):
+
+    const:MS              always MS
+    uniform:LO:HI         evenly spread between LO and HI
+    lognormal:P50:P99     long right tail with the given median and p99
+    pareto:MIN:ALPHA      power-law tail above MIN (smaller ALPHA, fatter tail)
+
+Settings can be changed while a server runs, so one process serves a
+whole sequence of scenarios: GET/POST /_faults reads or updates them as
+JSON, GET /_stats reports what was injected and POST /_stats/reset
+clears it. A request can force a fault with an X-Fault header or a
+?fault= query parameter (error, malformed, truncate, slowloris, none).
+"""
+import asyncio
+import math
+import random
+import threading
+from collections import Counter as Tally
+
+from fastapi import HTTPException, Request
+from starlette.responses import Response, StreamingResponse
+
+FAULT_KINDS = ("error", "malformed", "truncate", "slowloris")
+
+DEFAULTS = {
+    "latency": "const:0",
+    "error_rate": 0.0,
+    "malformed_rate": 0.0,
+    "truncate_rate": 0.0,
+    "slowloris_rate": 0.0,
+    "error_statuses": [429, 500, 503],
+    "retry_after": 1,
+    # Slow-loris pace: this many bytes every interval
+    "slowloris_bytes": 64,
+    "slowloris_interval_ms": 500,
+    # Upper bound on any drawn delay, so a fat-tailed spec cannot hang a run
+    "max_latency_ms": 120000,
+    "seed": None,
+}
+
+
+def parse_latency(spec):
+    """Sampler rng -> milliseconds for a latency spec string; raises ValueError"""
+    kind, _, args = str(spec).partition(":")
+    try:
+        values = [float(v) for v in args.split(":")] if args else []
+    except ValueError:
+        values = []
+    if kind == "const" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        low, high = values
+        return lambda rng: rng.uniform(low, high)
+    if kind == "lognormal" and len(values) == 2 and values[0] > 0:
+        p50, p99 = values
+        mu = math.log(p50)
+        # z(0.99) = 2.3263
+        sigma = max(0.0, math.log(max(p99, p50) / p50) / 2.3263)
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    if kind == "pareto" and len(values) == 2 and values[1] > 0:
+        minimum, alpha = values
+        return lambda rng: minimum * rng.paretovariate(alpha)
+    raise ValueError(
+        f"Bad latency spec {spec!r} (const:MS, uniform:LO:HI, lognormal:P50:P99, pareto:MIN:ALPHA)"
+    )
+
+
+class Faults:
+    """Thread-safe fault settings, per-request draws and injection stats"""
+
+    def __init__(self, **settings):
+        self.settings = dict(DEFAULTS)
+        self.stats = Tally()
+        self.rng = random.Random()
+        self._latency = parse_latency(DEFAULTS["latency"])
+        self._lock = threading.Lock()
+        self.update(settings)
+
+    def update(self, changes):
+        """Apply a dict of setting changes; raises ValueError without applying any on bad input"""
+        unknown = set(changes) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown fault settings: {', '.join(sorted(unknown))}")
+        merged = dict(self.settings, **changes)
+        latency = parse_latency(merged["latency"])
+        rates = [float(merged[f"{kind}_rate"]) for kind in FAULT_KINDS]
+        if any(r < 0 for r in rates) or sum(rates) > 1.0:
+            raise ValueError("Fault rates must be >= 0 and add up to at most 1")
+        if not merged["error_statuses"]:
+            raise ValueError("error_statuses must not be empty")
+        with self._lock:
+            self.settings = merged
+            self._latency = latency
+            if "seed" in changes:
+                self.rng = random.Random(merged["seed"])
+
+    def draw(self, forced=None):
+        """(delay seconds, fault kind or None) for one request"""
+        with self._lock:
+            delay_ms = min(max(0.0, self._latency(self.rng)), float(self.settings["max_latency_ms"]))
+            if forced is not None:
+                fault = None if forced == "none" else forced
+            else:
+                fault, roll = None, self.rng.random()
+                for kind in FAULT_KINDS:
+                    roll -= float(self.settings[f"{kind}_rate"])
+                    if roll < 0:
+                        fault = kind
+                        break
+            self.stats["requests"] += 1
+            self.stats[fault or "ok"] += 1
+        return delay_ms / 1000.0, fault
+
+    def error_status(self):
+        with self._lock:
+            return self.rng.choice(self.settings["error_statuses"])
+
+    def choice(self, options):
+        with self._lock:
+            return self.rng.choice(options)
+
+    def error_headers(self, status):
+        if status in (429, 503):
+            return {"Retry-After": str(self.settings["retry_after"])}
+        return {}
+
+    def note(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {"settings": dict(self.settings), "stats": dict(self.stats)}
+
+
+async def begin(faults, request):
+    """Draw this request's delay and fault, sleep through the delay, return the fault"""
+    forced = request.headers.get("x-fault") or request.query_params.get("fault")
+    if forced is not None and forced not in FAULT_KINDS + ("none",):
+        raise HTTPException(status_code=400, detail=f"Unknown fault {forced!r}")
+    delay, fault = faults.draw(forced)
+    if delay:
+        await asyncio.sleep(delay)
+    return fault
+
+
+async def _truncated(body):
+    yield body[:max(1, len(body) // 2)]
+    # Raising mid-stream makes the server abort the connection without finishing the body
+    raise ConnectionAbortedError("injected truncation")
+
+
+async def _slowloris(body, chunk, interval):
+    for pos in range(0, len(body), chunk):
+        yield body[pos:pos + chunk]
+        await asyncio.sleep(interval)
+
+
+def deliver(faults, fault, body, media_type, status_code=200):
+    """Response for `body` with the truncate and slowloris faults applied"""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if fault == "truncate":
+        return StreamingResponse(_truncated(body), status_code=status_code, media_type=media_type)
+    if fault == "slowloris":
+        settings = faults.settings
+        return StreamingResponse(
+            _slowloris(body, max(1, int(settings["slowloris_bytes"])), settings["slowloris_interval_ms"] / 1000.0),
+            status_code=status_code,
+            media_type=media_type
+        )
+    return Response(body, status_code=status_code, media_type=media_type)
+
+
+def add_control_routes(app, faults):
+    @app.get("/_faults")
+    def get_faults():
+        return faults.snapshot()
+
+    @app.post("/_faults")
+    async def set_faults(request: Request):
+        try:
+            faults.update(await request.json())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        print(f"✓ Fault settings: {faults.settings}")
+        return faults.snapshot()
+
+    @app.get("/_stats")
+    def get_stats():
+        return faults.snapshot()["stats"]
+
+    @app.post("/_stats/reset")
+    def reset_stats():
+        faults.reset_stats()
+        return {}
+
+
+def add_arguments(parser, port):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=port)
+    parser.add_argument("--latency", default=DEFAULTS["latency"],
+                        help="const:MS, uniform:LO:HI, lognormal:P50:P99 or pareto:MIN:ALPHA")
+    for kind in FAULT_KINDS:
+        parser.add_argument(f"--{kind}-rate", type=float, default=0.0, help=f"Fraction of requests answered with {kind}")
+    parser.add_argument("--error-statuses", default="429,500,503", help="Comma-separated statuses for injected errors")
+    parser.add_argument("--retry-after", type=int, default=DEFAULTS["retry_after"])
+    parser.add_argument("--slowloris-bytes", type=int, default=DEFAULTS["slowloris_bytes"])
+    parser.add_argument("--slowloris-interval-ms", type=float, default=DEFAULTS["slowloris_interval_ms"])
+    parser.add_argument("--seed", type=int, default=None, help="Make the fault sequence reproducible")
+
+
+def settings_from_args(args):
+    settings = {
+        "latency": args.latency,
+        "error_statuses": [int(s) for s in args.error_statuses.split(",") if s.strip()],
+        "retry_after": args.retry_after,
+        "slowloris_bytes": args.slowloris_bytes,
+        "slowloris_interval_ms": args.slowloris_interval_ms,
+        "seed": args.seed,
+    }
+    for kind in FAULT_KINDS:
+        settings[f"{kind}_rate"] = getattr(args, f"{kind}_rate")
+    return settings
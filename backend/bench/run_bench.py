@@ -0,0 +1,277 @@
+"""
+End-to-end benchmark for the resume pipeline with stubbed Gemini and crawler.
+
+Run from the backend directory:
+
+    python -m bench.run_bench --concurrency 1,2,4,8 --requests 24 --output bench_results.json
+
+Each target (the /process/ endpoint and the individual stages) is driven with
+the fixture resumes and saved job pages at every concurrency level; the
+results file records throughput and p50/p95/p99 latency so two runs can be
+compared with `python -m bench.compare`.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench import fakes
+
+# Fakes must be in place before the pipeline modules are imported below
+fakes.install()
+
+# Every fixture page lives on one fake host; politeness limits would only measure the rate limiter
+os.environ.setdefault("CRAWL_PER_HOST_RPS", "10000")
+os.environ.setdefault("CRAWL_PER_HOST_BURST", "10000")
+os.environ.setdefault("CRAWL_PER_HOST_CONCURRENCY", "64")
+# Fixtures repeat across concurrent operations; coalescing them would hide the pipeline cost
+os.environ.setdefault("COALESCE_REQUESTS", "0")
+
+TARGETS = ("process", "process_sources", "match_resume_to_job", "latex", "tex_to_pdf")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile over an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(target, concurrency, latencies, errors, wall):
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "target": target,
+        "concurrency": concurrency,
+        "requests": count + errors,
+        "errors": errors,
+        "wall_s": round(wall, 4),
+        "throughput_rps": round(count / wall, 3) if wall > 0 else 0.0,
+        "mean_ms": round(sum(ordered) / count * 1000.0, 3) if count else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000.0, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000.0, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000.0, 3),
+        "max_ms": round(ordered[-1] * 1000.0, 3) if count else 0.0,
+    }
+
+
+async def drive(operation, total, concurrency):
+    """Run `operation(i)` total times with at most `concurrency` in flight"""
+    limiter = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = []
+
+    async def one(i):
+        async with limiter:
+            start = time.perf_counter()
+            try:
+                await operation(i)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return latencies, errors, time.perf_counter() - start
+
+
+class Workload:
+    """Fixture inputs shared by all targets"""
+
+    def __init__(self, scratch):
+        self.scratch = Path(scratch)
+        self.resumes = sorted((fakes.FIXTURES / "resumes").glob("*.txt"))
+        self.job_urls = fakes.job_urls()
+        self.resume_texts = [p.read_text(encoding="utf-8") for p in self.resumes]
+        self.job_texts = [fakes.html_to_text(fakes.job_fixture_for(u).read_text(encoding="utf-8"))
+                          for u in self.job_urls]
+        # Matched resumes as match_resume_to_job returns them, the input of the LaTeX stage
+        self.matched = [json.loads(p.read_text(encoding="utf-8"))
+                        for p in sorted((fakes.FIXTURES / "llm").glob("match_*.json"))]
+        self.tex_source = (fakes.FIXTURES / "llm" / "latex_resume.tex").read_text(encoding="utf-8")
+
+    def pick(self, items, i):
+        return items[i % len(items)]
+
+    def scratch_dir(self, target, i):
+        path = self.scratch / f"{target}_{i}_{time.perf_counter_ns()}"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+
+def build_operations(workload, use_fake_compile):
+    from agents import incremental_latex
+    from agents.dynamic_scraper import process_sources
+    from agents.job_matcher import match_resume_to_job
+    from utils import pdf_generator
+    from utils.latex_lint import lint_latex
+    from utils.shared_store import DiskStore
+    import main
+
+    # Keep bench fragments out of the real cache
+    incremental_latex._store = DiskStore(str(workload.scratch / "fragments"), suffix=".json")
+
+    compile_fn = fakes.fake_tex_to_pdf if use_fake_compile else pdf_generator.tex_to_pdf
+    if use_fake_compile:
+        main.compile_latex = fakes.fake_compile_latex
+
+    import httpx
+    transport = httpx.ASGITransport(app=main.app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600.0)
+
+    async def op_process(i):
+        resume = workload.pick(workload.resumes, i)
+        with open(resume, "rb") as f:
+            response = await client.post(
+                "/process/",
+                data={"job_urls": workload.pick(workload.job_urls, i)},
+                files={"resume_file": (resume.name, f.read(), "text/plain")},
+            )
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+    async def op_process_sources(i):
+        await process_sources({
+            "urls": [workload.pick(workload.job_urls, i)],
+            "txts": [str(workload.pick(workload.resumes, i))],
+        })
+
+    async def op_match(i):
+        await asyncio.to_thread(
+            match_resume_to_job,
+            workload.pick(workload.resume_texts, i),
+            workload.pick(workload.job_texts, i),
+        )
+
+    async def op_latex(i):
+        # A job description no earlier operation used, so cached fragments cannot hide the LLM call
+        job = f"{workload.pick(workload.job_texts, i)}\n\nRun {i}-{time.perf_counter_ns()}"
+
+        def generate_and_lint():
+            tex_code, _ = incremental_latex.generate_latex_incremental(workload.pick(workload.matched, i), job)
+            return lint_latex(tex_code)
+
+        await asyncio.to_thread(generate_and_lint)
+
+    async def op_tex_to_pdf(i):
+        out_dir = workload.scratch_dir("compile", i)
+        tex_path = out_dir / "resume.tex"
+        tex_path.write_text(workload.tex_source, encoding="utf-8")
+        await asyncio.to_thread(compile_fn, str(tex_path), str(out_dir))
+
+    operations = {
+        "process": op_process,
+        "process_sources": op_process_sources,
+        "match_resume_to_job": op_match,
+        "latex": op_latex,
+        "tex_to_pdf": op_tex_to_pdf,
+    }
+    return operations, client
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+async def run(args):
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        raise SystemExit(f"Unknown targets: {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    use_fake_compile = args.fake_compile or shutil.which("pdflatex") is None
+    fakes.configure(
+        llm_latency_ms=args.llm_latency_ms,
+        crawl_latency_ms=args.crawl_latency_ms,
+        compile_latency_ms=args.compile_latency_ms,
+    )
+
+    scratch = tempfile.mkdtemp(prefix="resume_bench_")
+    workload = Workload(scratch)
+    operations, client = build_operations(workload, use_fake_compile)
+
+    results = []
+    failed_targets = {}
+    try:
+        for target in targets:
+            operation = operations[target]
+            try:
+                for _ in range(args.warmup):
+                    await operation(0)
+            except Exception as e:
+                # A broken target is reported and skipped; the other targets still run
+                failed_targets[target] = f"warmup failed: {type(e).__name__}: {e}"
+                print(f"✗ {target}: {failed_targets[target]}")
+                continue
+            for concurrency in levels:
+                latencies, errors, wall = await drive(operation, args.requests, concurrency)
+                row = summarize(target, concurrency, latencies, len(errors), wall)
+                if errors:
+                    row["first_error"] = errors[0]
+                results.append(row)
+                print(f"{target:<22} c={concurrency:<3} {row['throughput_rps']:>9.2f} req/s  "
+                      f"p50 {row['p50_ms']:>9.1f} ms  p95 {row['p95_ms']:>9.1f} ms  "
+                      f"p99 {row['p99_ms']:>9.1f} ms  errors {row['errors']}")
+    finally:
+        await client.aclose()
+        if not args.keep_scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "requests_per_level": args.requests,
+            "fake_compile": use_fake_compile,
+            "fake_latency_ms": dict(fakes.SETTINGS),
+        },
+        "results": results,
+        "failed_targets": failed_targets,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the resume pipeline with stubbed LLM and crawler")
+    parser.add_argument("--targets", default=",".join(TARGETS),
+                        help=f"Comma-separated subset of: {', '.join(TARGETS)}")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=24, help="Operations per target and concurrency level")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed operations per target")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated Gemini latency")
+    parser.add_argument("--crawl-latency-ms", type=float, default=0.0, help="Simulated page load latency")
+    parser.add_argument("--compile-latency-ms", type=float, default=0.0,
+                        help="Simulated pdflatex latency (fake compiler only)")
+    parser.add_argument("--fake-compile", action="store_true",
+                        help="Stub pdflatex even when it is installed")
+    parser.add_argument("--keep-scratch", action="store_true", help="Keep generated files for inspection")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write machine-readable results")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
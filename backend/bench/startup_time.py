@@ -0,0 +1,84 @@
+"""
+Measure how long `import main` takes in a fresh interpreter and enforce a budget.
+
+    python -m bench.startup_time --budget-ms 1500 --runs 5
+
+Uses `python -X importtime` so the slowest imports are listed when the budget
+is exceeded; exits with status 1 in that case so it can gate CI.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that must stay out of the import path of main.py (they are loaded lazily)
+LAZY_MODULES = ("crawl4ai", "playwright", "google.generativeai", "PyPDF2", "pdf2image", "PIL", "jinja2", "nest_asyncio", "numpy")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def measure_once(module):
+    """Import `module` in a fresh interpreter; returns (wall ms, {module: cumulative us})"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0")
+    code = (
+        "import time, sys; start = time.perf_counter(); "
+        f"import {module}; "
+        "print((time.perf_counter() - start) * 1000.0); "
+        "print(','.join(sorted(sys.modules)))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(BACKEND_DIR), capture_output=True, text=True, env=env, timeout=300
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    out_lines = proc.stdout.strip().splitlines()
+    wall_ms = float(out_lines[0])
+    loaded = set(out_lines[1].split(",")) if len(out_lines) > 1 else set()
+
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            cumulative[match.group(3)] = max(cumulative.get(match.group(3), 0), int(match.group(2)))
+    return wall_ms, cumulative, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the cold-start import time of the API")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "1500")),
+                        help="Maximum allowed median import time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    walls = []
+    cumulative, loaded = {}, set()
+    for _ in range(args.runs):
+        wall_ms, cumulative, loaded = measure_once(args.module)
+        walls.append(wall_ms)
+
+    median = statistics.median(walls)
+    print(f"import {args.module}: median {median:.1f} ms over {args.runs} runs "
+          f"(min {min(walls):.1f}, max {max(walls):.1f}); budget {args.budget_ms:.0f} ms")
+
+    eager = [m for m in LAZY_MODULES if m in loaded]
+    if eager:
+        print(f"Heavy modules imported eagerly: {', '.join(eager)}")
+
+    over_budget = median > args.budget_ms
+    if over_budget or eager:
+        print("\nSlowest imports (cumulative):")
+        for name, us in sorted(cumulative.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+            print(f"  {us / 1000.0:>9.1f} ms  {name}")
+    sys.exit(1 if over_budget or eager else 0)
+
+
+if __name__ == "__main__":
+    main()
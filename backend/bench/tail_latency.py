@@ -0,0 +1,198 @@
+"""
+Tail-latency run against a live backend wired to the fault-injecting
+stand-ins (bench.fake_gemini, bench.fake_job_site).
+
+    python -m bench.fake_gemini --latency lognormal:900:8000 --error-rate 0.03 &
+    python -m bench.fake_job_site --latency lognormal:300:4000 --error-rate 0.05 &
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8090 GEMINI_API_KEY=fake \
+        CRAWL_PER_HOST_RPS=1000 CRAWL_PER_HOST_BURST=1000 CRAWL_PER_HOST_CONCURRENCY=64 \
+        uvicorn main:app --port 8000 &
+    python -m bench.tail_latency --requests 200 --concurrency 16 --variant js --output tail.json
+
+Drives /process/ with the fixture resumes and the fake site's job pages,
+then reports status counts, latency percentiles up to p99.9, and how the
+backend's retry, fallback and error counters on /metrics moved next to
+what the stand-ins injected (their /_stats). --gemini-faults and
+--site-faults apply a JSON scenario to the stand-ins before the run, so
+one set of servers can be reused for several scenarios.
+"""
+import argparse
+import asyncio
+import json
+import math
+import re
+import time
+
+import httpx
+
+from bench.fakes import FIXTURES
+
+# Counters whose movement explains the tail: retries, fallbacks, parse failures, rejections
+WATCHED_METRICS = (
+    "resume_crawl_retries_total",
+    "resume_job_description_source_total",
+    "resume_match_local_fallbacks_total",
+    "resume_llm_calls_total",
+    "resume_llm_parse_total",
+    "resume_stage_errors_total",
+    "resume_admission_rejected_total",
+)
+SAMPLE_LINE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})?\s+(\S+)$")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile over an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def parse_metrics(text):
+    """{"name{labels}": value} for the watched counters in a Prometheus text page"""
+    samples = {}
+    for line in text.splitlines():
+        match = SAMPLE_LINE.match(line)
+        if match and match.group(1) in WATCHED_METRICS:
+            samples[match.group(1) + (match.group(2) or "")] = float(match.group(3))
+    return samples
+
+
+def metrics_delta(before, after):
+    delta = {}
+    for key, value in after.items():
+        change = value - before.get(key, 0.0)
+        if change:
+            delta[key] = round(change, 6)
+    return dict(sorted(delta.items()))
+
+
+async def fetch_metrics(client, server):
+    response = await client.get(f"{server}/metrics")
+    response.raise_for_status()
+    return parse_metrics(response.text)
+
+
+async def apply_faults(client, base, scenario):
+    """Apply a fault scenario to a stand-in and clear its stats"""
+    if scenario:
+        response = await client.post(f"{base}/_faults", json=json.loads(scenario))
+        response.raise_for_status()
+    await client.post(f"{base}/_stats/reset")
+
+
+async def drive(args):
+    resumes = [p.read_text(encoding="utf-8") for p in sorted((FIXTURES / "resumes").glob("*.txt"))]
+    prefix = "js/jobs" if args.variant == "js" else "jobs"
+    jobs = [f"{args.job_site}/{prefix}/{p.stem}" for p in sorted((FIXTURES / "jobs").glob("*.html"))]
+
+    async with httpx.AsyncClient(timeout=10.0) as control:
+        await apply_faults(control, args.gemini, args.gemini_faults)
+        await apply_faults(control, args.job_site, args.site_faults)
+        before = await fetch_metrics(control, args.server)
+
+    results = []
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def one(client, i):
+        # Distinct inputs per request so coalescing and caches do not hide the tail
+        data = {
+            "job_urls": f"{jobs[i % len(jobs)]}?run={i}",
+            "basic_details": f"{resumes[i % len(resumes)]}\n\nRun {i}",
+        }
+        async with limit:
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"{args.server}/process/", data=data)
+                outcome = str(response.status_code)
+            except httpx.TimeoutException:
+                outcome = "client_timeout"
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            results.append({"i": i, "outcome": outcome, "seconds": time.perf_counter() - start})
+            if len(results) % max(1, args.requests // 10) == 0:
+                print(f"  {len(results)}/{args.requests} done")
+
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=args.timeout) as client:
+        await asyncio.gather(*(one(client, i) for i in range(args.requests)))
+    wall = time.perf_counter() - start
+
+    async with httpx.AsyncClient(timeout=10.0) as control:
+        after = await fetch_metrics(control, args.server)
+        injected = {
+            "gemini": (await control.get(f"{args.gemini}/_stats")).json(),
+            "job_site": (await control.get(f"{args.job_site}/_stats")).json(),
+        }
+    return results, wall, metrics_delta(before, after), injected
+
+
+def summarize(results, wall):
+    outcomes = {}
+    for r in results:
+        outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+    ordered = sorted(r["seconds"] for r in results)
+    ok = sorted(r["seconds"] for r in results if r["outcome"] == "200")
+    latency = {f"p{p}_s".replace(".", "_"): round(percentile(ordered, p), 3) for p in (50, 90, 95, 99, 99.9)}
+    return {
+        "requests": len(results),
+        "wall_s": round(wall, 2),
+        "throughput_rps": round(len(results) / wall, 3) if wall > 0 else 0.0,
+        "outcomes": dict(sorted(outcomes.items())),
+        "success_ratio": round(len(ok) / len(results), 4) if results else 0.0,
+        "latency": dict(latency, max_s=round(ordered[-1], 3) if ordered else 0.0),
+        "ok_p99_s": round(percentile(ok, 99), 3),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Tail latency of /process/ under injected upstream faults")
+    parser.add_argument("--server", default="http://127.0.0.1:8000", help="Backend under test")
+    parser.add_argument("--gemini", default="http://127.0.0.1:8090", help="bench.fake_gemini")
+    parser.add_argument("--job-site", default="http://127.0.0.1:8091", help="bench.fake_job_site")
+    parser.add_argument("--variant", choices=("static", "js"), default="static", help="Job page variant to crawl")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=300.0, help="Client timeout per request (s)")
+    parser.add_argument("--gemini-faults", default="", help='JSON settings for the fake Gemini, e.g. {"error_rate": 0.1}')
+    parser.add_argument("--site-faults", default="", help="JSON settings for the fake job site")
+    parser.add_argument("--output", default=None, help="Write the full report as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    args.job_site = args.job_site.rstrip("/")
+    print(f"Driving {args.requests} requests at concurrency {args.concurrency} ({args.variant} job pages)")
+    results, wall, delta, injected = asyncio.run(drive(args))
+    summary = summarize(results, wall)
+
+    print(f"\nOutcomes: {summary['outcomes']} ({summary['success_ratio'] * 100:.1f}% ok)")
+    print("Latency:  " + ", ".join(f"{k[:-2].replace('_', '.')} {v:.2f}s" for k, v in summary["latency"].items()))
+    print(f"Injected: gemini {injected['gemini']}, job site {injected['job_site']}")
+    print("Backend counters:")
+    for key, value in delta.items():
+        print(f"  {key} +{value:g}")
+
+    if args.output:
+        report = {
+            "meta": {
+                "server": args.server,
+                "variant": args.variant,
+                "concurrency": args.concurrency,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "gemini_faults": json.loads(args.gemini_faults) if args.gemini_faults else None,
+                "site_faults": json.loads(args.site_faults) if args.site_faults else None,
+            },
+            "summary": summary,
+            "injected": injected,
+            "metrics_delta": delta,
+            "requests": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Report: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
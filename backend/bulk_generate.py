@@ -0,0 +1,282 @@
+"""
+Offline bulk resume generation.
+
+Runs the same pipeline as POST /process/ (extraction, matching, LaTeX
+generation, compile) for every line of a JSONL manifest, across a pool of
+worker processes or threads, without the HTTP server:
+
+    python bulk_generate.py manifest.jsonl --out bulk_out --workers 4
+
+Each manifest line is a JSON object:
+
+    {"id": "alice-acme",                       # optional; defaults to a hash of the line
+     "resume": "resumes/alice.pdf",            # .pdf or .txt, or "details": "free text"
+     "job_url": "https://jobs.lever.co/...",   # or "job_urls": [...], or
+     "job_description_file": "jobs/acme.txt",  # a saved description (skips crawling)
+     "fit_one_page": true}                     # optional
+
+Relative paths are resolved against the manifest's directory. PDFs are
+written to <out>/<id>.pdf (the .tex as <id>.tex when compiling fails).
+Every finished item is appended to <out>/checkpoint.jsonl, so an
+interrupted run picks up where it stopped; <out>/report.json summarises
+the run with per-item and per-stage timings.
+"""
+import sys
+import asyncio
+
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+import argparse
+import json
+import os
+import shutil
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from utils.singleflight import fingerprint
+
+CHECKPOINT_NAME = "checkpoint.jsonl"
+REPORT_NAME = "report.json"
+
+
+def load_manifest(path):
+    """Items of a JSONL manifest with ids assigned and paths made absolute"""
+    base = os.path.dirname(os.path.abspath(path))
+    items, seen = [], set()
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                raise SystemExit(f"{path}:{lineno}: invalid JSON ({e})")
+            item["id"] = str(item.get("id") or fingerprint(item)[:12])
+            if item["id"] in seen:
+                raise SystemExit(f"{path}:{lineno}: duplicate id {item['id']!r}")
+            seen.add(item["id"])
+            for key in ("resume", "job_description_file"):
+                if item.get(key):
+                    item[key] = os.path.join(base, item[key])
+                    if not os.path.isfile(item[key]):
+                        raise SystemExit(f"{path}:{lineno}: {key} not found: {item[key]}")
+            if not (item.get("resume") or item.get("details")):
+                raise SystemExit(f"{path}:{lineno}: needs \"resume\" or \"details\"")
+            item["line"] = lineno
+            items.append(item)
+    return items
+
+
+def load_checkpoint(path):
+    """{id: record} of items already finished by an earlier run"""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A run killed mid-write leaves a partial last line
+                continue
+            done[record["id"]] = record
+    return done
+
+
+def append_checkpoint(path, record):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _sources_for(item, workspace):
+    sources = {"urls": [], "pdfs": [], "txts": []}
+    if not item.get("job_description_file"):
+        urls = item.get("job_urls") or ([item["job_url"]] if item.get("job_url") else [])
+        sources["urls"] = [u.strip() for u in urls if u.strip()]
+    if item.get("resume"):
+        kind = "pdfs" if item["resume"].lower().endswith(".pdf") else "txts"
+        sources[kind].append(item["resume"])
+    else:
+        sources["txts"].append(workspace.write_text("basic_details.txt", item["details"]))
+    return sources
+
+
+def load_pipeline():
+    """The server module, whose pipeline steps this CLI reuses (imported once per process)"""
+    import main as server
+    return server
+
+
+async def _generate_item(item, out_dir):
+    from agents.llm_client import begin_usage, end_usage, summarize_usage
+    from utils import metrics
+    from utils.workspace import JobWorkspace
+
+    timings, token = metrics.begin_request()
+    llm_calls, usage_token = begin_usage()
+    workspace = JobWorkspace.create(prefix="bulk_")
+    try:
+        job_description = None
+        if item.get("job_description_file"):
+            with open(item["job_description_file"], "r", encoding="utf-8") as f:
+                job_description = f.read()
+        sources = _sources_for(item, workspace)
+        server = load_pipeline()
+        # An unreadable resume or job page fails the item instead of producing a placeholder resume
+        ai_resume, job_desc_text = await server._match(workspace, sources, job_description, strict=True)
+        result = await server._render(workspace, ai_resume, job_desc_text, bool(item.get("fit_one_page")))
+
+        ok = result["status_code"] == 200
+        dest = os.path.join(out_dir, item["id"] + (".pdf" if ok else ".tex"))
+        shutil.copyfile(result["path"], dest)
+        headers = result["headers"]
+        return {
+            "status": "ok" if ok else "failed",
+            "output": dest,
+            "artifact_id": headers.get("X-Artifact-Id") or headers.get("X-Source-Artifact-Id"),
+            "pages": int(headers["X-Page-Count"]) if headers.get("X-Page-Count") else None,
+            "error": None if ok else headers.get("X-Error-Detail"),
+            "stages_ms": metrics.summarize_timings(timings),
+            "llm": summarize_usage(llm_calls),
+        }
+    finally:
+        workspace.cleanup()
+        end_usage(usage_token)
+        metrics.end_request(token)
+
+
+def run_item(item, out_dir):
+    """Worker entry point: generate one manifest item and return its report record"""
+    start = time.perf_counter()
+    record = {"id": item["id"], "line": item["line"]}
+    try:
+        record.update(asyncio.run(_generate_item(item, out_dir)))
+    except Exception as e:
+        # HTTPException carries its message in .detail
+        detail = getattr(e, "detail", None) or str(e)
+        record.update({"status": "failed", "error": f"{type(e).__name__}: {detail}"})
+        traceback.print_exc()
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))]
+
+
+def summarize(records, wall_seconds, ran):
+    finished = [r for r in records if r["status"] in ("ok", "failed")]
+    durations = sorted(r["seconds"] for r in finished if "seconds" in r)
+    stage_totals = {}
+    for record in finished:
+        for name, ms in (record.get("stages_ms") or {}).items():
+            stage_totals[name] = round(stage_totals.get(name, 0.0) + ms, 1)
+    ok = sum(1 for r in records if r["status"] == "ok")
+    return {
+        "total": len(records),
+        "ok": ok,
+        "failed": sum(1 for r in records if r["status"] == "failed"),
+        "wall_s": round(wall_seconds, 2),
+        # Throughput of this run only; earlier runs' items come from the checkpoint
+        "items_per_min": round(ran / wall_seconds * 60.0, 2) if wall_seconds > 0 else 0.0,
+        "p50_s": _percentile(durations, 50),
+        "p95_s": _percentile(durations, 95),
+        "max_s": durations[-1] if durations else 0.0,
+        "stage_totals_ms": stage_totals,
+        "llm_cost_usd": round(sum((r.get("llm") or {}).get("cost_usd", 0.0) for r in finished), 6),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate tailored resumes in bulk from a JSONL manifest")
+    parser.add_argument("manifest", help="JSONL file, one item per line")
+    parser.add_argument("--out", default="bulk_output", help="Directory for PDFs, checkpoint and report")
+    parser.add_argument("--workers", type=int, default=max(1, min(4, os.cpu_count() or 1)),
+                        help="Items processed at once")
+    parser.add_argument("--pool", choices=("process", "thread"), default="process",
+                        help="Worker processes (isolated, CPU-parallel) or threads (lighter, shared caches)")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Run items again that failed in an earlier run (successful ones are always skipped)")
+    parser.add_argument("--limit", type=int, default=None, help="Process at most this many pending items")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    items = load_manifest(args.manifest)
+    out_dir = os.path.abspath(args.out)
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint_path = os.path.join(out_dir, CHECKPOINT_NAME)
+
+    done = load_checkpoint(checkpoint_path)
+    finished_ids = {i for i, r in done.items() if r["status"] == "ok" or not args.retry_failed}
+    pending = [item for item in items if item["id"] not in finished_ids]
+    if args.limit is not None:
+        pending = pending[:args.limit]
+    print(f"✓ {len(items)} items in manifest, {len(items) - len(pending)} already done, {len(pending)} to run "
+          f"({args.workers} {args.pool} workers)")
+
+    # Fail fast on a broken environment instead of once per item; process workers import it themselves
+    try:
+        load_pipeline()
+    except ImportError as e:
+        raise SystemExit(f"✗ Cannot load the pipeline: {e} (pip install -r requirements.txt)")
+    if args.pool == "process":
+        pool = ProcessPoolExecutor(max_workers=args.workers, initializer=load_pipeline)
+    else:
+        pool = ThreadPoolExecutor(max_workers=args.workers)
+
+    start = time.perf_counter()
+    completed = 0
+    try:
+        with pool:
+            futures = {pool.submit(run_item, item, out_dir): item for item in pending}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    record = future.result()
+                except Exception as e:
+                    # A worker process that died (e.g. out of memory) fails only its item
+                    record = {"id": item["id"], "line": item["line"], "status": "failed",
+                              "error": f"worker crashed: {e}"}
+                append_checkpoint(checkpoint_path, record)
+                done[record["id"]] = record
+                completed += 1
+                mark = "✓" if record["status"] == "ok" else "✗"
+                print(f"{mark} [{completed}/{len(pending)}] {record['id']} {record['status']} "
+                      f"in {record.get('seconds', 0):.1f}s" + (f" - {record['error']}" if record.get("error") else ""))
+    except KeyboardInterrupt:
+        print("\n⚠ Interrupted; finished items are checkpointed, rerun the same command to continue")
+        raise SystemExit(130)
+    wall = time.perf_counter() - start
+
+    records = [done.get(item["id"], {"id": item["id"], "line": item["line"], "status": "pending"})
+               for item in items]
+    report = {
+        "manifest": os.path.abspath(args.manifest),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "workers": args.workers,
+        "pool": args.pool,
+        "summary": summarize(records, wall, completed),
+        "items": records,
+    }
+    report_path = os.path.join(out_dir, REPORT_NAME)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    summary = report["summary"]
+    print(f"\n{summary['ok']} ok, {summary['failed']} failed of {summary['total']} "
+          f"in {summary['wall_s']}s (p50 {summary['p50_s']}s, p95 {summary['p95_s']}s)")
+    print(f"✓ Report: {report_path}")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,194 +7,458 @@ if sys.platform == 'win32':
 
 import shutil
 import os
-import tempfile
+import json
+import time
 import traceback
-from fastapi import FastAPI, UploadFile, Form, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from agents.dynamic_scraper import process_sources
 from agents.job_matcher import match_resume_to_job
-from agents.llm_resume_formatter import generate_latex_resume  # Changed import
-from utils.pdf_generator import tex_to_pdf
-from starlette.responses import FileResponse, JSONResponse
+from agents.incremental_latex import generate_latex_incremental
+from agents.page_fit import fit_to_one_page, record_page_count
+from agents.site_profiles import domain_stats
+from agents.llm_client import begin_usage, end_usage, summarize_usage, usage_header
+from agents.html_preview import render_preview_html, save_preview, load_preview, PREVIEW_MAX_AGE, PREVIEWS
+from utils.pdf_generator import compile_latex, LatexCompileError
+from utils.latex_lint import lint_latex, had_fatal_repairs, record_rescued_compile
+from utils.uploads import save_upload, UploadError, MAX_UPLOAD_BYTES
+from utils import metrics
+from utils.metrics import stage
+from utils import warmup
+from utils.draining import InflightTracker, install_exit_hook
+from utils.workspace import JobWorkspace, TEMP_ROOT, run_janitor
+from utils.singleflight import SingleFlight, fingerprint
+from utils.admission import AdmissionController, Saturated, run_in_stage
+from utils import artifacts
+from utils import profiling
+from starlette.background import BackgroundTask
+from starlette.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse, Response
 
-TEMP = "./temp"
+TEMP = TEMP_ROOT
 os.makedirs(TEMP, exist_ok=True)
 
-app = FastAPI()
+# Allowance for the multipart envelope and the other form fields
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+# Load heavy dependencies in the background once the server is listening
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
+
+# Seconds between the exit signal and closing the listener, while /ready reports draining
+SHUTDOWN_DRAIN_NOTICE = float(os.getenv("SHUTDOWN_DRAIN_NOTICE", "0"))
+
+# Attach identical concurrent submissions to one running execution
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "1") == "1"
+
+inflight = InflightTracker()
+install_exit_hook(inflight, SHUTDOWN_DRAIN_NOTICE)
+process_flights = SingleFlight("process_coalesce")
+# Bounded queue in front of the pipeline; overload is answered with 429 + Retry-After
+admission = AdmissionController()
+
+@asynccontextmanager
+async def lifespan(app):
+    warm_task = None
+    if WARMUP_ON_STARTUP:
+        warm_task = asyncio.create_task(asyncio.to_thread(warmup.warm_dependencies))
+    else:
+        warmup.mark_ready()
+    # Sweeps leftover workspaces and caches by age and keeps temp/ under its size quota
+    janitor_task = asyncio.create_task(run_janitor())
+    yield
+    if warm_task is not None and not warm_task.done():
+        warm_task.cancel()
+    janitor_task.cancel()
+    # The server has already waited for open requests (graceful shutdown timeout)
+    if inflight.count:
+        print(f"⚠ Shutting down with {inflight.count} job(s) still running")
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Error", "X-Error-Detail", "X-Error-Line", "X-Error-Snippet", "X-Page-Count", "X-Page-Fit",
+                    "ETag", "X-Artifact-Id", "X-Artifact-Url", "X-Source-Artifact-Id", "X-Coalesced", "Retry-After",
+                    "X-Thumbnail-Url", "X-LLM-Usage", "X-Profile-Id"],
 )
 
+def header_safe(text, limit=300):
+    """Collapse text onto one ASCII line that is safe to send as a header value"""
+    text = ' '.join(str(text).splitlines()).replace('\r', ' ')
+    text = text.encode('ascii', errors='replace').decode('ascii')
+    if len(text) > limit:
+        text = text[:limit] + '...'
+    return text
+
+@app.middleware("http")
+async def limit_request_size(request, call_next):
+    """Reject oversized bodies from Content-Length before the multipart parser spools them"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > MAX_UPLOAD_BYTES + FORM_OVERHEAD_BYTES:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Upload too large: limit is {MAX_UPLOAD_BYTES} bytes"}
+            )
+    return await call_next(request)
+
+@app.middleware("http")
+async def instrument_requests(request, call_next):
+    """Record request latency and return the per-stage breakdown as a Server-Timing header"""
+    start = time.perf_counter()
+    timings, token = metrics.begin_request()
+    llm_calls, usage_token = begin_usage()
+    metrics.QUEUE_DEPTH.inc(queue="inflight")
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        metrics.QUEUE_DEPTH.dec(queue="inflight")
+        metrics.end_request(token)
+        end_usage(usage_token)
+        elapsed = time.perf_counter() - start
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        metrics.REQUEST_SECONDS.observe(elapsed, route=route, status=status)
+    if timings:
+        response.headers["Server-Timing"] = metrics.server_timing_header(timings, elapsed)
+        print(json.dumps({
+            "event": "request_timings",
+            "route": route,
+            "status": status,
+            "total_ms": round(elapsed * 1000.0, 1),
+            "stages_ms": metrics.summarize_timings(timings),
+        }))
+    if llm_calls:
+        response.headers["X-LLM-Usage"] = usage_header(llm_calls)
+        print(json.dumps(dict(summarize_usage(llm_calls), event="request_llm_usage", route=route)))
+    return response
+
 @app.post("/process/")
 async def process_resume(
+    request: Request,
     job_urls: str = Form(""),
     basic_details: str = Form(""),
     resume_file: UploadFile = None,
+    fit_one_page: bool = Form(False),
 ):
-    try:
-        print("=" * 60)
-        print("Starting resume processing...")
-        print("=" * 60)
-        
-        sources = {'urls': [], 'pdfs': [], 'txts': []}
+    if inflight.draining:
+        raise HTTPException(status_code=503, detail="Server is shutting down, please retry")
+    async with inflight.track():
+        return await _run_process(
+            job_urls, basic_details, resume_file, fit_one_page, profile=profiling.requested(request.headers)
+        )
+
+async def _prepare_sources(workspace, job_urls, basic_details, resume_file):
+    """
+    Save the upload (or basic details) into the workspace. Returns the sources
+    for process_sources and a digest of the resume input for fingerprinting.
+    """
+    sources = {'urls': [], 'pdfs': [], 'txts': []}
+    
+    # Parse job URLs
+    if job_urls:
+        sources['urls'] = [j.strip() for j in job_urls.split(",") if j.strip()]
+        print(f"✓ Job URLs: {sources['urls']}")
+    
+    # Handle resume file upload (streamed into the request workspace)
+    if resume_file:
+        try:
+            with stage("upload"):
+                upload = await save_upload(resume_file, workspace.path)
+        except UploadError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
         
-        # Parse job URLs
-        if job_urls:
-            sources['urls'] = [j.strip() for j in job_urls.split(",") if j.strip()]
-            print(f"✓ Job URLs: {sources['urls']}")
+        if upload['kind'] == "pdf":
+            sources['pdfs'].append(upload['path'])
+            print(f"✓ Resume PDF uploaded: {upload['path']} ({upload['size']} bytes, sha256 {upload['sha256'][:12]})")
+        else:
+            sources['txts'].append(upload['path'])
+            print(f"✓ Resume TXT uploaded: {upload['path']} ({upload['size']} bytes, sha256 {upload['sha256'][:12]})")
+    
+    # Handle basic details as text
+    elif basic_details.strip():
+        details_path = workspace.write_text("basic_details.txt", basic_details)
+        sources['txts'].append(details_path)
+        print(f"✓ Basic details saved: {details_path}")
+    
+    # Validate that we have at least something to process
+    if not sources['urls'] and not sources['pdfs'] and not sources['txts']:
+        raise HTTPException(
+            status_code=400, 
+            detail="Please provide either a job URL, resume file, or basic details"
+        )
+    
+    return sources, (upload['sha256'] if resume_file else basic_details.strip())
+
+async def _match(workspace, sources, job_description=None, strict=False):
+    """
+    Extract the resume and job description and tailor the resume; returns
+    (resume, job description). A job_description given up front skips crawling.
+    With strict, a resume or job description that yields no text raises
+    ValueError instead of being replaced by a placeholder.
+    """
+    # Process sources (scraping/extraction)
+    print("\n" + "=" * 60)
+    print("Processing sources...")
+    print("=" * 60)
+    results = await process_sources(sources, workdir=workspace.path)
+    
+    # Extract resume text
+    resume_text = ""
+    if results.get('pdfs'):
+        resume_text = next(iter(results['pdfs'].values()))
+        print(f"✓ Resume text extracted from PDF ({len(resume_text)} chars)")
+    elif results.get('txts'):
+        resume_text = next(iter(results['txts'].values()))
+        print(f"✓ Resume text extracted from TXT ({len(resume_text)} chars)")
+    
+    if not resume_text:
+        if strict:
+            raise ValueError("No text could be extracted from the resume")
+        resume_text = "No resume provided"
+        print("⚠ Warning: No resume text found, using placeholder")
+    
+    # Extract job description
+    job_desc_text = ""
+    if job_description:
+        job_desc_text = job_description
+        print(f"✓ Job description provided ({len(job_desc_text)} chars)")
+    elif results.get('urls'):
+        job_desc_text = next(iter(results['urls'].values()))
+        print(f"✓ Job description extracted ({len(job_desc_text)} chars)")
+    else:
+        if strict and (sources.get('urls') or job_description is not None):
+            raise ValueError("No job description could be extracted")
+        job_desc_text = "No job description provided"
+        print("⚠ Warning: No job description found, using placeholder")
+    
+    # Match resume to job using AI
+    print("\n" + "=" * 60)
+    print("Matching resume to job description...")
+    print("=" * 60)
+    ai_resume = await run_in_stage("llm", match_resume_to_job, resume_text, job_desc_text)
+    print(f"✓ AI processing complete")
+    print(f"  Name: {ai_resume.get('name', 'N/A')}")
+    print(f"  Email: {ai_resume.get('email', 'N/A')}")
+    print(f"  Title: {ai_resume.get('title', 'N/A')}")
+    return ai_resume, job_desc_text
+
+async def _render(workspace, ai_resume, job_desc_text, fit_one_page):
+    """
+    Page fit, LaTeX generation and compile for a matched resume. Returns the
+    response to send as a dict so coalesced requests can each build their own.
+    """
+    # Trim the least relevant bullets up front so a single compile is enough
+    fit_report = None
+    if fit_one_page:
+        with stage("page_fit"):
+            ai_resume, fit_report = await asyncio.to_thread(fit_to_one_page, ai_resume, job_desc_text)
+    
+    # Generate LaTeX using LLM
+    print("\n" + "=" * 60)
+    print("Generating LaTeX with LLM...")
+    print("=" * 60)
+    tex_output_path = workspace.file("resume.tex")
+    
+    try:
+        # Only sections that changed since the last version for this job go back to the LLM
+        tex_code, latex_info = await run_in_stage("llm", generate_latex_incremental, ai_resume, job_desc_text)
+        print(f"  LaTeX mode: {latex_info['mode']} (regenerated: {', '.join(latex_info['regenerated']) or 'none'})")
         
-        # Handle resume file upload
-        temp_fp = ""
-        if resume_file:
-            suffix = resume_file.filename.split(".")[-1].lower()
-            with tempfile.NamedTemporaryFile(suffix=f'.{suffix}', delete=False) as tmpf:
-                tmpf.write(await resume_file.read())
-                temp_fp = tmpf.name
-            
-            if suffix == "pdf":
-                sources['pdfs'].append(temp_fp)
-                print(f"✓ Resume PDF uploaded: {temp_fp}")
-            elif suffix == "txt":
-                sources['txts'].append(temp_fp)
-                print(f"✓ Resume TXT uploaded: {temp_fp}")
-            else:
-                raise HTTPException(status_code=400, detail=f"Unsupported file type: {suffix}")
+        # Repair common LLM mistakes before spending a pdflatex run on them
+        with stage("lint"):
+            lint_report = lint_latex(tex_code)
+        tex_code = lint_report["source"]
+        for issue in lint_report["issues"]:
+            state = "fixed" if issue["repaired"] else "found"
+            print(f"  lint ({state}) line {issue['line']}: {issue['message']}")
         
-        # Handle basic details as text
-        elif basic_details.strip():
-            with tempfile.NamedTemporaryFile(suffix='.txt', delete=False, mode='w', encoding='utf-8') as tmpf:
-                tmpf.write(basic_details)
-                sources['txts'].append(tmpf.name)
-                print(f"✓ Basic details saved: {tmpf.name}")
+        # Write LaTeX to file
+        with open(tex_output_path, "w", encoding="utf-8") as f:
+            f.write(tex_code)
         
-        # Validate that we have at least something to process
-        if not sources['urls'] and not sources['pdfs'] and not sources['txts']:
-            raise HTTPException(
-                status_code=400, 
-                detail="Please provide either a job URL, resume file, or basic details"
+        print(f"✓ LaTeX generated: {tex_output_path}")
+        print(f"  File size: {len(tex_code)} bytes")
+    except Exception as e:
+        print(f"✗ LaTeX generation failed: {str(e)}")
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail=f"LaTeX generation failed: {str(e)}"
+        )
+    
+    # Compile to PDF
+    print("\n" + "=" * 60)
+    print("Compiling PDF...")
+    print("=" * 60)
+    try:
+        if not lint_report["ok"]:
+            blocking = next(i for i in lint_report["issues"] if i["fatal"] and not i["repaired"])
+            raise LatexCompileError(
+                f"Rejected before compiling: {blocking['message']}",
+                line=blocking["line"]
             )
+        compiled = await run_in_stage("compile", compile_latex, tex_output_path, workspace.path)
+        pdf_fp = compiled["pdf_path"]
+        record_page_count(compiled["pages"], fit_report)
+        if had_fatal_repairs(lint_report):
+            record_rescued_compile()
+        print(f"✓ PDF compiled: {pdf_fp}")
+    except Exception as e:
+        print(f"✗ PDF compilation failed: {str(e)}")
+        if not isinstance(e, LatexCompileError):
+            traceback.print_exc()
         
-        # Process sources (scraping/extraction)
-        print("\n" + "=" * 60)
-        print("Processing sources...")
-        print("=" * 60)
-        results = await process_sources(sources)
-        
-        # Extract resume text
-        resume_text = ""
-        if results.get('pdfs'):
-            resume_text = next(iter(results['pdfs'].values()))
-            print(f"✓ Resume text extracted from PDF ({len(resume_text)} chars)")
-        elif results.get('txts'):
-            resume_text = next(iter(results['txts'].values()))
-            print(f"✓ Resume text extracted from TXT ({len(resume_text)} chars)")
-        
-        if not resume_text:
-            resume_text = "No resume provided"
-            print("⚠ Warning: No resume text found, using placeholder")
-        
-        # Extract job description
-        job_desc_text = ""
-        if results.get('urls'):
-            job_desc_text = next(iter(results['urls'].values()))
-            print(f"✓ Job description extracted ({len(job_desc_text)} chars)")
+        # Return the .tex file for debugging if PDF fails
+        if os.path.exists(tex_output_path):
+            error_headers = {
+                "X-Error": "PDF compilation failed. Returning .tex file for debugging.",
+                "X-Error-Detail": header_safe(str(e) if e is not None else "")
+            }
+            if isinstance(e, LatexCompileError):
+                if e.line:
+                    error_headers["X-Error-Line"] = str(e.line)
+                if e.snippet:
+                    error_headers["X-Error-Snippet"] = header_safe(e.snippet, 200)
+            tex_id = artifacts.store_artifact(tex_output_path, "application/x-tex", "debug_resume.tex")
+            error_headers["X-Source-Artifact-Id"] = tex_id
+            tex_path, _ = artifacts.get_artifact(tex_id)
+
+            return {
+                "path": str(tex_path),
+                "media_type": "application/x-tex",
+                "filename": "debug_resume.tex",
+                "status_code": 500,
+                "headers": error_headers,
+            }
         else:
-            job_desc_text = "No job description provided"
-            print("⚠ Warning: No job description found, using placeholder")
-        
-        # Match resume to job using AI
-        print("\n" + "=" * 60)
-        print("Matching resume to job description...")
-        print("=" * 60)
-        ai_resume = match_resume_to_job(resume_text, job_desc_text)
-        print(f"✓ AI processing complete")
-        print(f"  Name: {ai_resume.get('name', 'N/A')}")
-        print(f"  Email: {ai_resume.get('email', 'N/A')}")
-        print(f"  Title: {ai_resume.get('title', 'N/A')}")
-        
-        # Generate LaTeX using LLM
-        print("\n" + "=" * 60)
-        print("Generating LaTeX with LLM...")
-        print("=" * 60)
-        tex_output_path = os.path.join(TEMP, "resume.tex")
-        
-        try:
-            tex_code = generate_latex_resume(ai_resume, job_desc_text)
-            
-            # Write LaTeX to file
-            with open(tex_output_path, "w", encoding="utf-8") as f:
-                f.write(tex_code)
-            
-            print(f"✓ LaTeX generated: {tex_output_path}")
-            print(f"  File size: {len(tex_code)} bytes")
-        except Exception as e:
-            print(f"✗ LaTeX generation failed: {str(e)}")
-            traceback.print_exc()
             raise HTTPException(
                 status_code=500,
-                detail=f"LaTeX generation failed: {str(e)}"
+                detail=f"PDF compilation failed: {str(e)}"
             )
-        
-        # Compile to PDF
-        print("\n" + "=" * 60)
-        print("Compiling PDF...")
-        print("=" * 60)
-        try:
-            pdf_fp = tex_to_pdf(tex_output_path, TEMP)
-            print(f"✓ PDF compiled: {pdf_fp}")
-        except Exception as e:
-            print(f"✗ PDF compilation failed: {str(e)}")
-            traceback.print_exc()
-            
-            # Return the .tex file for debugging if PDF fails
-            if os.path.exists(tex_output_path):
-                raw_err = str(e) if e is not None else ""
-                safe_err = ' '.join(raw_err.splitlines())
-                safe_err = safe_err.replace('\r', ' ').replace('\n', ' ')
-                if len(safe_err) > 300:
-                    safe_err = safe_err[:300] + '...'
-
-                return FileResponse(
-                    str(tex_output_path), 
-                    media_type="application/x-tex",
-                    filename="debug_resume.tex",
-                    status_code=500,
-                    headers={
-                        "X-Error": "PDF compilation failed. Returning .tex file for debugging.",
-                        "X-Error-Detail": safe_err
-                    }
-                )
-            else:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"PDF compilation failed: {str(e)}"
-                )
-        
-        # Clean up temp files
-        try:
-            if temp_fp and os.path.exists(temp_fp):
-                os.remove(temp_fp)
-        except:
-            pass
-        
-        print("\n" + "=" * 60)
-        print("✓ Resume generation complete!")
-        print("=" * 60)
-        
-        # Return PDF
-        return FileResponse(
-            str(pdf_fp), 
-            media_type="application/pdf", 
-            filename="resume.pdf"
+    
+    print("\n" + "=" * 60)
+    print("✓ Resume generation complete!")
+    print("=" * 60)
+    
+    # Store results under their content hash so they can be re-downloaded and cached
+    with stage("store"):
+        pdf_id = artifacts.store_artifact(pdf_fp, "application/pdf", "resume.pdf")
+        tex_id = artifacts.store_artifact(tex_output_path, "application/x-tex", "resume.tex")
+    pdf_path, _ = artifacts.get_artifact(pdf_id)
+    
+    response_headers = {
+        "ETag": artifacts.etag_for(pdf_id),
+        "X-Artifact-Id": pdf_id,
+        "X-Artifact-Url": artifacts.artifact_url(pdf_id),
+        "X-Source-Artifact-Id": tex_id,
+        "X-Thumbnail-Url": artifacts.thumbnail_url(pdf_id),
+    }
+    if compiled["pages"] is not None:
+        response_headers["X-Page-Count"] = str(compiled["pages"])
+    if fit_report is not None:
+        response_headers["X-Page-Fit"] = (
+            f"estimated={fit_report['estimated_after_pt']}pt; budget={fit_report['budget_pt']}pt; "
+            f"removed={len(fit_report['removed'])}"
         )
+        if compiled["pages"] and compiled["pages"] > 1:
+            print(f"⚠ Page fit estimate missed: PDF has {compiled['pages']} pages")
+    
+    return {
+        "path": str(pdf_path),
+        "media_type": "application/pdf",
+        "filename": "resume.pdf",
+        "status_code": 200,
+        "headers": response_headers,
+        "thumbnail_for": pdf_id,
+    }
+
+async def _generate(workspace, sources, fit_one_page):
+    ai_resume, job_desc_text = await _match(workspace, sources)
+    return await _render(workspace, ai_resume, job_desc_text, fit_one_page)
+
+async def _preview(workspace, sources):
+    """Match, then render the HTML preview instead of compiling"""
+    ai_resume, job_desc_text = await _match(workspace, sources)
+    with stage("preview"):
+        html = render_preview_html(ai_resume)
+        preview_id = save_preview(ai_resume, job_desc_text)
+    print(f"✓ Preview ready: {preview_id}")
+    return {"preview_id": preview_id, "html": html}
+
+async def _admitted(workspace, work):
+    """Run work() once a pipeline slot is free; the execution owns (and removes) its workspace"""
+    try:
+        async with admission.admit():
+            return await work()
+    finally:
+        workspace.cleanup()
+
+async def _run_shared(workspace, flight_key, work):
+    """
+    Run work() under admission control, or join the identical execution
+    already in flight. Returns (result, shared).
+    """
+    started = []
     
+    def start():
+        started.append(True)
+        return _admitted(workspace, work)
+    
+    try:
+        if COALESCE_REQUESTS:
+            result, shared = await process_flights.do(flight_key, start)
+        else:
+            result, shared = await start(), False
+    except asyncio.CancelledError:
+        # A running execution owns its workspace and removes it when it finishes
+        if not started:
+            workspace.cleanup()
+        raise
+    if shared:
+        print(f"✓ Joined an identical in-flight request ({flight_key[:12]})")
+    workspace.cleanup()
+    return result, shared
+
+def _file_response(result, shared):
+    """Results are served from the artifact store, so the workspace is already gone"""
+    headers = dict(result["headers"])
+    if shared:
+        headers["X-Coalesced"] = "1"
+    # The execution's own request renders the list-view thumbnail once the PDF has been sent
+    background = None
+    if result.get("thumbnail_for") and not shared:
+        background = BackgroundTask(artifacts.ensure_thumbnail, result["thumbnail_for"])
+    return FileResponse(
+        result["path"],
+        media_type=result["media_type"],
+        filename=result["filename"],
+        status_code=result["status_code"],
+        headers=headers,
+        background=background
+    )
+
+async def _guarded(workspace, handle):
+    """Shared error handling: HTTP errors pass through, overload becomes 429, anything else 500"""
+    try:
+        return await handle()
     except HTTPException:
+        workspace.cleanup()
         raise
+    except Saturated as e:
+        workspace.cleanup()
+        print(f"⚠ Rejected: {e} (retry after {e.retry_after}s)")
+        return JSONResponse(
+            status_code=429,
+            content={"detail": str(e)},
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
+        workspace.cleanup()
         print("\n" + "=" * 60)
         print("✗ FATAL ERROR")
         print("=" * 60)
@@ -204,15 +468,203 @@ async def process_resume(
             detail=f"An unexpected error occurred: {str(e)}"
         )
 
+async def _run_process(job_urls, basic_details, resume_file, fit_one_page=False, profile=None):
+    # Each request gets its own workspace so concurrent requests (and workers) never collide
+    workspace = JobWorkspace.create()
+    
+    async def handle():
+        print("=" * 60)
+        print("Starting resume processing...")
+        print("=" * 60)
+        sources, resume_input = await _prepare_sources(workspace, job_urls, basic_details, resume_file)
+        
+        # Identical submissions that arrive while this one is running share its result
+        flight_key = fingerprint("process", sources['urls'], resume_input, bool(fit_one_page))
+        result, shared = await _run_shared(
+            workspace, flight_key, lambda: _generate(workspace, sources, fit_one_page)
+        )
+        with stage("response"):
+            return _file_response(result, shared)
+    
+    if profile is None:
+        return await _guarded(workspace, handle)
+    # The profile is written next to the request's inputs and intermediates, which are kept with it
+    workspace.keep()
+    with profiling.profile_into(workspace.path, profile) as report:
+        response = await _guarded(workspace, handle)
+    response.headers["X-Profile-Id"] = report["id"]
+    return response
+
+@app.post("/preview/")
+async def preview_resume(
+    job_urls: str = Form(""),
+    basic_details: str = Form(""),
+    resume_file: UploadFile = None,
+):
+    """
+    Tailor the resume and return it as HTML as soon as matching finishes,
+    without LaTeX or pdflatex. POST /preview/{id}/confirm produces the PDF.
+    """
+    if inflight.draining:
+        raise HTTPException(status_code=503, detail="Server is shutting down, please retry")
+    async with inflight.track():
+        workspace = JobWorkspace.create()
+        
+        async def handle():
+            sources, resume_input = await _prepare_sources(workspace, job_urls, basic_details, resume_file)
+            flight_key = fingerprint("preview", sources['urls'], resume_input)
+            result, shared = await _run_shared(workspace, flight_key, lambda: _preview(workspace, sources))
+            preview_id = result["preview_id"]
+            return JSONResponse(
+                content={
+                    "preview_id": preview_id,
+                    "html": result["html"],
+                    "preview_url": f"/preview/{preview_id}",
+                    "confirm_url": f"/preview/{preview_id}/confirm",
+                    "expires_in": int(PREVIEW_MAX_AGE),
+                },
+                headers={"X-Coalesced": "1"} if shared else None
+            )
+        
+        return await _guarded(workspace, handle)
+
+@app.get("/preview/{preview_id}")
+def get_preview(preview_id: str):
+    """The preview as a standalone HTML page (for an iframe or a new tab)"""
+    data = load_preview(preview_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Preview not found or expired")
+    return HTMLResponse(render_preview_html(data["resume"]))
+
+@app.post("/preview/{preview_id}/confirm")
+async def confirm_preview(preview_id: str, fit_one_page: bool = Form(False)):
+    """Compile the full TeX PDF for a preview the user accepted"""
+    if inflight.draining:
+        raise HTTPException(status_code=503, detail="Server is shutting down, please retry")
+    data = load_preview(preview_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Preview not found or expired")
+    async with inflight.track():
+        workspace = JobWorkspace.create()
+        
+        async def handle():
+            flight_key = fingerprint("confirm", preview_id, bool(fit_one_page))
+            result, shared = await _run_shared(
+                workspace, flight_key,
+                lambda: _render(workspace, data["resume"], data["job_description"], fit_one_page)
+            )
+            if not shared:
+                PREVIEWS.inc(outcome="confirmed")
+            with stage("response"):
+                return _file_response(result, shared)
+        
+        return await _guarded(workspace, handle)
+
 @app.get("/")
 def alive():
     return {"status": "ok", "message": "Resume Builder API is running"}
 
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus text exposition of stage latencies, cache hit rates, queue depths and errors"""
+    return PlainTextResponse(
+        metrics.REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@app.api_route("/artifacts/{artifact_id}", methods=["GET", "HEAD"])
+def get_artifact(artifact_id: str, request: Request):
+    """
+    Download a stored PDF or .tex by content hash. Content never changes for a
+    given id, so responses carry a strong ETag and an immutable Cache-Control;
+    If-None-Match returns 304 and single byte ranges are served as 206.
+    """
+    found = artifacts.get_artifact(artifact_id)
+    if found is None:
+        artifacts.ARTIFACT_REQUESTS.inc(status=404)
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    path, meta = found
+    etag = artifacts.etag_for(artifact_id)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": artifacts.CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    
+    if artifacts.etag_matches(request.headers.get("if-none-match"), etag):
+        artifacts.ARTIFACT_REQUESTS.inc(status=304)
+        return Response(status_code=304, headers=headers)
+    
+    size = meta["size"]
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    # A stale If-Range means the client's partial copy is of other content: send it all
+    if not if_range or if_range.strip() == etag:
+        try:
+            byte_range = artifacts.parse_range(request.headers.get("range"), size)
+        except ValueError:
+            artifacts.ARTIFACT_REQUESTS.inc(status=416)
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+    
+    if byte_range is not None:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        artifacts.ARTIFACT_REQUESTS.inc(status=206)
+        body = b"" if request.method == "HEAD" else artifacts.read_range(path, start, end)
+        response = Response(body, status_code=206, media_type=meta["media_type"], headers=headers)
+        response.headers["Content-Length"] = str(end - start + 1)
+        return response
+    
+    artifacts.ARTIFACT_REQUESTS.inc(status=200)
+    return FileResponse(
+        str(path),
+        media_type=meta["media_type"],
+        filename=meta["filename"],
+        content_disposition_type="inline",
+        headers=headers
+    )
+
+@app.get("/artifacts/{artifact_id}/thumbnail")
+async def get_artifact_thumbnail(artifact_id: str, request: Request):
+    """First-page PNG of a generated PDF; rendered on demand if the background render has not run yet"""
+    path = artifacts.get_thumbnail(artifact_id)
+    if path is None:
+        if artifacts.get_artifact(artifact_id) is None:
+            raise HTTPException(status_code=404, detail="Artifact not found")
+        path = await asyncio.to_thread(artifacts.ensure_thumbnail, artifact_id)
+        if path is None:
+            raise HTTPException(status_code=404, detail="No thumbnail available for this artifact")
+    etag = artifacts.thumbnail_etag(artifact_id)
+    headers = {"ETag": etag, "Cache-Control": artifacts.CACHE_CONTROL}
+    if artifacts.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(str(path), media_type="image/png", headers=headers)
+
+@app.get("/crawl-stats")
+def crawl_stats():
+    """Recent crawl latency per job-site host and the readiness budget derived from it"""
+    return domain_stats()
+
 @app.get("/health")
 def health():
-    """Health check endpoint"""
+    """Liveness check: the process is up and serving requests"""
     return {
         "status": "healthy",
         "temp_dir": TEMP,
-        "temp_exists": os.path.exists(TEMP)
-    }
\ No newline at end of file
+        "temp_exists": os.path.exists(TEMP),
+        "admission": admission.snapshot()
+    }
+
+@app.get("/ready")
+def ready():
+    """Readiness check: heavy dependencies have been loaded and requests will not stall on imports"""
+    state = warmup.readiness()
+    if inflight.draining:
+        return JSONResponse(status_code=503, content={"status": "draining", "inflight": inflight.count})
+    body = {
+        "status": "ready" if state["ready"] else "warming",
+        "import_ms": state["timings_ms"],
+        "import_errors": state["errors"],
+    }
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=body)
\ No newline at end of file
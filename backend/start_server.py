@@ -3,6 +3,20 @@ Start the FastAPI app with an explicit Windows selector event loop policy set
 before Uvicorn creates any event loop. Use this script instead of calling
 `uvicorn main:app` on Windows to avoid NotImplementedError from asyncio.create_subprocess_exec
 when Playwright attempts to spawn browser subprocesses.
+
+Development (default): a single process on 127.0.0.1:8000.
+
+Production (`--prod`): several worker processes bound to 0.0.0.0. On POSIX
+hosts with gunicorn installed the app is preloaded in the master and forked
+into Uvicorn workers; otherwise Uvicorn's own process manager is used. On
+SIGTERM each worker first reports draining for --drain-notice seconds (/ready
+and new /process/ requests answer 503, so the load balancer moves traffic
+away), then stops accepting connections and waits up to --graceful-timeout
+seconds for open requests before exiting. Workers share state only through
+files under ./temp (per-request workspaces, disk stores with atomic writes),
+so they can run side by side on one host. Metrics at /metrics are per worker.
+
+    python start_server.py --prod --workers 4 --port 8000
 """
 import sys
 import asyncio
@@ -13,9 +27,92 @@ if sys.platform == "win32":
     except Exception:
         pass
 
-import uvicorn
+import argparse
+import os
+
+
+def default_workers():
+    env = os.getenv("WEB_CONCURRENCY")
+    if env and env.isdigit():
+        return int(env)
+    return max(2, os.cpu_count() or 1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the Resume Builder API")
+    parser.add_argument("--prod", action="store_true", help="Multi-process production mode")
+    parser.add_argument("--host", default=None, help="Bind address (default 127.0.0.1, or 0.0.0.0 with --prod)")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes in --prod mode (default: $WEB_CONCURRENCY or CPU count)")
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "60")),
+                        help="Seconds a worker waits for open requests once it stops accepting")
+    parser.add_argument("--drain-notice", type=float, default=float(os.getenv("SHUTDOWN_DRAIN_NOTICE", "5")),
+                        help="Seconds a worker reports draining on /ready before it stops accepting")
+    parser.add_argument("--no-gunicorn", action="store_true",
+                        help="Use Uvicorn's process manager even if gunicorn is available")
+    return parser.parse_args()
+
+
+def run_gunicorn(args, workers):
+    from gunicorn.app.base import BaseApplication
+    from utils import warmup
+
+    class PreloadedApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{args.host}:{args.port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "uvicorn.workers.UvicornWorker")
+            self.cfg.set("preload_app", True)
+            # The worker keeps serving during the drain notice, then waits for open requests
+            self.cfg.set("graceful_timeout", args.drain_notice + args.graceful_timeout)
+            # LLM calls and pdflatex can legitimately take minutes
+            self.cfg.set("timeout", max(300, int(args.graceful_timeout) * 2))
+
+        def load(self):
+            # Runs once in the master; forked workers inherit the imported modules
+            import main
+            warmup.preload_fork_safe()
+            return main.app
+
+    PreloadedApplication().run()
+
+
+def main():
+    args = parse_args()
+    import uvicorn
+
+    if not args.prod:
+        args.host = args.host or "127.0.0.1"
+        # Start uvicorn WITHOUT the auto-reloader so the event loop policy set above
+        # is applied in the actual server process that will run Playwright.
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=False)
+        return
+
+    args.host = args.host or "0.0.0.0"
+    # Read by main.py when it is imported (gunicorn master or each uvicorn worker)
+    os.environ["SHUTDOWN_DRAIN_NOTICE"] = str(args.drain_notice)
+    workers = args.workers or default_workers()
+    print(f"Starting production server on {args.host}:{args.port} with {workers} workers")
+
+    if sys.platform != "win32" and not args.no_gunicorn:
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            print("gunicorn not installed; falling back to uvicorn workers (no preload)")
+        else:
+            run_gunicorn(args, workers)
+            return
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        reload=False,
+        timeout_graceful_shutdown=int(args.graceful_timeout),
+    )
+
 
 if __name__ == "__main__":
-    # Start uvicorn WITHOUT the auto-reloader so the event loop policy set above
-    # is applied in the actual server process that will run Playwright.
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=False)
+    main()
@@ -0,0 +1,154 @@
+"""
+Admission control and per-stage concurrency limits.
+
+At most ADMISSION_MAX_ACTIVE pipelines run at once and at most
+ADMISSION_MAX_QUEUE wait behind them; anything beyond that (or waiting
+longer than ADMISSION_QUEUE_TIMEOUT) is turned away with 429 and a
+Retry-After estimated from recent pipeline durations. Inside a pipeline the
+expensive resources get their own limits, so a burst cannot launch more
+browsers, Gemini calls or pdflatex processes than the machine can run:
+
+    async with stage_slot("crawl"): ...
+    text = await run_in_stage("llm", blocking_fn, *args)
+"""
+import asyncio
+import math
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+
+from utils.metrics import Counter, Histogram, QUEUE_DEPTH
+
+ADMISSION_MAX_ACTIVE = int(os.getenv("ADMISSION_MAX_ACTIVE", "4"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "16"))
+# Longest a request waits for a pipeline slot before it is rejected
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+
+STAGE_LIMITS = {
+    # Headless browsers running at once across all requests
+    "crawl": int(os.getenv("CRAWL_MAX_CONCURRENCY", "8")),
+    # Gemini calls (matching, LaTeX generation, Vision OCR)
+    "llm": int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+    # pdflatex processes
+    "compile": int(os.getenv("COMPILE_MAX_CONCURRENCY", str(os.cpu_count() or 2))),
+}
+
+QUEUE_WAIT = Histogram(
+    "resume_queue_wait_seconds", "Time spent waiting for a pipeline or stage slot", ["queue"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+ADMISSION_REJECTED = Counter(
+    "resume_admission_rejected_total", "Requests turned away with 429", ["reason"]
+)
+
+
+class Saturated(Exception):
+    """Raised when a request cannot be admitted; retry_after is in whole seconds"""
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded queue in front of a fixed number of pipeline slots"""
+
+    def __init__(self, max_active=ADMISSION_MAX_ACTIVE, max_queue=ADMISSION_MAX_QUEUE,
+                 queue_timeout=ADMISSION_QUEUE_TIMEOUT):
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        # Moving average of how long an admitted pipeline holds its slot
+        self.avg_seconds = 10.0
+        self._slots = None
+
+    def _semaphore(self):
+        # Created lazily so the semaphore binds to the server's running loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_active)
+        return self._slots
+
+    def retry_after(self):
+        """Seconds until a slot is likely free for a request arriving now"""
+        rounds = (self.waiting + 1) / float(self.max_active)
+        return int(min(120, max(1, math.ceil(self.avg_seconds * rounds))))
+
+    def _reject(self, reason):
+        ADMISSION_REJECTED.inc(reason=reason)
+        raise Saturated(f"Server is busy ({reason}), please retry", self.retry_after())
+
+    @asynccontextmanager
+    async def admit(self):
+        slots = self._semaphore()
+        start = time.perf_counter()
+        if slots.locked():
+            if self.waiting >= self.max_queue:
+                self._reject("queue_full")
+            self.waiting += 1
+            QUEUE_DEPTH.inc(queue="admission")
+            try:
+                await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._reject("timeout")
+            finally:
+                self.waiting -= 1
+                QUEUE_DEPTH.dec(queue="admission")
+        else:
+            await slots.acquire()
+        QUEUE_WAIT.observe(time.perf_counter() - start, queue="admission")
+
+        self.active += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            slots.release()
+            self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * (time.perf_counter() - started)
+
+    def snapshot(self):
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "avg_seconds": round(self.avg_seconds, 2),
+        }
+
+
+_stage_slots = weakref.WeakKeyDictionary()
+
+
+def _stage_semaphore(name):
+    """Semaphore for a stage on the running event loop (asyncio primitives are loop-bound)"""
+    loop = asyncio.get_running_loop()
+    slots = _stage_slots.get(loop)
+    if slots is None:
+        slots = {stage: asyncio.Semaphore(limit) for stage, limit in STAGE_LIMITS.items()}
+        _stage_slots[loop] = slots
+    return slots[name]
+
+
+@asynccontextmanager
+async def stage_slot(name):
+    """Hold one of the stage's slots, recording how long it took to get one"""
+    semaphore = _stage_semaphore(name)
+    start = time.perf_counter()
+    QUEUE_DEPTH.inc(queue=f"{name}_wait")
+    try:
+        await semaphore.acquire()
+    finally:
+        QUEUE_DEPTH.dec(queue=f"{name}_wait")
+    QUEUE_WAIT.observe(time.perf_counter() - start, queue=name)
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+async def run_in_stage(name, fn, *args, **kwargs):
+    """Run a blocking call in a worker thread under the stage's concurrency limit"""
+    async with stage_slot(name):
+        return await asyncio.to_thread(fn, *args, **kwargs)
@@ -0,0 +1,198 @@
+"""
+Content-addressed storage for generated artifacts (PDFs and their .tex sources).
+
+An artifact's id is the sha256 of its bytes, so the same content always gets
+the same URL and the stored file never changes. That makes it safe to serve
+with a strong ETag and an immutable, year-long Cache-Control, and lets the
+frontend or a CDN reuse a result instead of asking for a regeneration.
+PDFs also get a first-page PNG thumbnail, rendered once in the background
+and stored next to the PDF under the same id.
+"""
+import hashlib
+import io
+import os
+import re
+import time
+
+from utils.metrics import Counter
+from utils.shared_store import DiskStore, atomic_copy
+from utils.workspace import TEMP_ROOT, register_area
+
+ARTIFACT_DIR = os.path.join(TEMP_ROOT, "artifacts")
+# Artifacts not re-generated for this long are swept by the janitor
+ARTIFACT_MAX_AGE = float(os.getenv("ARTIFACT_MAX_AGE", str(7 * 24 * 3600)))
+register_area("artifacts", ARTIFACT_DIR, ARTIFACT_MAX_AGE)
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+ARTIFACT_ID = re.compile(r"^[0-9a-f]{64}$")
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Thumbnail width in pixels; the height follows the page's aspect ratio
+THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", "320"))
+
+ARTIFACT_REQUESTS = Counter(
+    "resume_artifact_requests_total", "Artifact downloads by response status", ["status"]
+)
+
+THUMBNAILS = Counter(
+    "resume_thumbnails_total", "First-page thumbnails by outcome (rendered, cached, failed)", ["outcome"]
+)
+
+_blobs = None
+_meta = None
+_thumbs = None
+
+
+def _stores():
+    global _blobs, _meta, _thumbs
+    if _blobs is None:
+        _blobs = DiskStore(os.path.join(ARTIFACT_DIR, "blobs"))
+        _meta = DiskStore(os.path.join(ARTIFACT_DIR, "meta"), suffix=".json")
+        _thumbs = DiskStore(os.path.join(ARTIFACT_DIR, "thumbs"), suffix=".png")
+    return _blobs, _meta
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_artifact(path, media_type, filename):
+    """Copy a file into the store and return its id (sha256 hex)"""
+    blobs, meta = _stores()
+    artifact_id = file_sha256(path)
+    blob_path = blobs.path_for(artifact_id)
+    if blob_path.exists():
+        # Same content again: refresh its age instead of copying
+        now = time.time()
+        os.utime(blob_path, (now, now))
+    else:
+        atomic_copy(path, blob_path)
+    meta.put_json(artifact_id, {
+        "media_type": media_type,
+        "filename": filename,
+        "size": os.path.getsize(blob_path),
+        "stored_at": time.time(),
+    })
+    return artifact_id
+
+
+def get_artifact(artifact_id):
+    """(path, meta) for a stored artifact, or None"""
+    if not ARTIFACT_ID.match(artifact_id or ""):
+        return None
+    blobs, meta = _stores()
+    path = blobs.path_for(artifact_id)
+    if not path.exists():
+        return None
+    info = meta.get_json(artifact_id) or {}
+    info.setdefault("media_type", "application/octet-stream")
+    info.setdefault("filename", artifact_id)
+    info["size"] = path.stat().st_size
+    return path, info
+
+
+def artifact_url(artifact_id):
+    return f"/artifacts/{artifact_id}"
+
+
+def thumbnail_url(artifact_id):
+    return f"/artifacts/{artifact_id}/thumbnail"
+
+
+def thumbnail_etag(artifact_id):
+    # The PNG depends on the render width as well as the PDF
+    return f'"{artifact_id}-w{THUMBNAIL_WIDTH}"'
+
+
+def _thumbnail_key(artifact_id):
+    return f"{artifact_id}-w{THUMBNAIL_WIDTH}"
+
+
+def get_thumbnail(artifact_id):
+    """Path of the cached thumbnail for a PDF artifact, or None"""
+    if not ARTIFACT_ID.match(artifact_id or ""):
+        return None
+    _stores()
+    path = _thumbs.path_for(_thumbnail_key(artifact_id))
+    return path if path.exists() else None
+
+
+def ensure_thumbnail(artifact_id):
+    """
+    Render page 1 of a stored PDF to PNG unless it is already cached. Safe to
+    call from several requests or workers at once; returns the path or None
+    when the artifact is not a PDF or rendering fails (e.g. poppler missing).
+    """
+    found = get_artifact(artifact_id)
+    if found is None or found[1]["media_type"] != "application/pdf":
+        return None
+    pdf_path, _ = found
+    key = _thumbnail_key(artifact_id)
+    with _thumbs.lock(key):
+        path = _thumbs.path_for(key)
+        if path.exists():
+            THUMBNAILS.inc(outcome="cached")
+            return path
+        try:
+            from pdf2image import convert_from_path
+            pages = convert_from_path(str(pdf_path), first_page=1, last_page=1, size=(THUMBNAIL_WIDTH, None))
+            buffer = io.BytesIO()
+            pages[0].save(buffer, "PNG", optimize=True)
+        except Exception as e:
+            THUMBNAILS.inc(outcome="failed")
+            print(f"⚠ Thumbnail rendering failed for {artifact_id[:12]}: {e}")
+            return None
+        _thumbs.put_bytes(key, buffer.getvalue())
+        THUMBNAILS.inc(outcome="rendered")
+        return path
+
+
+def etag_for(artifact_id):
+    return f'"{artifact_id}"'
+
+
+def etag_matches(header, etag):
+    """If-None-Match comparison (weak comparison, as RFC 9110 requires for it)"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [c.strip() for c in header.split(",")]
+    return any(c == etag or c == "W/" + etag for c in candidates)
+
+
+def parse_range(header, size):
+    """
+    Single byte range from a Range header as (start, end) inclusive.
+    Returns None to serve the whole file (absent, malformed or multi-range
+    headers) and raises ValueError when the range cannot be satisfied.
+    """
+    if not header:
+        return None
+    match = RANGE_HEADER.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("range not satisfiable")
+    return start, min(end, size - 1)
+
+
+def read_range(path, start, end):
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start + 1)
@@ -0,0 +1,69 @@
+"""
+Tracks in-flight pipeline jobs and the worker's draining state.
+
+When uvicorn receives SIGTERM/SIGINT (directly, from its process manager
+or from a gunicorn master), install_exit_hook() flips the tracker into
+draining mode before the server stops accepting: new /process/ and
+/preview/ requests get 503 and /ready reports "draining" so the load
+balancer stops routing here. The real shutdown is held back for
+SHUTDOWN_DRAIN_NOTICE seconds to give the balancer time to notice; after
+that uvicorn closes the listener and waits for open requests itself
+(timeout_graceful_shutdown / gunicorn's graceful_timeout). A second
+signal shuts down at once.
+"""
+import signal
+import threading
+from contextlib import asynccontextmanager
+
+
+class InflightTracker:
+    def __init__(self):
+        self._count = 0
+        self.draining = False
+
+    @property
+    def count(self):
+        return self._count
+
+    @asynccontextmanager
+    async def track(self):
+        self._count += 1
+        try:
+            yield
+        finally:
+            self._count -= 1
+
+
+def install_exit_hook(tracker, notice):
+    """
+    Wrap uvicorn's Server.handle_exit so the first exit signal sets
+    tracker.draining and delays the shutdown by `notice` seconds. Returns
+    False when uvicorn is not importable (e.g. bulk CLI, benchmarks).
+    """
+    try:
+        from uvicorn.server import Server
+    except ImportError:
+        return False
+    original = getattr(Server.handle_exit, "__wrapped_exit__", Server.handle_exit)
+
+    def handle_exit(self, sig, frame):
+        if tracker.draining or notice <= 0:
+            tracker.draining = True
+            return original(self, sig, frame)
+        tracker.draining = True
+        print(f"Draining: not ready, shutting down in {notice:.0f}s ({tracker.count} job(s) in flight)")
+        # handle_exit only sets flags the server loop polls, so firing it from a timer thread is safe
+        timer = threading.Timer(notice, original, (self, sig, frame))
+        timer.daemon = True
+        timer.start()
+
+    handle_exit.__wrapped_exit__ = original
+    Server.handle_exit = handle_exit
+
+    # Newer uvicorn registers its handlers before importing the app, so rewrap those too
+    if threading.current_thread() is threading.main_thread():
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            current = signal.getsignal(sig)
+            if getattr(current, "__func__", None) is original:
+                signal.signal(sig, lambda s, f, server=current.__self__: handle_exit(server, s, f))
+    return True
@@ -0,0 +1,435 @@
+"""
+Fast in-process LaTeX linter that runs before pdflatex.
+
+LLM-generated sources regularly contain unbalanced braces, unescaped special
+characters, leftover Jinja markers or unclosed list environments. Each of
+those costs a pdflatex spawn to discover. lint_latex() finds them in a single
+pass, repairs the common cases and reports anything it cannot fix so the
+caller can reject the source without compiling it.
+"""
+import re
+from pathlib import Path
+
+from utils.metrics import Counter
+
+LINT_RUNS = Counter(
+    "resume_latex_lint_total", "LaTeX lint runs by outcome", ["outcome"]
+)
+LINT_ISSUES = Counter(
+    "resume_latex_lint_issues_total", "LaTeX lint findings by kind and whether they were repaired", ["kind", "repaired"]
+)
+COMPILES_SAVED = Counter(
+    "resume_latex_lint_compiles_saved_total",
+    "pdflatex runs avoided (rejected up front) or rescued (repaired, then compiled)",
+    ["reason"]
+)
+
+TEMPLATE_FILE = Path(__file__).parent.parent / "templates" / "latex_template.tex"
+
+# Environments where & is an alignment character rather than text
+ALIGN_ENVS = {
+    "tabular", "tabular*", "tabularx", "longtable", "array", "align", "align*",
+    "alignat", "alignat*", "eqnarray", "eqnarray*", "matrix", "pmatrix", "bmatrix", "cases", "split",
+}
+MATH_ENVS = {
+    "math", "displaymath", "equation", "equation*", "align", "align*", "alignat", "alignat*",
+    "eqnarray", "eqnarray*", "gather", "gather*", "multline", "multline*",
+}
+LIST_ENVS = {"itemize", "enumerate", "description"}
+
+# Commands whose first N brace arguments are taken literally (URLs, labels, names)
+RAW_ARGUMENTS = {
+    "href": 1, "url": 1, "nolinkurl": 1, "includegraphics": 1, "input": 1, "include": 1,
+    "label": 1, "ref": 1, "pageref": 1, "usepackage": 1, "documentclass": 1, "hypersetup": 1,
+    "definecolor": 3, "color": 1, "textcolor": 1, "colorbox": 1, "urlstyle": 1, "pagestyle": 1,
+    "thispagestyle": 1, "newcommand": 2, "renewcommand": 2, "providecommand": 2, "setlength": 2,
+    "addtolength": 2, "fontfamily": 1, "begin": 1, "end": 1,
+}
+
+# Jinja leftovers: both the stock delimiters and the (( )) / ((% %)) ones used by our template
+JINJA_PATTERNS = [
+    re.compile(r"\{%-?\s*(?:if|elif|else|endif|for|endfor|set|block|endblock|macro|endmacro)\b.*?-?%\}"),
+    re.compile(r"\(\(\\?%-?\s*(?:if|elif|else|endif|for|endfor|set)\b.*?-?\\?%\)\)"),
+    re.compile(r"\{\{-?\s*[A-Za-z_][\w.]*\s*(?:\|[^{}]*?)?-?\}\}"),
+    re.compile(r"\(\(\s*[A-Za-z_][\w.]*\s*(?:\|[^()]*(?:\([^()]*\))?[^()]*)?\s*\)\)"),
+]
+
+# Kernel and common macros that never need a package
+BASE_MACROS = set("""
+documentclass usepackage begin end item section subsection subsubsection paragraph par newline
+newpage clearpage pagebreak linebreak nolinebreak noindent indent hspace vspace hfill vfill hskip vskip
+textbf textit texttt textsc textsf textrm textup textsl emph underline bf it tt sc sf rm em small
+footnotesize scriptsize tiny large Large LARGE huge Huge normalsize selectfont fontfamily fontsize
+newcommand renewcommand providecommand def let edef gdef relax makeatletter makeatother
+setlength addtolength setcounter addtocounter stepcounter value the arabic roman Roman alph Alph
+textwidth textheight linewidth columnwidth paperwidth paperheight parindent parskip baselineskip
+tabcolsep arraystretch extracolsep fboxsep fboxrule dimexpr numexpr relax fill hline cline
+centering raggedright raggedleft raggedbottom flushbottom pagestyle thispagestyle
+labelitemi labelitemii labelitemiii labelitemiv textbullet textendash textemdash textbackslash
+textasciitilde textasciicircum textbar textless textgreater textquoteleft textquoteright
+ldots dots cdots vdots ddots quad qquad enspace thinspace negthinspace smallskip medskip bigskip
+today LaTeX TeX maketitle title author date and thanks label ref pageref cite footnote
+mbox makebox fbox framebox parbox raisebox rule strut phantom hphantom vphantom
+circ bullet cdot times pm mp leq geq neq approx sim infty rightarrow leftarrow Rightarrow
+alpha beta gamma delta epsilon lambda mu pi sigma theta omega
+frac sqrt sum prod int lim log exp sin cos tan max min left right big Big
+input include includeonly nobreak allowbreak pagenumbering clubpenalty widowpenalty
+euro pounds copyright S P dag ddag ss ae AE o O aa AA l L i j
+""".split())
+
+# Macros provided by packages the templates load
+PACKAGE_MACROS = {
+    "hyperref": {"href", "url", "nolinkurl", "hypersetup", "hyperlink", "hypertarget", "autoref", "texorpdfstring"},
+    "url": {"url", "urlstyle", "path"},
+    "graphicx": {"includegraphics", "graphicspath", "scalebox", "resizebox", "rotatebox"},
+    "booktabs": {"toprule", "midrule", "bottomrule", "cmidrule", "addlinespace"},
+    "xcolor": {"color", "textcolor", "colorbox", "fcolorbox", "definecolor", "pagecolor"},
+    "color": {"color", "textcolor", "colorbox", "fcolorbox", "definecolor", "pagecolor"},
+    "geometry": {"geometry", "newgeometry", "restoregeometry"},
+    "enumitem": {"setlist"},
+    "fontawesome": {"faEnvelope", "faPhone", "faLinkedin", "faGithub", "faGlobe", "faMapMarker"},
+    "eurosym": {"euro"},
+    "tabularx": set(),
+    "palatino": set(),
+    "fontenc": set(),
+    "inputenc": set(),
+}
+
+USEPACKAGE = re.compile(r"\\usepackage(?:\[[^\]]*\])?\{([^}]*)\}")
+DEFINITION = re.compile(
+    r"\\(?:(?:re)?newcommand|providecommand|DeclareRobustCommand)\*?\s*\{?\\([A-Za-z@]+)"
+    r"|\\(?:def|let|gdef|edef)\s*\\([A-Za-z@]+)"
+)
+
+
+def known_macros_for(preamble):
+    """Macros available to a document with the given preamble"""
+    known = set(BASE_MACROS)
+    for match in USEPACKAGE.finditer(preamble):
+        for package in match.group(1).split(","):
+            known |= PACKAGE_MACROS.get(package.strip(), set())
+    for match in DEFINITION.finditer(preamble):
+        known.add(match.group(1) or match.group(2))
+    return known
+
+
+def template_macros():
+    """Macros defined or loaded by templates/latex_template.tex"""
+    try:
+        text = TEMPLATE_FILE.read_text(encoding="utf-8")
+    except OSError:
+        return set(BASE_MACROS)
+    return known_macros_for(text.split("\\begin{document}")[0])
+
+
+def _line_of(source, pos):
+    return source.count("\n", 0, pos) + 1
+
+
+def _matching_brace(source, i):
+    """Index of the brace closing the group opened at i, or None (stops at a paragraph break)"""
+    depth = 0
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+        elif c == "\n" and source.startswith("\n\n", i):
+            return None
+        i += 1
+    return None
+
+
+def _skip_raw_groups(source, pos, count):
+    """
+    Position after the `count` literal brace arguments that follow a command at pos.
+    Optional [..] arguments are skipped; returns pos when the arguments are malformed.
+    """
+    n = len(source)
+    i = pos
+    for k in range(count):
+        while True:
+            while i < n and source[i] in " \t*":
+                i += 1
+            if i < n and source[i] == "[":
+                close = source.find("]", i)
+                if close == -1:
+                    return pos
+                i = close + 1
+                continue
+            break
+        if k == 0 and source.startswith("\\", i):
+            # \newcommand\foo{...}: the first argument is an unbraced name
+            match = re.match(r"\\[A-Za-z@]+", source[i:i + 64])
+            if match:
+                i += match.end()
+                continue
+        if i >= n or source[i] != "{":
+            return i
+        close = _matching_brace(source, i)
+        if close is None:
+            return pos
+        i = close + 1
+    return i
+
+
+def _is_jinja(text):
+    """Distinguish {{ name }} / {{x|default('')}} from legitimate LaTeX such as {{Foo}}"""
+    inner = text[2:-2]
+    return inner[:1].isspace() or "|" in inner or "." in inner.strip(" -")
+
+
+def _strip_jinja(source, issues):
+    for pattern in JINJA_PATTERNS:
+        def repl(match):
+            text = match.group(0)
+            if text[:2] in ("{{", "((") and text[2:3] != "\\" and not _is_jinja(text):
+                return text
+            issues.append({
+                "kind": "jinja_marker",
+                "line": _line_of(source, match.start()),
+                "message": f"Stray template marker {match.group(0)[:40]!r}",
+                "repaired": True,
+                "fatal": True,
+            })
+            return ""
+        source = pattern.sub(repl, source)
+    return source
+
+
+class _Scanner:
+    """Single pass over the source collecting position-based edits"""
+
+    def __init__(self, source):
+        self.src = source
+        self.edits = []  # (start, end, replacement)
+        self.issues = []
+        self.macros = {}  # name -> first line used
+
+    def issue(self, kind, pos, message, repaired, fatal=True):
+        self.issues.append({
+            "kind": kind,
+            "line": _line_of(self.src, pos),
+            "message": message,
+            "repaired": repaired,
+            "fatal": fatal,
+        })
+
+    def edit(self, start, end, replacement):
+        self.edits.append((start, end, replacement))
+
+    def run(self):
+        src = self.src
+        n = len(src)
+        body_start = src.find("\\begin{document}")
+        braces = []          # positions of unmatched "{"
+        envs = []            # [name, begin_pos, item_seen, begin_token_end]
+        math_open = None     # position of an unclosed inline "$"
+        document_closed = False
+        i = 0
+        while i < n:
+            c = src[i]
+            in_body = body_start != -1 and i > body_start
+            in_math = math_open is not None or any(e[0] in MATH_ENVS for e in envs)
+
+            if c == "\\":
+                match = re.match(r"\\([A-Za-z@]+)\*?", src[i:i + 64])
+                if not match:
+                    i += 2  # control symbol such as \% \& \{ \\
+                    continue
+                name = match.group(1)
+                end = i + match.end()
+                self.macros.setdefault(name, i)
+
+                if name in ("begin", "end"):
+                    env_match = re.match(r"\s*\{([^{}\s]+)\}", src[end:end + 64])
+                    if env_match:
+                        env = env_match.group(1)
+                        token_end = end + env_match.end()
+                        if name == "begin":
+                            envs.append([env, i, False, token_end])
+                        else:
+                            document_closed = self._close_env(env, i, token_end, envs) or document_closed
+                        i = token_end
+                        continue
+                if name == "item" and envs:
+                    for e in reversed(envs):
+                        if e[0] in LIST_ENVS:
+                            e[2] = True
+                            break
+                if name in RAW_ARGUMENTS:
+                    raw_end = _skip_raw_groups(src, end, RAW_ARGUMENTS[name])
+                    if raw_end > end:
+                        i = raw_end
+                        continue
+                i = end
+                continue
+
+            if c == "%":
+                prev = src[i - 1] if i > 0 else ""
+                if in_body and prev.isdigit():
+                    # "40%" written as text would comment out the rest of the line
+                    self.edit(i, i + 1, "\\%")
+                    self.issue("unescaped_percent", i, "Unescaped % after a number", True, fatal=False)
+                    i += 1
+                    continue
+                newline = src.find("\n", i)
+                i = n if newline == -1 else newline
+                continue
+
+            if c == "{":
+                braces.append(i)
+            elif c == "}":
+                if braces:
+                    braces.pop()
+                else:
+                    self.edit(i, i + 1, "")
+                    self.issue("unbalanced_brace", i, "Closing brace without a matching opening brace", True)
+            elif c == "$":
+                if in_body:
+                    if src[i:i + 2] == "$$":
+                        i += 2
+                        continue
+                    math_open = None if math_open is not None else i
+            elif c == "\n" and math_open is not None:
+                # Generated resumes never wrap inline math: an unclosed "$" is a currency sign
+                self.edit(math_open, math_open + 1, "\\$")
+                self.issue("unescaped_dollar", math_open, "Unmatched $ (treated as a dollar sign)", True)
+                math_open = None
+            elif in_body and not in_math:
+                if c == "&" and not any(e[0] in ALIGN_ENVS for e in envs):
+                    self.edit(i, i + 1, "\\&")
+                    self.issue("unescaped_ampersand", i, "Unescaped & outside a table", True)
+                elif c == "_":
+                    self.edit(i, i + 1, "\\_")
+                    self.issue("unescaped_underscore", i, "Unescaped _ outside math mode", True)
+                elif c == "#":
+                    self.edit(i, i + 1, "\\#")
+                    self.issue("unescaped_hash", i, "Unescaped # in text", True)
+                elif c == "^":
+                    self.edit(i, i + 1, "\\^{}")
+                    self.issue("unescaped_caret", i, "Unescaped ^ outside math mode", True)
+            i += 1
+
+        if math_open is not None:
+            self.edit(math_open, math_open + 1, "\\$")
+            self.issue("unescaped_dollar", math_open, "Unmatched $ (treated as a dollar sign)", True)
+
+        self._close_braces(braces, body_start)
+        if body_start == -1:
+            self.issue("missing_document", 0, "No \\begin{document} found", False)
+        elif not document_closed:
+            tail = "".join(f"\\end{{{e[0]}}}\n" for e in reversed(envs) if e[0] != "document")
+            self.edit(n, n, ("\n" if not src.endswith("\n") else "") + tail + "\\end{document}\n")
+            self.issue("unclosed_environment", n, "Missing \\end{document}", True)
+
+    def _close_env(self, env, pos, token_end, envs):
+        """Handle \\end{env}; returns True when it closes the document"""
+        names = [e[0] for e in envs]
+        if env not in names:
+            self.edit(pos, token_end, "")
+            self.issue("unbalanced_environment", pos, f"\\end{{{env}}} without a matching \\begin", True)
+            return False
+        # Auto-close anything still open inside this environment
+        while envs[-1][0] != env:
+            inner = envs.pop()
+            self.edit(pos, pos, f"\\end{{{inner[0]}}}\n")
+            self.issue("unclosed_environment", inner[1], f"\\begin{{{inner[0]}}} was never closed", True)
+        closed = envs.pop()
+        if closed[0] in LIST_ENVS and not closed[2]:
+            # A list without its own \item is a hard error ("perhaps a missing \item")
+            if "\\item" in self.src[closed[3]:pos]:
+                # Only nested lists have items: give the outer list an empty-label item
+                self.edit(closed[3], closed[3], "\\item[]")
+                self.issue("empty_list", closed[1], f"{closed[0]} without a direct \\item", True)
+            else:
+                self.edits = [e for e in self.edits if not (closed[1] <= e[0] and e[1] <= token_end)]
+                self.edit(closed[1], token_end, "")
+                self.issue("empty_list", closed[1], f"Empty {closed[0]} environment removed", True)
+        return env == "document"
+
+    def _close_braces(self, braces, body_start):
+        src = self.src
+        for pos in braces:
+            if body_start != -1 and pos > body_start:
+                newline = src.find("\n", pos)
+                at = len(src) if newline == -1 else newline
+                end_doc = src.find("\\end{document}", pos)
+                if end_doc != -1 and end_doc < at:
+                    at = end_doc
+                self.edit(at, at, "}")
+                self.issue("unbalanced_brace", pos, "Opening brace never closed", True)
+            else:
+                self.issue("unbalanced_brace", pos, "Opening brace in the preamble never closed", False)
+
+    def apply(self):
+        out = self.src
+        for start, end, replacement in sorted(self.edits, key=lambda e: (e[0], e[1]), reverse=True):
+            out = out[:start] + replacement + out[end:]
+        return out
+
+
+def lint_latex(source, known_macros=None):
+    """
+    Lint and repair a LaTeX document.
+
+    Returns a dict with:
+      source          the repaired source
+      issues          findings: kind, line, message, repaired, fatal
+      unknown_macros  macros used but neither defined nor provided by a loaded package
+      repaired        True if the source was changed
+      ok              False if fatal problems remain and the source should not be compiled
+    """
+    issues = []
+    cleaned = _strip_jinja(source, issues)
+
+    scanner = _Scanner(cleaned)
+    scanner.run()
+    issues.extend(scanner.issues)
+    repaired_source = scanner.apply()
+
+    preamble = repaired_source.split("\\begin{document}")[0]
+    known = set(known_macros) if known_macros is not None else template_macros()
+    known |= known_macros_for(preamble)
+    unknown = sorted(name for name in scanner.macros if name not in known)
+    for name in unknown:
+        issues.append({
+            "kind": "unknown_macro",
+            "line": _line_of(cleaned, scanner.macros[name]),
+            "message": f"\\{name} is not defined by the preamble or a loaded package",
+            "repaired": False,
+            "fatal": False,
+        })
+
+    ok = not any(i["fatal"] and not i["repaired"] for i in issues)
+    repaired = repaired_source != source
+
+    for issue in issues:
+        LINT_ISSUES.inc(kind=issue["kind"], repaired=str(issue["repaired"]).lower())
+    LINT_RUNS.inc(outcome="rejected" if not ok else ("repaired" if repaired else "clean"))
+    if not ok:
+        COMPILES_SAVED.inc(reason="rejected")
+
+    return {
+        "source": repaired_source,
+        "issues": issues,
+        "unknown_macros": unknown,
+        "repaired": repaired,
+        "ok": ok,
+    }
+
+
+def had_fatal_repairs(report):
+    """True when the linter fixed something that would have made pdflatex fail"""
+    return any(i["fatal"] and i["repaired"] for i in report["issues"])
+
+
+def record_rescued_compile():
+    COMPILES_SAVED.inc(reason="repaired")
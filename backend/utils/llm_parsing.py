@@ -0,0 +1,146 @@
+"""
+Parsing structured output out of LLM responses.
+
+Gemini wraps JSON in code fences, prefixes it with prose or appends an
+explanation. find_json_object() walks the text once, tracking brace depth
+and JSON strings (so braces inside values do not count), and parses the
+first balanced object that is valid JSON; orjson is used when installed.
+Failures raise LLMResponseError and are counted per kind, so a model
+that stops returning usable output shows up on /metrics instead of as
+quietly degraded resumes.
+"""
+import json
+import re
+
+from utils.metrics import Counter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LLM_PARSE = Counter(
+    "resume_llm_parse_total",
+    "LLM responses by kind and parse outcome (direct, extracted, fenced, failed, invalid)",
+    ["kind", "outcome"]
+)
+
+FENCE = re.compile(r"```[ \t]*([A-Za-z0-9_+-]*)[ \t]*\r?\n(.*?)(?:\r?\n)?```", re.DOTALL)
+# Restarts allowed after an unbalanced "{" in leading prose
+MAX_RESCANS = 3
+
+
+class LLMResponseError(ValueError):
+    """Raised when an LLM response does not contain the expected structure"""
+    def __init__(self, message, kind="", snippet=""):
+        super().__init__(message)
+        self.kind = kind
+        self.snippet = snippet
+
+
+def loads(text):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _scan(text, start):
+    """
+    (first, end) of each balanced top-level {...} from `start`, in order.
+    Yields (first, None) when the text ends inside an object.
+    """
+    depth = 0
+    first = -1
+    in_string = False
+    escaped = False
+    for pos in range(start, len(text)):
+        ch = text[pos]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == "{":
+            if depth == 0:
+                first = pos
+            depth += 1
+        elif depth == 0:
+            # Quotes and closing braces in prose outside an object are not JSON
+            continue
+        elif ch == '"':
+            in_string = True
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                yield first, pos + 1
+    if depth > 0:
+        yield first, None
+
+
+def find_json_object(text):
+    """
+    The first JSON object embedded in `text`, parsed, or None. Linear in the
+    text length: each candidate is parsed once and scanning resumes after it.
+    """
+    text = text or ""
+    start = 0
+    for _ in range(MAX_RESCANS + 1):
+        unbalanced = None
+        for first, end in _scan(text, start):
+            if end is None:
+                unbalanced = first
+                break
+            try:
+                value = loads(text[first:end])
+            except ValueError:
+                continue
+            if isinstance(value, dict):
+                return value
+        if unbalanced is None:
+            return None
+        # A stray "{" (prose, a truncated attempt) swallowed the rest: look past it
+        start = unbalanced + 1
+    return None
+
+
+def extract_json(text, kind):
+    """Parse the JSON object an LLM returned for `kind`; raises LLMResponseError"""
+    stripped = (text or "").strip()
+    if stripped.startswith("{"):
+        try:
+            value = loads(stripped)
+            if isinstance(value, dict):
+                LLM_PARSE.inc(kind=kind, outcome="direct")
+                return value
+        except ValueError:
+            pass
+    value = find_json_object(stripped)
+    if value is None:
+        LLM_PARSE.inc(kind=kind, outcome="failed")
+        raise LLMResponseError(f"No JSON object in {kind} response", kind=kind, snippet=stripped[:200])
+    LLM_PARSE.inc(kind=kind, outcome="extracted")
+    return value
+
+
+def strip_code_fence(text, kind):
+    """
+    Body of the first fenced block when the response has one, else the
+    stripped text. Raises LLMResponseError when nothing is left.
+    """
+    stripped = (text or "").strip()
+    match = FENCE.search(stripped)
+    if match:
+        body = match.group(2).strip()
+        outcome = "fenced"
+    else:
+        # An unterminated fence (truncated response) still starts with ```lang
+        body = re.sub(r"^```[ \t]*[A-Za-z0-9_+-]*[ \t]*\r?\n?", "", stripped).strip()
+        body = re.sub(r"```$", "", body).strip()
+        outcome = "direct"
+    if not body:
+        LLM_PARSE.inc(kind=kind, outcome="failed")
+        raise LLMResponseError(f"Empty {kind} response", kind=kind, snippet=stripped[:200])
+    LLM_PARSE.inc(kind=kind, outcome=outcome)
+    return body
@@ -1,230 +1,227 @@
 import subprocess
+import threading
+from collections import deque
 from pathlib import Path
 import os
 import re
+import time
+from utils.metrics import stage
 
-def tex_to_pdf(tex_path, output_dir):
+# Compilation can take longer on some systems
+LATEX_TIMEOUT = int(os.getenv("LATEX_TIMEOUT", "120"))  # seconds
+
+# Lines of pdflatex output kept for the error excerpt
+LOG_TAIL_LINES = 60
+
+# With -file-line-error, errors look like "./resume.tex:42: Undefined control sequence."
+FILE_LINE_ERROR = re.compile(r'^(?:\./)?[^:\s]+\.tex:(\d+):\s*(.+)$')
+CONTEXT_LINE = re.compile(r'^l\.(\d+)\s?(.*)$')
+OUTPUT_WRITTEN = re.compile(r'Output written on .+? \((\d+) pages?')
+RERUN_HINTS = ('Rerun to get', 'Label(s) may have changed', 'rerunfilecheck')
+
+
+class LatexCompileError(Exception):
+    """
+    First fatal error reported by pdflatex, with the source line it points at
     """
-    Compile LaTeX to PDF in Colab environment with enhanced debugging
+    def __init__(self, message, line=None, snippet="", context="", log_excerpt=None, timed_out=False):
+        super().__init__(message)
+        self.message = message
+        self.line = line
+        self.snippet = snippet
+        self.context = context
+        self.log_excerpt = log_excerpt
+        self.timed_out = timed_out
+
+    def to_dict(self):
+        return {
+            "message": self.message,
+            "line": self.line,
+            "snippet": self.snippet,
+            "context": self.context,
+            "log_excerpt": str(self.log_excerpt) if self.log_excerpt else None,
+            "timed_out": self.timed_out,
+        }
+
+    def __str__(self):
+        if self.line:
+            return f"LaTeX compilation failed at line {self.line}: {self.message}"
+        return f"LaTeX compilation failed: {self.message}"
+
+
+def _run_pdflatex(cmd, cwd, timeout):
+    """
+    Run one pdflatex pass, consuming its output as a stream.
+    The first fatal error kills the process immediately instead of waiting for it to exit.
+    Returns (returncode, tail_lines, error_dict or None, page_count or None, needs_rerun, timed_out).
     """
-    tex_path = Path(tex_path)
-    output_dir = Path(output_dir)
-    
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        stdin=subprocess.DEVNULL,
+        cwd=cwd,
+    )
+    timed_out = threading.Event()
+
+    def on_timeout():
+        timed_out.set()
+        proc.kill()
+
+    watchdog = threading.Timer(timeout, on_timeout)
+    watchdog.daemon = True
+    watchdog.start()
+
+    tail = deque(maxlen=LOG_TAIL_LINES)
+    error = None
+    context_lines = 0
+    pages = None
+    needs_rerun = False
+    try:
+        for raw in proc.stdout:
+            line = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+            tail.append(line)
+
+            if error is not None:
+                # Collect the "l.<n> ..." context that follows the error, then stop
+                match = CONTEXT_LINE.match(line)
+                if match:
+                    error['line'] = error['line'] or int(match.group(1))
+                    error['context'] = match.group(2)
+                    break
+                context_lines += 1
+                if context_lines > 6:
+                    break
+                continue
+
+            match = FILE_LINE_ERROR.match(line)
+            if match:
+                error = {'line': int(match.group(1)), 'message': match.group(2).strip(), 'context': ''}
+                continue
+            if line.startswith('!'):
+                error = {'line': None, 'message': line[1:].strip(), 'context': ''}
+                continue
+
+            match = OUTPUT_WRITTEN.search(line)
+            if match:
+                pages = int(match.group(1))
+            if any(hint in line for hint in RERUN_HINTS):
+                needs_rerun = True
+    finally:
+        if error is not None and proc.poll() is None:
+            proc.kill()
+        # Drain what is left so the pipe never blocks the child, then reap it
+        try:
+            proc.stdout.close()
+        except Exception:
+            pass
+        returncode = proc.wait()
+        watchdog.cancel()
+
+    return returncode, list(tail), error, pages, needs_rerun, timed_out.is_set()
+
+
+def _write_excerpt(excerpt_path, tex_path, error, tail):
+    """Write the single debugging artifact for a failed compile"""
+    with open(excerpt_path, 'w', encoding='utf-8') as f:
+        f.write(f"LaTeX source: {tex_path}\n")
+        if error:
+            f.write(f"Error: {error.get('message')}\n")
+            f.write(f"Line: {error.get('line')}\n")
+            if error.get('snippet'):
+                f.write(f"Source: {error['snippet']}\n")
+            if error.get('context'):
+                f.write(f"Context: {error['context']}\n")
+        f.write("\n" + "=" * 70 + "\n")
+        f.write(f"LAST {len(tail)} LINES OF PDFLATEX OUTPUT:\n")
+        f.write('\n'.join(tail))
+        f.write('\n')
+
+
+def compile_latex(tex_path, output_dir, timeout=LATEX_TIMEOUT):
+    """
+    Compile a .tex file with pdflatex and return details of the run:
+    {"pdf_path", "pages", "passes", "seconds"}. Raises LatexCompileError on failure.
+    """
+    # pdflatex runs with cwd=output_dir, so relative paths would be resolved twice
+    tex_path = Path(tex_path).resolve()
+    output_dir = Path(output_dir).resolve()
+
     # Ensure paths exist
     if not tex_path.exists():
         raise FileNotFoundError(f"TeX file not found: {tex_path}")
-    
+
     output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Read the .tex file to check for obvious issues
-    print(f"\n📄 Reading LaTeX file: {tex_path}")
-    try:
-        with open(tex_path, 'r', encoding='utf-8') as f:
-            tex_content = f.read()
-        print(f"  Size: {len(tex_content)} bytes")
-        print(f"  Lines: {len(tex_content.splitlines())}")
-        
-        # Check for common issues
-        if '{{' in tex_content and ('|default' in tex_content or '}}' in tex_content):
-            print("  ⚠ WARNING: Found unprocessed Jinja2 syntax!")
-            print("  This means the template wasn't rendered correctly")
-            # Fail fast: don't attempt LaTeX compilation when template markers remain
-            raise Exception("TeX template appears unrendered (Jinja2 markers present). Aborting LaTeX compile.")
-
-        # Show first few lines for debugging
-        lines = tex_content.splitlines()
-        print("\n  First 10 lines:")
-        for i, line in enumerate(lines[:10], 1):
-            print(f"    {i:2}: {line[:80]}")
-        
-    except Exception as e:
-        print(f"  ✗ Error reading file: {e}")
-    
-    # Run pdflatex with proper settings for Colab
+
+    with open(tex_path, 'r', encoding='utf-8', errors='replace') as f:
+        source_lines = f.read().splitlines()
+    print(f"\n📄 Compiling {tex_path} ({len(source_lines)} lines)")
+
     cmd = [
         'pdflatex',
-        '-interaction=nonstopmode',  # Don't stop on errors
-        '-halt-on-error',  # But halt on critical errors
+        '-interaction=nonstopmode',  # Never wait for terminal input
+        '-halt-on-error',  # Stop at the first error
+        '-file-line-error',  # Report errors as file:line: message
         '-output-directory', str(output_dir),
         str(tex_path)
     ]
-    
-    print(f"\n🔨 Running pdflatex...")
-    print(f"  Command: {' '.join(cmd)}")
-    
-    try:
-        # First pass
-        # Increase timeout (compilation can take longer on some systems)
-        LATEX_TIMEOUT = 120  # seconds
-
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=LATEX_TIMEOUT,
-            cwd=str(output_dir)  # Run from output dir for relative resource resolution
-        )
-        
-        stdout_output = result.stdout.decode('utf-8', errors='ignore')
-        stderr_output = result.stderr.decode('utf-8', errors='ignore')
-        
-        # Check if compilation succeeded
-        if result.returncode != 0:
-            print(f"  ✗ First pass failed with return code {result.returncode}")
-            raise subprocess.CalledProcessError(result.returncode, cmd, stdout_output, stderr_output)
-        
-        print(f"  ✓ First pass completed")
-        
-        # Second pass for references (optional, ignore errors)
-        print(f"  Running second pass...")
-        subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=LATEX_TIMEOUT,
-            cwd=str(output_dir)
-        )
-        
-        # Find the generated PDF
-        pdf_name = tex_path.stem + '.pdf'
-        pdf_path = output_dir / pdf_name
-        
-        if not pdf_path.exists():
-            raise FileNotFoundError(f"PDF not generated at: {pdf_path}")
-        
-        print(f"  ✓ PDF generated: {pdf_path}")
-        print(f"  Size: {pdf_path.stat().st_size} bytes")
-        
-        return pdf_path
-        
-    except subprocess.CalledProcessError as e:
-        # Detailed error reporting
-        print("\n" + "=" * 70)
-        print("❌ LATEX COMPILATION ERROR")
-        print("=" * 70)
-        
-        stderr_output = e.stderr if isinstance(e.stderr, str) else e.stderr.decode('utf-8', errors='ignore')
-        stdout_output = e.stdout if isinstance(e.stdout, str) else e.stdout.decode('utf-8', errors='ignore')
-        
-        # Parse stdout for actual LaTeX errors
-        errors = []
-        warnings = []
-        
-        for line in stdout_output.splitlines():
-            if line.startswith('!'):
-                errors.append(line)
-            elif 'Error' in line or 'error' in line:
-                errors.append(line)
-            elif 'Warning' in line and 'Font' not in line:
-                warnings.append(line)
-        
-        if errors:
-            print("\n🔴 LaTeX Errors Found:")
-            print("-" * 70)
-            for error in errors[:10]:  # Show first 10 errors
-                print(f"  {error}")
-        
-        if warnings:
-            print("\n⚠️  Warnings:")
-            print("-" * 70)
-            for warning in warnings[:5]:  # Show first 5 warnings
-                print(f"  {warning}")
-        
-        # Save captured stdout/stderr to files for easier inspection
-        stdout_log = output_dir / (tex_path.stem + '.pdflatex.stdout.log')
-        stderr_log = output_dir / (tex_path.stem + '.pdflatex.stderr.log')
-        with open(stdout_log, 'w', encoding='utf-8') as f:
-            f.write(stdout_output)
-        with open(stderr_log, 'w', encoding='utf-8') as f:
-            f.write(stderr_output)
-
-        # Check log file for detailed error info
-        log_file = output_dir / (tex_path.stem + '.log')
-
-        # Ensure we always have a path for the excerpt (avoid NameError later)
-        log_excerpt_file = output_dir / 'latex_error_excerpt.log'
-
-        if log_file.exists():
-            print("\n" + "=" * 70)
-            print("📋 LOG FILE ANALYSIS")
-            print("=" * 70)
-            
-            with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                log_content = f.read()
-            
-            # Extract key error information
-            error_patterns = [
-                r'! (.+)',  # Error lines starting with !
-                r'l\.(\d+) (.+)',  # Line number references
-                r'LaTeX Error: (.+)',
-                r'Missing (.+)',
-                r'Undefined (.+)'
-            ]
-            
-            found_errors = []
-            for pattern in error_patterns:
-                matches = re.findall(pattern, log_content, re.MULTILINE)
-                found_errors.extend(matches)
-            
-            if found_errors:
-                print("\n🎯 Key Issues:")
-                print("-" * 70)
-                for i, error in enumerate(found_errors[:15], 1):  # Show top 15
-                    error_str = error if isinstance(error, str) else ' '.join(str(x) for x in error)
-                    print(f"  {i}. {error_str[:100]}")
-            
-            # Check for specific common issues
-            if 'Undefined control sequence' in log_content:
-                print("\n💡 Possible cause: Undefined LaTeX command")
-                print("   Check for special characters that weren't properly escaped")
-            
-            if 'Missing } inserted' in log_content:
-                print("\n💡 Possible cause: Unmatched braces in template")
-                print("   Check Jinja2 template syntax")
-            
-            if 'Font' in log_content and 'not found' in log_content:
-                print("\n💡 Possible cause: Missing font package")
-                print("   Try installing additional LaTeX packages")
-            
-            # Save log excerpt for manual inspection
-            with open(log_excerpt_file, 'w', encoding='utf-8') as f:
-                f.write("LAST 100 LINES OF LOG:\n")
-                f.write("=" * 70 + "\n")
-                f.write('\n'.join(log_content.splitlines()[-100:]))
-        else:
-            # If no .log file, write a short note to the excerpt file to aid debugging
-            with open(log_excerpt_file, 'w', encoding='utf-8') as f:
-                f.write("No TeX .log file found. Check pdflatex stdout/stderr logs for details.\n")
-            
-        print(f"\n📄 Full log excerpt saved to: {log_excerpt_file}")
-        print(f"\n📄 pdflatex stdout: {stdout_log}")
-        print(f"📄 pdflatex stderr: {stderr_log}")
-
-        # Print the problematic .tex file location
-        print("\n" + "=" * 70)
-        print(f"📁 Files for debugging:")
-        print(f"   LaTeX source: {tex_path}")
-        print(f"   Log file: {log_file}")
-        print(f"   Working directory: {output_dir}")
-        print("=" * 70)
-
-        # Create a simplified test
-        print("\n🧪 Debugging tip:")
-        print(f"   Run manually: cd {output_dir} && pdflatex {tex_path.name}")
-        print("   This will show interactive error messages")
-
-        raise Exception(
-            f"LaTeX compilation failed.\n"
-            f"Check files:\n"
-            f"  - {log_file}\n"
-            f"  - {stdout_log}\n"
-            f"  - {stderr_log}\n"
-            f"  - {tex_path}\n"
-            f"Run 'cd {output_dir} && pdflatex {tex_path.name}' for interactive debugging"
-        )
-    
-    except subprocess.TimeoutExpired:
-        raise Exception("LaTeX compilation timed out (increase timeout or check LaTeX logs).")
-    except Exception as e:
-        print(f"\n❌ Unexpected error: {type(e).__name__}: {e}")
-        raise
\ No newline at end of file
+
+    start = time.perf_counter()
+    passes = 0
+    pages = None
+    # A second pass is only needed when the first one asks for it (references, outlines)
+    for _ in range(2):
+        passes += 1
+        try:
+            with stage("compile"):
+                returncode, tail, error, pass_pages, needs_rerun, timed_out = _run_pdflatex(
+                    cmd, str(output_dir), timeout
+                )
+        except FileNotFoundError:
+            raise LatexCompileError("pdflatex is not installed or not on PATH")
+        pages = pass_pages or pages
+
+        if timed_out or error is not None or returncode != 0:
+            if timed_out:
+                error = {'line': None, 'message': f"pdflatex timed out after {timeout}s", 'context': ''}
+            elif error is None:
+                error = {'line': None, 'message': f"pdflatex exited with code {returncode}", 'context': ''}
+            line_no = error.get('line')
+            if line_no and 0 < line_no <= len(source_lines):
+                error['snippet'] = source_lines[line_no - 1].strip()[:200]
+
+            excerpt_path = output_dir / 'latex_error_excerpt.log'
+            _write_excerpt(excerpt_path, tex_path, error, tail)
+            print(f"  ✗ pdflatex failed (pass {passes}) at line {line_no}: {error['message']}")
+            if error.get('snippet'):
+                print(f"    {error['snippet']}")
+            print(f"  📄 Log excerpt: {excerpt_path}")
+            raise LatexCompileError(
+                error['message'],
+                line=line_no,
+                snippet=error.get('snippet', ''),
+                context=error.get('context', ''),
+                log_excerpt=excerpt_path,
+                timed_out=timed_out,
+            )
+
+        if not needs_rerun:
+            break
+
+    # Find the generated PDF
+    pdf_path = output_dir / (tex_path.stem + '.pdf')
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"PDF not generated at: {pdf_path}")
+
+    seconds = time.perf_counter() - start
+    print(f"  ✓ PDF generated: {pdf_path} ({pdf_path.stat().st_size} bytes, "
+          f"{pages or '?'} page(s), {passes} pass(es), {seconds:.2f}s)")
+
+    return {"pdf_path": pdf_path, "pages": pages, "passes": passes, "seconds": seconds}
+
+
+def tex_to_pdf(tex_path, output_dir):
+    """
+    Compile LaTeX to PDF and return the path of the generated PDF
+    """
+    return compile_latex(tex_path, output_dir)["pdf_path"]
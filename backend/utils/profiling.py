@@ -0,0 +1,175 @@
+"""
+Opt-in sampling profiler for single /process/ requests.
+
+A profiled request gets a background thread that snapshots the Python
+stack of every thread (sys._current_frames()) at a fixed interval while
+the pipeline runs. That covers the event loop (including time parked in
+select() while waiting on crawls, Gemini and pdflatex), the to_thread
+workers doing PDF extraction, escaping and templating, and anything
+else in the process. Idle thread-pool workers are skipped.
+
+Profiling is enabled per request by sending X-Profile: <PROFILE_TOKEN>,
+or for a random PROFILE_SAMPLE_RATE fraction of requests. The profile is
+written to the request's workspace, which is then kept until the janitor
+ages it out:
+
+    profile.folded   one "thread;frame;frame... count" line per stack, for
+                     flamegraph.pl, speedscope or inferno
+    profile.json     sample count, interval, per-thread totals and the
+                     functions with the most self time
+
+Samples are process-wide, so requests running alongside a profiled one
+show up in its profile too. Unprofiled requests only pay for a header
+lookup and one random() call.
+"""
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter as Tally
+from contextlib import contextmanager
+
+from utils.metrics import Counter
+
+# Shared secret for the X-Profile header; profiling on demand is disabled while empty
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# Fraction of /process/ requests profiled without the header (0 disables sampling)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000.0
+PROFILE_MAX_DEPTH = int(os.getenv("PROFILE_MAX_DEPTH", "96"))
+PROFILE_HEADER = "x-profile"
+
+PROFILES = Counter(
+    "resume_profiles_total", "Profiled requests by trigger (header, sampled)", ["trigger"]
+)
+
+_CWD = os.path.abspath(os.getcwd())
+
+
+def requested(headers):
+    """'header', 'sampled' or None for a request's headers"""
+    value = headers.get(PROFILE_HEADER)
+    if value and PROFILE_TOKEN and hmac.compare_digest(value.encode(), PROFILE_TOKEN.encode()):
+        return "header"
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+def _frame_label(code):
+    path = code.co_filename
+    if path.startswith(_CWD + os.sep):
+        path = path[len(_CWD) + 1:]
+    else:
+        path = "/".join(path.replace("\\", "/").split("/")[-2:])
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def _is_idle_worker(frame):
+    code = frame.f_code
+    # ThreadPoolExecutor workers block in a C-level queue get inside _worker
+    return code.co_name == "_worker" and code.co_filename.endswith(os.path.join("concurrent", "futures", "thread.py"))
+
+
+class SamplingProfiler:
+    """Collects folded stacks of all threads until stop() is called"""
+
+    def __init__(self, interval=PROFILE_INTERVAL, max_depth=PROFILE_MAX_DEPTH):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Tally()
+        self.samples = 0
+        self.started = None
+        self.elapsed = 0.0
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(code)
+        return label
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or _is_idle_worker(frame):
+                    continue
+                labels = []
+                while frame is not None and len(labels) < self.max_depth:
+                    labels.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, top=25):
+        threads, leaves = Tally(), Tally()
+        for stack, count in self.stacks.items():
+            parts = stack.split(";")
+            threads[parts[0]] += count
+            leaves[parts[-1]] += count
+        total = sum(self.stacks.values()) or 1
+        return {
+            "samples": self.samples,
+            "interval_ms": round(self.interval * 1000.0, 2),
+            "duration_ms": round(self.elapsed * 1000.0, 1),
+            "threads": dict(threads.most_common()),
+            "top_self": [
+                {"frame": frame, "samples": count, "pct": round(100.0 * count / total, 1)}
+                for frame, count in leaves.most_common(top)
+            ],
+        }
+
+    def save(self, directory, **extra):
+        """Write profile.folded and profile.json into directory; returns the summary"""
+        summary = dict(self.summary(), **extra)
+        with open(os.path.join(directory, "profile.folded"), "w", encoding="utf-8") as f:
+            f.write(self.folded())
+        with open(os.path.join(directory, "profile.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+
+@contextmanager
+def profile_into(directory, trigger):
+    """
+    Profile the enclosed block and save the result into directory. Yields a
+    dict whose "id" names the profile (the directory's basename).
+    """
+    report = {"id": os.path.basename(os.path.normpath(directory))}
+    profiler = SamplingProfiler().start()
+    try:
+        yield report
+    finally:
+        profiler.stop()
+        try:
+            summary = profiler.save(directory, id=report["id"], trigger=trigger)
+            PROFILES.inc(trigger=trigger)
+            report.update(summary)
+            hottest = summary["top_self"][0]["frame"] if summary["top_self"] else "-"
+            print(f"✓ Profile {report['id']}: {summary['samples']} samples over {summary['duration_ms']}ms "
+                  f"in {directory} (hottest: {hottest})")
+        except OSError as e:
+            print(f"⚠ Could not save profile {report['id']}: {e}")
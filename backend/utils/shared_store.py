@@ -0,0 +1,138 @@
+"""
+Disk-backed key/value store that is safe to share between worker processes.
+
+Writes go to a temporary file in the same directory and are published with
+os.replace(), so readers in other workers only ever see complete entries.
+Read-modify-write sequences can be serialised with `lock(key)`, an advisory
+file lock (fcntl on POSIX, msvcrt on Windows).
+"""
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+def _safe_name(key):
+    """Keys may be arbitrary strings; hash anything that is not a plain token"""
+    if key and all(c.isalnum() or c in "-_." for c in key) and len(key) <= 128 and not key.startswith("."):
+        return key
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def atomic_write_bytes(path, data):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_copy(src, dest):
+    """Copy src to dest so that dest appears all at once"""
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=str(dest.parent))
+    try:
+        with os.fdopen(fd, "wb") as out, open(src, "rb") as inp:
+            while True:
+                chunk = inp.read(1024 * 1024)
+                if not chunk:
+                    break
+                out.write(chunk)
+        os.replace(tmp, dest)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def file_lock(lock_path):
+    """Exclusive advisory lock held for the duration of the block"""
+    lock_path = Path(lock_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        if os.name == "nt":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class DiskStore:
+    """A directory of entries addressed by key, shared by every worker on the host"""
+
+    def __init__(self, root, suffix=""):
+        self.root = Path(root)
+        self.suffix = suffix
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key):
+        name = _safe_name(key)
+        # Two-level fan-out keeps directories small once there are many entries
+        return self.root / name[:2] / (name + self.suffix)
+
+    def exists(self, key):
+        return self.path_for(key).exists()
+
+    def get_bytes(self, key):
+        try:
+            with open(self.path_for(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_bytes(self, key, data):
+        path = self.path_for(key)
+        atomic_write_bytes(path, data)
+        return path
+
+    def get_json(self, key):
+        data = self.get_bytes(key)
+        if data is None:
+            return None
+        try:
+            return json.loads(data.decode("utf-8"))
+        except ValueError:
+            return None
+
+    def put_json(self, key, value):
+        return self.put_bytes(key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def delete(self, key):
+        try:
+            self.path_for(key).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    @contextmanager
+    def lock(self, key):
+        with file_lock(self.root / ".locks" / (_safe_name(key) + ".lock")):
+            yield
@@ -0,0 +1,57 @@
+"""
+Singleflight: run one execution per key and share it with concurrent callers.
+
+A double-clicked "Generate" or a client retry arrives while the first
+request is still crawling and calling Gemini. Instead of paying for the
+whole pipeline again, the duplicate attaches to the running execution and
+receives the same result (or the same error). Coalescing is per worker
+process; the result itself is not cached once the execution finishes.
+"""
+import asyncio
+import hashlib
+import json
+
+from utils.metrics import record_cache
+
+
+def fingerprint(*parts):
+    """Stable sha256 over JSON-serialisable request inputs"""
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Keyed in-flight executions. The shared task is shielded, so a caller
+    that disconnects does not cancel the work the others are waiting on.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+
+    def inflight(self):
+        return len(self._calls)
+
+    async def do(self, key, start):
+        """
+        Await the execution for `key`, calling start() to create it if none is
+        running. Returns (result, shared) where shared is True for callers
+        that joined an execution started by someone else.
+        """
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        shared = task is not None and task.get_loop() is loop and not task.done()
+        record_cache(self.name, shared)
+        if not shared:
+            task = asyncio.ensure_future(start())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the outcome so a failure nobody awaited is not reported as unhandled
+        if not task.cancelled():
+            task.exception()
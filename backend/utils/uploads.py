@@ -0,0 +1,91 @@
+import hashlib
+import os
+from pathlib import Path
+
+# Uploads are copied in fixed-size chunks so a large file never sits in memory
+UPLOAD_CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+
+# A PDF header may be preceded by a little junk; readers accept it within the first 1 KB
+PDF_MAGIC = b"%PDF-"
+PDF_MAGIC_WINDOW = 1024
+
+
+class UploadError(Exception):
+    """
+    Raised when an upload is rejected (too large, unsupported or empty)
+    """
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def sniff_upload_type(head):
+    """
+    Decide the file type from its first bytes instead of trusting the filename.
+    Returns "pdf", "txt" or None when the content is not supported.
+    """
+    if not head:
+        return None
+    if PDF_MAGIC in head[:PDF_MAGIC_WINDOW]:
+        return "pdf"
+    if b"\x00" in head:
+        return None
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # The chunk boundary may split a multi-byte character; anything else is binary
+        if e.start < len(head) - 3:
+            return None
+    return "txt"
+
+
+async def save_upload(upload, dest_dir, max_bytes=MAX_UPLOAD_BYTES, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Stream an UploadFile into dest_dir in chunks, enforcing a hard size limit.
+    The type is sniffed from the first chunk and the content is hashed as it is written.
+    Returns a dict with path, kind, size and sha256.
+    """
+    declared_size = getattr(upload, "size", None)
+    if declared_size is not None and declared_size > max_bytes:
+        raise UploadError(f"Upload too large: limit is {max_bytes} bytes", status_code=413)
+
+    first = await upload.read(chunk_size)
+    kind = sniff_upload_type(first)
+    if kind is None:
+        claimed = (upload.filename or "").rsplit(".", 1)[-1].lower()
+        if not first:
+            raise UploadError("Uploaded file is empty")
+        raise UploadError(f"Unsupported file type: {claimed or 'unknown'}", status_code=415)
+
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    path = dest_dir / f"resume.{kind}"
+
+    digest = hashlib.sha256()
+    size = 0
+    chunk = first
+    try:
+        with open(path, "wb") as f:
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadError(f"Upload too large: limit is {max_bytes} bytes", status_code=413)
+                digest.update(chunk)
+                f.write(chunk)
+                chunk = await upload.read(chunk_size)
+    except BaseException:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        raise
+    finally:
+        await upload.close()
+
+    return {
+        "path": str(path),
+        "kind": kind,
+        "size": size,
+        "sha256": digest.hexdigest(),
+    }
@@ -0,0 +1,103 @@
+"""
+Background warm-up of heavy dependencies and the readiness state behind /ready.
+
+The agents import crawl4ai, Gemini, PyPDF2, pdf2image, PIL and Jinja lazily so
+the server starts listening immediately; warm_dependencies() then loads them
+off the event loop so the first real request does not pay for the imports.
+"""
+import importlib
+import threading
+import time
+
+HEAVY_MODULES = (
+    "crawl4ai",
+    "PyPDF2",
+    "pdf2image",
+    "PIL.Image",
+    "jinja2",
+    "numpy",
+)
+
+# Pure-Python modules that are safe to import in a pre-fork master process. crawl4ai
+# (Playwright) and the Gemini SDK (gRPC) must be initialised inside each worker.
+FORK_SAFE_MODULES = (
+    "PyPDF2",
+    "pdf2image",
+    "PIL.Image",
+    "jinja2",
+    "numpy",
+)
+
+_state = {
+    "ready": False,
+    "started_at": None,
+    "finished_at": None,
+    "timings_ms": {},
+    "errors": {},
+}
+_lock = threading.Lock()
+
+
+def warm_dependencies():
+    """Import heavy modules and configure the Gemini client; safe to call more than once"""
+    with _lock:
+        if _state["ready"]:
+            return dict(_state)
+        _state["started_at"] = time.time()
+
+    timings, errors = {}, {}
+    for name in HEAVY_MODULES:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            errors[name] = f"{type(e).__name__}: {e}"
+        timings[name] = round((time.perf_counter() - start) * 1000.0, 1)
+
+    start = time.perf_counter()
+    try:
+        from agents.skills_taxonomy import load_index
+        load_index()
+    except Exception as e:
+        errors["skills_index"] = f"{type(e).__name__}: {e}"
+    timings["skills_index"] = round((time.perf_counter() - start) * 1000.0, 1)
+
+    start = time.perf_counter()
+    try:
+        from agents.llm_client import get_genai
+        get_genai()
+    except Exception as e:
+        errors["google.generativeai"] = f"{type(e).__name__}: {e}"
+    timings["google.generativeai"] = round((time.perf_counter() - start) * 1000.0, 1)
+
+    with _lock:
+        _state["timings_ms"] = timings
+        _state["errors"] = errors
+        _state["finished_at"] = time.time()
+        _state["ready"] = True
+        return dict(_state)
+
+
+def preload_fork_safe():
+    """Import the fork-safe dependencies so forked workers share their pages copy-on-write"""
+    for name in FORK_SAFE_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"⚠ Preload of {name} failed: {e}")
+    try:
+        from agents.skills_taxonomy import load_index
+        load_index()
+    except Exception as e:
+        print(f"⚠ Preload of the skills index failed: {e}")
+
+
+def mark_ready():
+    """Used when warm-up is disabled: dependencies will load on first request instead"""
+    with _lock:
+        _state["ready"] = True
+
+
+def readiness():
+    with _lock:
+        return dict(_state)
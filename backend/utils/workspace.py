@@ -0,0 +1,289 @@
+"""
+Per-request temp file lifecycle and the disk janitor.
+
+Every /process/ request works in a JobWorkspace: a private directory under
+temp/jobs plus any files it registers elsewhere. The workspace is removed
+when the response has been sent or as soon as the request fails. The
+janitor sweeps what slips through (crashed workers, old releases, caches)
+by age and keeps temp/ under a total size quota.
+
+Every worker runs its own janitor over the shared temp/, so a workspace
+in use holds an advisory lock on its .active marker file. Janitors in any
+process skip directories whose marker is locked; the OS drops the lock
+when the owning process dies, so a crashed worker's leftovers are swept.
+"""
+import asyncio
+import fnmatch
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from utils.metrics import Counter, Gauge
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+TEMP_ROOT = os.getenv("TEMP_ROOT", "./temp")
+JOBS_DIR = os.path.join(TEMP_ROOT, "jobs")
+
+# Leftover job directories older than this are removed
+TEMP_JOB_MAX_AGE = float(os.getenv("TEMP_JOB_MAX_AGE", "3600"))
+# Total size of temp/ before the oldest entries are evicted
+TEMP_MAX_BYTES = int(os.getenv("TEMP_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+JANITOR_INTERVAL = float(os.getenv("JANITOR_INTERVAL", "300"))
+
+# Files older releases wrote into the working directory
+LEGACY_CWD_PATTERNS = ("screenshot_*.png", "pdfpage.png")
+# Locked by the process using a workspace for as long as the workspace is active
+ACTIVE_MARKER = ".active"
+
+JANITOR_REMOVED = Counter(
+    "resume_janitor_removed_total", "Temp entries removed by the janitor", ["area", "reason"]
+)
+JANITOR_FREED = Counter(
+    "resume_janitor_freed_bytes_total", "Bytes freed by the janitor", ["area"]
+)
+TEMP_BYTES = Gauge(
+    "resume_temp_bytes", "Bytes used under the temp directory after the last sweep", ["area"]
+)
+
+_active = set()
+_active_lock = threading.Lock()
+
+# name -> {"path", "max_age", "mode"}; mode "dirs" treats each child directory as one entry
+_areas = {}
+
+
+def register_area(name, path, max_age, mode="files"):
+    """Let a cache under temp/ be aged and size-limited by the janitor"""
+    _areas[name] = {"path": path, "max_age": max_age, "mode": mode}
+
+
+def _try_lock(f):
+    """Non-blocking exclusive lock on an open file; False when another handle holds it"""
+    try:
+        if os.name == "nt":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(f):
+    try:
+        if os.name == "nt":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    except OSError:
+        pass
+
+
+def in_use(path):
+    """Whether a workspace directory is active in any process on this host"""
+    try:
+        f = open(os.path.join(path, ACTIVE_MARKER), "rb")
+    except OSError:
+        return False
+    with f:
+        if _try_lock(f):
+            _unlock(f)
+            return False
+        return True
+
+
+register_area("jobs", JOBS_DIR, TEMP_JOB_MAX_AGE, mode="dirs")
+register_area("loose", TEMP_ROOT, TEMP_JOB_MAX_AGE, mode="loose")
+
+
+class JobWorkspace:
+    """
+    Private directory for one request. Files created inside it need no
+    bookkeeping; files that must live elsewhere are registered with track().
+    cleanup() is idempotent and safe to call from a background task.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.extra_files = []
+        self.kept = False
+        self.cleaned = False
+        with _active_lock:
+            _active.add(os.path.abspath(path))
+        self._marker = open(os.path.join(path, ACTIVE_MARKER), "a+b")
+        _try_lock(self._marker)
+
+    @classmethod
+    def create(cls, prefix="job_", root=JOBS_DIR):
+        os.makedirs(root, exist_ok=True)
+        return cls(tempfile.mkdtemp(prefix=prefix, dir=root))
+
+    def file(self, name):
+        """Path for a new file inside the workspace"""
+        return os.path.join(self.path, name)
+
+    def write_text(self, name, text):
+        path = self.file(name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def track(self, path):
+        """Register a file created outside the workspace so cleanup() removes it too"""
+        if path:
+            self.extra_files.append(path)
+        return path
+
+    def keep(self):
+        """Retain the files for inspection; the janitor removes them once they age out"""
+        self.kept = True
+
+    def cleanup(self):
+        if self.cleaned:
+            return
+        self.cleaned = True
+        with _active_lock:
+            _active.discard(os.path.abspath(self.path))
+        _unlock(self._marker)
+        self._marker.close()
+        if self.kept:
+            return
+        for path in self.extra_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def cleanup_task(self):
+        """BackgroundTask that removes the workspace after the response is sent"""
+        from starlette.background import BackgroundTask
+        return BackgroundTask(self.cleanup)
+
+
+def _entry_size(path):
+    if os.path.isfile(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+def _entries(area):
+    """(path, mtime, size) for the entries of one area"""
+    root = area["path"]
+    if not os.path.isdir(root):
+        return []
+    found = []
+    if area["mode"] == "files":
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found.append((path, st.st_mtime, st.st_size))
+        return found
+    for entry in os.scandir(root):
+        try:
+            if area["mode"] == "dirs" and entry.is_dir(follow_symlinks=False):
+                found.append((entry.path, entry.stat().st_mtime, _entry_size(entry.path)))
+            elif area["mode"] == "loose" and entry.is_file(follow_symlinks=False):
+                found.append((entry.path, entry.stat().st_mtime, entry.stat().st_size))
+        except OSError:
+            continue
+    return found
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def sweep(max_bytes=TEMP_MAX_BYTES, now=None):
+    """
+    One janitor pass: remove entries past their area's max age, then evict
+    the oldest entries until temp/ fits in max_bytes. Workspaces of requests
+    still in flight are never touched. Returns a summary dict.
+    """
+    now = now or time.time()
+    with _active_lock:
+        active = set(_active)
+
+    removed, freed = 0, 0
+    survivors = []
+    for name, area in _areas.items():
+        kept_bytes = 0
+        for path, mtime, size in _entries(area):
+            if os.path.abspath(path) in active or (area["mode"] == "dirs" and in_use(path)):
+                kept_bytes += size
+                continue
+            if now - mtime > area["max_age"]:
+                _remove(path)
+                removed += 1
+                freed += size
+                JANITOR_REMOVED.inc(area=name, reason="age")
+                JANITOR_FREED.inc(size, area=name)
+            else:
+                kept_bytes += size
+                survivors.append((mtime, size, path, name))
+        TEMP_BYTES.set(kept_bytes, area=name)
+
+    total = sum(size for _, size, _, _ in survivors)
+    if total > max_bytes:
+        for mtime, size, path, name in sorted(survivors):
+            if total <= max_bytes:
+                break
+            _remove(path)
+            total -= size
+            removed += 1
+            freed += size
+            JANITOR_REMOVED.inc(area=name, reason="quota")
+            JANITOR_FREED.inc(size, area=name)
+
+    for pattern in LEGACY_CWD_PATTERNS:
+        for name in fnmatch.filter(os.listdir("."), pattern):
+            try:
+                if now - os.path.getmtime(name) > TEMP_JOB_MAX_AGE:
+                    os.remove(name)
+                    removed += 1
+                    JANITOR_REMOVED.inc(area="cwd", reason="legacy")
+            except OSError:
+                pass
+
+    return {"removed": removed, "freed_bytes": freed, "active": len(active)}
+
+
+async def run_janitor(interval=JANITOR_INTERVAL):
+    """Background loop started by the app lifespan"""
+    while True:
+        try:
+            summary = await asyncio.to_thread(sweep)
+            if summary["removed"]:
+                print(f"🧹 Janitor removed {summary['removed']} temp entries "
+                      f"({summary['freed_bytes'] / 1024 / 1024:.1f} MB)")
+        except Exception as e:
+            print(f"⚠ Janitor sweep failed: {e}")
+        await asyncio.sleep(interval)